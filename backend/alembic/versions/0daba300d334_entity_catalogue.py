@@ -0,0 +1,70 @@
+"""entity catalogue with per-document occurrences
+
+Revision ID: 0daba300d334
+Revises: 20b944f8dade
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0daba300d334'
+down_revision: Union[str, None] = '20b944f8dade'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENTITY_TABLES = ('molecular_targets', 'therapies')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ENTITY_TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column('mention_count', sa.Integer(), nullable=False, server_default='0'))
+            batch.add_column(sa.Column('document_count', sa.Integer(), nullable=False, server_default='0'))
+
+        # Collapse existing one-row-per-mention data into one row per name,
+        # keeping the most recent row and its PFS values
+        op.execute(
+            f"UPDATE {table} SET mention_count = "
+            f"(SELECT COUNT(*) FROM {table} AS dup WHERE dup.name = {table}.name)"
+        )
+        op.execute(
+            f"DELETE FROM {table} WHERE name IS NOT NULL AND id NOT IN "
+            f"(SELECT MAX(id) FROM {table} WHERE name IS NOT NULL GROUP BY name)"
+        )
+
+        op.drop_index(f'ix_{table}_name', table_name=table)
+        op.create_index(f'ix_{table}_name', table, ['name'], unique=True)
+        op.create_index(f'ix_{table}_mention_count', table, ['mention_count'])
+        op.create_index(f'ix_{table}_document_count', table, ['document_count'])
+
+    op.create_table(
+        'entity_occurrences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity_kind', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('document_key', sa.String(), nullable=False),
+        sa.Column('mentions', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('entity_kind', 'entity_id', 'document_key', name='uq_entity_occurrences_entity_document'),
+    )
+    op.create_index('ix_entity_occurrences_document_key', 'entity_occurrences', ['document_key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('entity_occurrences')
+    for table in ENTITY_TABLES:
+        op.drop_index(f'ix_{table}_document_count', table_name=table)
+        op.drop_index(f'ix_{table}_mention_count', table_name=table)
+        op.drop_index(f'ix_{table}_name', table_name=table)
+        op.create_index(f'ix_{table}_name', table, ['name'])
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column('document_count')
+            batch.drop_column('mention_count')
@@ -0,0 +1,38 @@
+"""results query indexes
+
+Revision ID: 20b944f8dade
+Revises: 86e26b1b3f3d
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20b944f8dade'
+down_revision: Union[str, None] = '86e26b1b3f3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination walks (timestamp, id); filters narrow by name,
+    # entity type or confidence range first.
+    for table in ('molecular_targets', 'therapies'):
+        op.create_index(f'ix_{table}_timestamp_id', table, ['timestamp', 'id'])
+        op.create_index(f'ix_{table}_name_timestamp', table, ['name', 'timestamp'])
+        op.create_index(f'ix_{table}_confidence', table, ['confidence'])
+    op.create_index('ix_therapies_entity_type_timestamp', 'therapies', ['entity_type', 'timestamp'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_therapies_entity_type_timestamp', table_name='therapies')
+    for table in ('molecular_targets', 'therapies'):
+        op.drop_index(f'ix_{table}_confidence', table_name=table)
+        op.drop_index(f'ix_{table}_name_timestamp', table_name=table)
+        op.drop_index(f'ix_{table}_timestamp_id', table_name=table)
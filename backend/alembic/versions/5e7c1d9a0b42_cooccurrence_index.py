@@ -0,0 +1,61 @@
+"""co-occurrence index
+
+Revision ID: 5e7c1d9a0b42
+Revises: acb30bbacc26
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7c1d9a0b42'
+down_revision: Union[str, None] = 'acb30bbacc26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'cooccurrences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('pair_kind', sa.String(), nullable=False),
+        sa.Column('target', sa.String(), nullable=False),
+        sa.Column('partner', sa.String(), nullable=False),
+        sa.Column('sentence_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('document_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('pair_kind', 'target', 'partner', name='uq_cooccurrences_pair'),
+    )
+    op.create_index(
+        'ix_cooccurrences_target_sentence_count', 'cooccurrences', ['pair_kind', 'target', 'sentence_count']
+    )
+    op.create_index(
+        'ix_cooccurrences_target_document_count', 'cooccurrences', ['pair_kind', 'target', 'document_count']
+    )
+    op.create_table(
+        'document_cooccurrences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_key', sa.String(), nullable=False),
+        sa.Column('pair_kind', sa.String(), nullable=False),
+        sa.Column('target', sa.String(), nullable=False),
+        sa.Column('partner', sa.String(), nullable=False),
+        sa.Column('sentence_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'document_key', 'pair_kind', 'target', 'partner', name='uq_document_cooccurrences_pair'
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('document_cooccurrences')
+    op.drop_index('ix_cooccurrences_target_document_count', table_name='cooccurrences')
+    op.drop_index('ix_cooccurrences_target_sentence_count', table_name='cooccurrences')
+    op.drop_table('cooccurrences')
@@ -0,0 +1,40 @@
+"""page entities unique
+
+Revision ID: 7f4b0e6d93a1
+Revises: e5a92c41b7d8
+Create Date: 2026-10-19 11:00:00.000000
+
+One page_entities row per (page, entity), so that concurrent uploads of the
+same file can insert with ON CONFLICT DO NOTHING. The unique index also
+serves the page_id lookups, which had an index of their own.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f4b0e6d93a1'
+down_revision: Union[str, None] = 'e5a92c41b7d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicates left by concurrent uploads before this revision
+    op.execute(
+        "DELETE FROM page_entities WHERE id NOT IN "
+        "(SELECT MIN(id) FROM page_entities GROUP BY page_id, name_key, entity_type)"
+    )
+    op.create_index('uq_page_entities_page_name_type', 'page_entities',
+                    ['page_id', 'name_key', 'entity_type'], unique=True)
+    op.drop_index('ix_page_entities_page_id', table_name='page_entities')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_page_entities_page_id', 'page_entities', ['page_id'], unique=False)
+    op.drop_index('uq_page_entities_page_name_type', table_name='page_entities')
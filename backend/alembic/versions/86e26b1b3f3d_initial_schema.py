@@ -0,0 +1,75 @@
+"""initial schema
+
+Revision ID: 86e26b1b3f3d
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '86e26b1b3f3d'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'molecular_targets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('my', sa.Float(), nullable=True),
+        sa.Column('mn', sa.Float(), nullable=True),
+        sa.Column('hesitancy', sa.Float(), nullable=True),
+        sa.Column('confidence', sa.Float(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_molecular_targets_id', 'molecular_targets', ['id'])
+    op.create_index('ix_molecular_targets_name', 'molecular_targets', ['name'])
+
+    op.create_table(
+        'therapies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('entity_type', sa.String(), nullable=True),
+        sa.Column('my', sa.Float(), nullable=True),
+        sa.Column('mn', sa.Float(), nullable=True),
+        sa.Column('hesitancy', sa.Float(), nullable=True),
+        sa.Column('confidence', sa.Float(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_therapies_id', 'therapies', ['id'])
+    op.create_index('ix_therapies_name', 'therapies', ['name'])
+
+    op.create_table(
+        'ingest_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('path', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('pages_done', sa.Integer(), nullable=True),
+        sa.Column('entities_found', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ingest_jobs_status', 'ingest_jobs', ['status'])
+    op.create_index('ix_ingest_jobs_created_at', 'ingest_jobs', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ingest_jobs')
+    op.drop_table('therapies')
+    op.drop_table('molecular_targets')
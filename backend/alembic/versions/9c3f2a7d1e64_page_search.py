@@ -0,0 +1,63 @@
+"""page search
+
+Revision ID: 9c3f2a7d1e64
+Revises: 5e7c1d9a0b42
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3f2a7d1e64'
+down_revision: Union[str, None] = '5e7c1d9a0b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'document_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_key', sa.String(), nullable=False),
+        sa.Column('page', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('document_key', 'page', name='uq_document_pages_document_page'),
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_document_pages_search', 'document_pages', [sa.text("to_tsvector('english', text)")],
+            postgresql_using='gin',
+        )
+    op.create_table(
+        'page_entities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('page_id', sa.Integer(), nullable=False),
+        sa.Column('document_key', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('name_key', sa.String(), nullable=False),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('mentions', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_page_entities_page_id'), 'page_entities', ['page_id'])
+    op.create_index(op.f('ix_page_entities_document_key'), 'page_entities', ['document_key'])
+    op.create_index(op.f('ix_page_entities_name_key'), 'page_entities', ['name_key'])
+    op.create_index('ix_page_entities_entity_type_page_id', 'page_entities', ['entity_type', 'page_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_page_entities_entity_type_page_id', table_name='page_entities')
+    op.drop_index(op.f('ix_page_entities_name_key'), table_name='page_entities')
+    op.drop_index(op.f('ix_page_entities_document_key'), table_name='page_entities')
+    op.drop_index(op.f('ix_page_entities_page_id'), table_name='page_entities')
+    op.drop_table('page_entities')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_document_pages_search', table_name='document_pages')
+    op.drop_table('document_pages')
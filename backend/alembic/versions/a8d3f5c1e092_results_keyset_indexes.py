@@ -0,0 +1,41 @@
+"""results keyset indexes
+
+Revision ID: a8d3f5c1e092
+Revises: 7f4b0e6d93a1
+Create Date: 2026-10-19 12:00:00.000000
+
+/api/results is keyset-paginated on id alone (timestamp is rewritten by
+every upsert), so the (timestamp, id) and (name, timestamp) indexes are
+never used: name lookups go through its unique index. The entity type
+filter gets an (entity_type, id) index matching the id order.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f5c1e092'
+down_revision: Union[str, None] = '7f4b0e6d93a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('molecular_targets', 'therapies'):
+        op.drop_index(f'ix_{table}_timestamp_id', table_name=table)
+        op.drop_index(f'ix_{table}_name_timestamp', table_name=table)
+    op.drop_index('ix_therapies_entity_type_timestamp', table_name='therapies')
+    op.create_index('ix_therapies_entity_type_id', 'therapies', ['entity_type', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_therapies_entity_type_id', table_name='therapies')
+    op.create_index('ix_therapies_entity_type_timestamp', 'therapies', ['entity_type', 'timestamp'])
+    for table in ('molecular_targets', 'therapies'):
+        op.create_index(f'ix_{table}_name_timestamp', table, ['name', 'timestamp'])
+        op.create_index(f'ix_{table}_timestamp_id', table, ['timestamp', 'id'])
@@ -0,0 +1,39 @@
+"""guideline cache
+
+Revision ID: b0dc7afde7a9
+Revises: 0daba300d334
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0dc7afde7a9'
+down_revision: Union[str, None] = '0daba300d334'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'guideline_cache',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('target', sa.String(), nullable=True),
+        sa.Column('entity_type', sa.String(), nullable=True),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('guidelines', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_guideline_cache_target', 'guideline_cache', ['target'])
+    op.create_index('ix_guideline_cache_created_at', 'guideline_cache', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('guideline_cache')
@@ -0,0 +1,50 @@
+"""ingest jobs for stamped databases
+
+Revision ID: c4d1a8e7f325
+Revises: 3b8e6f0c2d17
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases created by the pre-migration create_all startup are stamped at the
+baseline revision, which also creates `ingest_jobs`; those that predate the
+job queue never got the table. Create it here when it is missing.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d1a8e7f325'
+down_revision: Union[str, None] = '3b8e6f0c2d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('ingest_jobs'):
+        return
+    op.create_table(
+        'ingest_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('path', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('pages_done', sa.Integer(), nullable=True),
+        sa.Column('entities_found', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ingest_jobs_status', 'ingest_jobs', ['status'])
+    op.create_index('ix_ingest_jobs_created_at', 'ingest_jobs', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The table belongs to the baseline revision from here on; nothing to undo
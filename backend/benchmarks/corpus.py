@@ -0,0 +1,106 @@
+"""
+Synthetic oncology-style corpus for the benchmarks.
+
+Text is assembled from sentence templates filled with filler vocabulary and
+names from the seed lexicon (plus synonyms and one-letter misspellings for
+the fuzzy path). Everything is driven by a seeded random.Random, so the same
+seed always yields the same corpus and benchmark runs stay comparable.
+"""
+import random
+from typing import Dict, List, Tuple
+
+TEMPLATES = [
+    "Expression of {target} was {finding} in {tissue} samples from patients with {disease}.",
+    "Treatment with {drug} {effect} {target} signalling in {tissue} cell lines.",
+    "We observed that {target} and {target2} were co-expressed in {count} of {total} {disease} tumours.",
+    "Combination therapy with {drug} and {drug2} {effect} proliferation compared with {drug} alone.",
+    "The {tissue} cohort (n = {total}) showed {finding} levels of {target}, e.g. in grade {grade} lesions.",
+    "Patients receiving {drug} had a median survival of {count} months (95% CI, {grade}-{total}).",
+    "Inhibition of {target} by {drug} was associated with reduced {process} in vitro.",
+    "Histologically, grade {grade} {disease} is highly cellular with a mucomyxoid matrix and mitoses.",
+    "Dedifferentiated variants are rare, and most involve the {tissue}, followed by the femur and humerus.",
+]
+FILLERS = {
+    "finding": ["elevated", "reduced", "unchanged", "markedly increased", "heterogeneous"],
+    "effect": ["suppressed", "enhanced", "did not alter", "partially reversed", "abolished"],
+    "tissue": ["pelvic", "femoral", "chondroid", "mesenchymal", "synovial", "bone marrow"],
+    "disease": ["chondrosarcoma", "osteosarcoma", "Ewing sarcoma", "fibrosarcoma"],
+    "process": ["angiogenesis", "apoptosis resistance", "invasion", "matrix deposition"],
+}
+
+
+def _misspell(rng: random.Random, name: str) -> str:
+    """Swap two adjacent letters, the kind of typo the fuzzy index should catch."""
+    if len(name) < 5:
+        return name
+    i = rng.randrange(1, len(name) - 2)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+class CorpusGenerator:
+    """Seeded generator of abstracts and multi-page PDFs with known entity mentions."""
+
+    def __init__(self, seed: int = 1234, misspell_rate: float = 0.05, synonym_rate: float = 0.1):
+        from services.nlp_service import KNOWN_DRUGS, KNOWN_TARGETS, SYNONYMS
+
+        self.rng = random.Random(seed)
+        self.targets = sorted(KNOWN_TARGETS)
+        self.drugs = sorted(KNOWN_DRUGS)
+        self.synonyms: Dict[str, List[str]] = {}
+        for synonym, canonical in sorted(SYNONYMS.items()):
+            self.synonyms.setdefault(canonical, []).append(synonym)
+        self.misspell_rate = misspell_rate
+        self.synonym_rate = synonym_rate
+
+    def _surface(self, canonical: str) -> str:
+        roll = self.rng.random()
+        if roll < self.synonym_rate and canonical in self.synonyms:
+            return self.rng.choice(self.synonyms[canonical])
+        if roll > 1 - self.misspell_rate:
+            return _misspell(self.rng, canonical)
+        return canonical
+
+    def sentence(self) -> Tuple[str, List[str]]:
+        """One sentence and the canonical names seeded into it."""
+        rng = self.rng
+        target, target2 = rng.sample(self.targets, 2)
+        drug, drug2 = rng.sample(self.drugs, 2)
+        template = rng.choice(TEMPLATES)
+        values = {key: rng.choice(options) for key, options in FILLERS.items()}
+        values.update(
+            target=self._surface(target), target2=self._surface(target2),
+            drug=drug, drug2=drug2,
+            count=rng.randint(2, 40), total=rng.randint(40, 400), grade=rng.randint(1, 3),
+        )
+        seeded = [name for key, name in (("{target}", target), ("{target2}", target2),
+                                         ("{drug}", drug), ("{drug2}", drug2)) if key in template]
+        return template.format(**values), seeded
+
+    def document(self, sentences: int = 12) -> Tuple[str, List[str]]:
+        """A paragraph-structured abstract and the canonical names it mentions."""
+        parts, seeded = [], []
+        for i in range(sentences):
+            text, names = self.sentence()
+            parts.append(text)
+            seeded.extend(names)
+            if i % 5 == 4:
+                parts.append("\n\n")
+        return " ".join(parts), seeded
+
+    def documents(self, count: int, sentences: int = 12) -> List[Tuple[str, List[str]]]:
+        return [self.document(sentences) for _ in range(count)]
+
+    def write_pdf(self, path: str, pages: int, sentences_per_page: int = 25) -> List[str]:
+        """Write a multi-page PDF; returns the seeded canonical names."""
+        import fitz  # PyMuPDF
+
+        doc = fitz.open()
+        seeded: List[str] = []
+        for _ in range(pages):
+            text, names = self.document(sentences_per_page)
+            seeded.extend(names)
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=9)
+        doc.save(path)
+        doc.close()
+        return seeded
@@ -0,0 +1,112 @@
+"""
+Compare CPU inference configurations for guideline generation.
+
+Each configuration runs in a fresh process so memory numbers are not polluted
+by previously loaded models. Reports per-request latency percentiles, RSS
+after loading, and output drift against the full-precision baseline.
+
+    python -m benchmarks.guideline_inference --requests 20 --out guideline_bench.json
+"""
+import argparse
+import difflib
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import environment, latency_summary, write_report
+
+CONFIGS = {
+    "baseline": {"model": "t5-base", "quantize": False, "num_threads": 0},
+    "threads": {"model": "t5-base", "quantize": False, "num_threads": max(1, (os.cpu_count() or 2) // 2)},
+    "int8": {"model": "t5-base", "quantize": True, "num_threads": 0},
+    "int8_threads": {"model": "t5-base", "quantize": True, "num_threads": max(1, (os.cpu_count() or 2) // 2)},
+    "t5-small": {"model": "t5-small", "quantize": False, "num_threads": 0},
+}
+
+
+def build_requests(count: int) -> List[Tuple[str, str]]:
+    from services.nlp_service import KNOWN_DRUGS, KNOWN_TARGETS
+
+    pool = [(t, "TARGET") for t in sorted(KNOWN_TARGETS)] + [(d, "DRUG") for d in sorted(KNOWN_DRUGS)]
+    return [pool[i % len(pool)] for i in range(count)]
+
+
+def run_config(config: Dict, requests: List[Tuple[str, str]]) -> Dict:
+    """Runs inside a spawned worker: load one configuration and time each request."""
+    import time
+
+    import services.model_registry as model_registry
+    from services.model_registry import ModelRegistry, current_rss_bytes
+    from services.nlp_service import NlpService
+
+    registry = ModelRegistry(quantize=config["quantize"], num_threads=config["num_threads"])
+    model_registry._registry = registry
+    service = NlpService()
+    service.t5_model_name = config["model"]
+
+    rss_before = current_rss_bytes()
+    registry.get_t5(config["model"])
+    rss_loaded = current_rss_bytes()
+
+    # One warm-up call so lazy kernel initialisation is not counted
+    service.generate_guidelines(*requests[0])
+
+    latencies, outputs = [], []
+    for target, entity_type in requests:
+        start = time.perf_counter()
+        outputs.append(service.generate_guidelines(target, entity_type))
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "config": config,
+        "latency": latency_summary(latencies),
+        "rss_loaded_bytes": rss_loaded,
+        "rss_model_bytes": rss_loaded - rss_before,
+        "rss_peak_bytes": current_rss_bytes(),
+        "outputs": outputs,
+    }
+
+
+def drift(baseline: List[str], candidate: List[str]) -> Dict[str, float]:
+    """How far a configuration's outputs moved from the baseline outputs."""
+    ratios = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(baseline, candidate)]
+    exact = sum(a == b for a, b in zip(baseline, candidate))
+    return {
+        "mean_similarity": round(sum(ratios) / len(ratios), 4) if ratios else 0.0,
+        "exact_match_rate": round(exact / len(ratios), 4) if ratios else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--configs", nargs="*", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--out", default="guideline_bench.json")
+    args = parser.parse_args()
+
+    requests = build_requests(args.requests)
+    results = {}
+    for name in args.configs:
+        print(f"Running {name}...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results[name] = pool.submit(run_config, CONFIGS[name], requests).result()
+
+    baseline = results.get("baseline")
+    for name, result in results.items():
+        if baseline is not None:
+            result["drift_vs_baseline"] = drift(baseline["outputs"], result["outputs"])
+        latency = result["latency"]
+        print(
+            f"{name:>14}: p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, "
+            f"model RSS {result['rss_model_bytes'] / 2**20:.0f} MiB"
+        )
+
+    write_report(args.out, {"environment": environment(), "requests": requests, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Concurrent load test against a running server.
+
+N clients (threads, default 50) loop for --duration seconds, each request
+being a PDF upload with probability --upload-ratio and a /api/results page
+otherwise. Upload PDFs are generated from the synthetic corpus up front;
+with fewer --pdfs than uploads, repeats are served from the document cache.
+Reports throughput, per-endpoint latency percentiles and status counts
+(503s are backpressure rejections).
+
+    gunicorn -c gunicorn.conf.py main:app &
+    python -m benchmarks.load_test --url http://localhost:8000 --clients 50 --out load.json
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import environment, latency_summary, write_report
+from benchmarks.corpus import CorpusGenerator
+
+
+def multipart_body(filename: str, content: bytes) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def request(url: str, data: bytes = None, content_type: str = None, timeout: float = 120) -> int:
+    req = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET")
+    if content_type:
+        req.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        # Connection refused/reset or timed out
+        return 0
+
+
+def run_client(args, uploads: List[Tuple[str, bytes]], deadline: float, seed: int) -> List[Tuple[str, int, float]]:
+    rng = random.Random(seed)
+    samples = []
+    while time.perf_counter() < deadline:
+        if rng.random() < args.upload_ratio:
+            name, content = rng.choice(uploads)
+            body, content_type = multipart_body(name, content)
+            endpoint = "upload"
+            start = time.perf_counter()
+            status = request(f"{args.url}/api/upload", body, content_type)
+        else:
+            endpoint = "results"
+            start = time.perf_counter()
+            status = request(f"{args.url}/api/results?limit={args.results_limit}")
+        samples.append((endpoint, status, time.perf_counter() - start))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--upload-ratio", type=float, default=0.2)
+    parser.add_argument("--pdfs", type=int, default=20, help="distinct PDFs to upload")
+    parser.add_argument("--pages", type=int, default=3, help="pages per PDF")
+    parser.add_argument("--results-limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", default="load.json")
+    args = parser.parse_args()
+
+    corpus = CorpusGenerator(args.seed)
+    uploads = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for i in range(args.pdfs):
+            path = os.path.join(workdir, f"load_{i}.pdf")
+            corpus.write_pdf(path, args.pages)
+            with open(path, "rb") as f:
+                uploads.append((os.path.basename(path), f.read()))
+
+    print(f"Running {args.clients} clients for {args.duration:g}s against {args.url}...")
+    started = time.perf_counter()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        futures = [pool.submit(run_client, args, uploads, deadline, args.seed + n) for n in range(args.clients)]
+        samples = [sample for future in futures for sample in future.result()]
+    elapsed = time.perf_counter() - started
+
+    results: Dict[str, Dict] = {}
+    for endpoint in ("upload", "results"):
+        latencies = [seconds for name, status, seconds in samples if name == endpoint and status == 200]
+        statuses = Counter(status for name, status, _ in samples if name == endpoint)
+        results[endpoint] = {
+            "requests": sum(statuses.values()),
+            "ok_per_sec": round(len(latencies) / elapsed, 2),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "latency": latency_summary(latencies),
+        }
+        print(
+            f"{endpoint:>8}: {results[endpoint]['ok_per_sec']} ok/s, "
+            f"p50 {results[endpoint]['latency']['p50_ms']:.0f} ms, "
+            f"p99 {results[endpoint]['latency']['p99_ms']:.0f} ms, statuses {results[endpoint]['statuses']}"
+        )
+    total_ok = sum(1 for _, status, _ in samples if status == 200)
+    print(f"   total: {total_ok / elapsed:.1f} ok requests/s over {elapsed:.1f}s")
+
+    write_report(args.out, {
+        "environment": environment(),
+        "settings": vars(args),
+        "elapsed_seconds": round(elapsed, 3),
+        "ok_per_sec": round(total_ok / elapsed, 2),
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
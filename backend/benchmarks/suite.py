@@ -0,0 +1,242 @@
+"""
+End-to-end benchmark suite over a seeded synthetic corpus (see corpus.py).
+
+Measures, in one run:
+  extraction   - extract_entities throughput (tokens/sec) and recall of the seeded names
+  upload       - the PDF ingestion path (hash, page pool, extraction, persistence) in pages/sec
+  persistence  - EntityWriter catalogue upserts in rows/sec
+  guidelines   - generate_guidelines latency percentiles (skipped if the model cannot load)
+
+The database is a throwaway SQLite file unless DATABASE_URL is set, e.g. to a
+local Postgres. Results are written as JSON; pass --baseline with an earlier
+report to print the change of each headline number.
+
+    python -m benchmarks.suite --out bench.json [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import environment, latency_summary, write_report
+from benchmarks.corpus import CorpusGenerator
+
+# Headline numbers compared against --baseline: (section, key, higher_is_better)
+HEADLINES = [
+    ("extraction", "tokens_per_sec", True),
+    ("upload", "pages_per_sec", True),
+    ("persistence", "rows_per_sec", True),
+    ("guidelines", "p50_ms", False),
+    ("guidelines", "p95_ms", False),
+]
+
+
+def bench_extraction(nlp_service, corpus: CorpusGenerator, documents: int) -> Dict:
+    from services.nlp_service import TOKEN_PATTERN
+
+    docs = corpus.documents(documents)
+    # Warm-up: fills the fuzzy memo the way a running server would have
+    nlp_service.extract_entities(docs[0][0])
+
+    tokens = found = seeded = entities = 0
+    latencies = []
+    for text, names in docs:
+        start = time.perf_counter()
+        extracted = nlp_service.extract_entities(text)
+        latencies.append(time.perf_counter() - start)
+        tokens += len(TOKEN_PATTERN.findall(text))
+        entities += len(extracted)
+        expected = {name.upper() for name in names}
+        found += len(expected & {e["name"].upper() for e in extracted})
+        seeded += len(expected)
+
+    elapsed = sum(latencies)
+    return {
+        "documents": documents,
+        "tokens": tokens,
+        "entities": entities,
+        "tokens_per_sec": round(tokens / elapsed, 1) if elapsed else 0.0,
+        "seeded_recall": round(found / seeded, 4) if seeded else 0.0,
+        "per_document": latency_summary(latencies),
+    }
+
+
+def bench_upload(nlp_service, corpus: CorpusGenerator, workdir: str, pdfs: int, pages: int) -> Dict:
+    from models import AsyncSessionLocal, async_engine
+    from services.ingestion import ingest_pdf
+    from services.pdf_pipeline import file_sha256
+
+    paths = []
+    for i in range(pdfs):
+        path = os.path.join(workdir, f"bench_{i}.pdf")
+        corpus.write_pdf(path, pages)
+        paths.append(path)
+
+    async def ingest(path: str) -> Dict:
+        async with AsyncSessionLocal() as db:
+            return await ingest_pdf(path, os.path.basename(path), db, nlp_service, file_sha256(path))
+
+    async def run() -> Dict:
+        # Warm-up: starts the page pool so process spawn time is not counted
+        await ingest(paths[0])
+        latencies, total_pages = [], 0
+        for path in paths[1:]:
+            start = time.perf_counter()
+            result = await ingest(path)
+            latencies.append(time.perf_counter() - start)
+            total_pages += result["page_count"]
+        # A re-upload of an already processed document is served from the result cache
+        start = time.perf_counter()
+        cached = await ingest(paths[-1])
+        cached_seconds = time.perf_counter() - start
+        elapsed = sum(latencies)
+        return {
+            "documents": len(latencies),
+            "pages_per_document": pages,
+            "pages_per_sec": round(total_pages / elapsed, 2) if elapsed else 0.0,
+            "per_document": latency_summary(latencies),
+            "cached_reupload_ms": round(cached_seconds * 1000, 3),
+            "cache_hit": cached.get("cached", False),
+        }
+
+    async def run_and_close() -> Dict:
+        try:
+            return await run()
+        finally:
+            # Pooled async connections belong to this event loop
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_close())
+
+
+def bench_persistence(nlp_service, corpus: CorpusGenerator, documents: int) -> Dict:
+    from models import SessionLocal
+    from services.persistence import EntityWriter
+
+    batches = [nlp_service.extract_entities(text) for text, _ in corpus.documents(documents, sentences=40)]
+    rows = 0
+    seconds = 0.0
+    db = SessionLocal()
+    dialect = db.get_bind().dialect.name
+    try:
+        for i, entities in enumerate(batches):
+            writer = EntityWriter(db, f"bench-persistence-{time.time_ns()}-{i}")
+            start = time.perf_counter()
+            writer.add(entities)
+            writer.flush()
+            db.commit()
+            seconds += time.perf_counter() - start
+            rows += writer.rows_written
+    finally:
+        db.close()
+    return {
+        "documents": documents,
+        "rows": rows,
+        "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        "dialect": dialect,
+    }
+
+
+def bench_guidelines(nlp_service, requests: int) -> Dict:
+    from benchmarks.guideline_inference import build_requests
+
+    pairs = build_requests(requests)
+    try:
+        # Warm-up loads the model; a missing model or library skips the section
+        nlp_service.generate_guidelines(*pairs[0])
+    except Exception as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+
+    latencies = []
+    for target, entity_type in pairs:
+        start = time.perf_counter()
+        nlp_service.generate_guidelines(target, entity_type)
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def compare(report: Dict, baseline: Dict) -> None:
+    print("\nChange against baseline:")
+    for section, key, higher_is_better in HEADLINES:
+        current = report["results"].get(section, {}).get(key)
+        previous = baseline.get("results", {}).get(section, {}).get(key)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous * 100
+        better = change >= 0 if higher_is_better else change <= 0
+        print(f"  {section}.{key}: {previous} -> {current} ({change:+.1f}%{'' if better else ', regression'})")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--documents", type=int, default=200, help="abstracts for the extraction benchmark")
+    parser.add_argument("--pdfs", type=int, default=6, help="PDFs for the upload benchmark (first is warm-up)")
+    parser.add_argument("--pages", type=int, default=20, help="pages per PDF")
+    parser.add_argument("--persist-documents", type=int, default=100)
+    parser.add_argument("--guideline-requests", type=int, default=10, help="0 skips the guideline benchmark")
+    parser.add_argument("--sections", nargs="*", default=["extraction", "upload", "persistence", "guidelines"])
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--out", default="bench.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="molecular-bench-") as workdir:
+        # models creates its engine at import time, so the URL must be set first
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        from models import engine
+        from services.document_cache import EXTRACTION_VERSION
+        from services.migrations import ensure_schema
+        from services.nlp_service import get_nlp_service
+        from services.pdf_pipeline import shutdown_page_pool
+
+        ensure_schema(engine)
+        nlp_service = get_nlp_service()
+        results: Dict[str, Dict] = {}
+        try:
+            if "extraction" in args.sections:
+                print("Running extraction...")
+                results["extraction"] = bench_extraction(nlp_service, CorpusGenerator(args.seed), args.documents)
+            if "upload" in args.sections:
+                print("Running upload...")
+                results["upload"] = bench_upload(
+                    nlp_service, CorpusGenerator(args.seed + 1), workdir, max(2, args.pdfs), args.pages
+                )
+            if "persistence" in args.sections:
+                print("Running persistence...")
+                results["persistence"] = bench_persistence(
+                    nlp_service, CorpusGenerator(args.seed + 2), args.persist_documents
+                )
+            if "guidelines" in args.sections and args.guideline_requests > 0:
+                print("Running guidelines...")
+                results["guidelines"] = bench_guidelines(nlp_service, args.guideline_requests)
+        finally:
+            shutdown_page_pool()
+            engine.dispose()
+
+    report = {
+        "environment": environment(),
+        "settings": {
+            **vars(args),
+            "database": engine.dialect.name,
+            "extraction_version": EXTRACTION_VERSION,
+            "lexicon_version": nlp_service.lexicon_version,
+        },
+        "results": results,
+    }
+    for section, result in results.items():
+        print(f"{section:>12}: {json.dumps(result)}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+    write_report(args.out, report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
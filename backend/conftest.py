@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time, so point them at scratch files first
+_scratch = tempfile.mkdtemp(prefix="molecular-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'app.db')}")
+os.environ.setdefault("DGIDB_STORE_PATH", os.path.join(_scratch, "dgidb.sqlite"))
+os.environ.setdefault("JOB_UPLOAD_DIR", os.path.join(_scratch, "jobs"))
+os.environ.setdefault("LEXICON_WATCH_INTERVAL", "0")
+os.environ.setdefault("EXTRACT_WORKERS", "2")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
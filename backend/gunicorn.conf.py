@@ -0,0 +1,66 @@
+"""
+Production server mode: gunicorn -c gunicorn.conf.py main:app
+
+The app (lexicon index, routers) is imported once in the master process, the
+schema is migrated there, and the guideline model is loaded before the
+workers are forked. Workers share those read-only pages copy-on-write instead
+of each loading its own copy; gc.freeze() keeps the garbage collector from
+touching (and so copying) the preloaded objects.
+
+Each worker runs a uvicorn event loop with its own admission limit (see
+services.backpressure) and a share of the cores for torch.
+"""
+import gc
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Model loading happens before the fork, so workers boot fast; generation can be slow
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Load the guideline model in the master before forking (0 = each worker loads lazily)
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1") == "1"
+
+
+def _worker_threads() -> int:
+    # An explicit TORCH_NUM_THREADS wins; otherwise split the cores between workers
+    configured = int(os.getenv("TORCH_NUM_THREADS", "0"))
+    return configured or max(1, multiprocessing.cpu_count() // workers)
+
+
+def on_starting(server):
+    from models import engine
+    from services.migrations import ensure_schema
+    from services.model_registry import get_model_registry
+
+    ensure_schema(engine)
+    # No pooled connection may be inherited by the workers
+    engine.dispose()
+
+    if PRELOAD_MODELS:
+        registry = get_model_registry()
+        # Keep torch's thread pool out of the master; workers size their own after the fork
+        registry.set_num_threads(1)
+        registry.get_t5()
+    gc.collect()
+    gc.freeze()
+    logger.info(f"[SERVER] Preloaded app for {workers} workers (models preloaded: {PRELOAD_MODELS})")
+
+
+def post_fork(server, worker):
+    from models import async_engine, engine
+    from services.model_registry import get_model_registry
+
+    # Drop connections copied from the master without closing them under its feet
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    threads = _worker_threads()
+    get_model_registry().set_num_threads(threads)
+    logger.info(f"[SERVER] Worker {worker.pid} ready ({threads} torch threads)")
@@ -1,16 +1,27 @@
+from services.startup import startup_report  # first: marks the start of the boot timeline
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import upload_router, nlp_router
-from sqlalchemy.orm import Session
-from typing import List
-import fitz  # PyMuPDF
+from routes import upload_router, nlp_router, results_router, jobs_router, admin_router, metrics_router, search_router, job_queue, guideline_engine
 
-# Import your SQLAlchemy models, engine, and Base
-from models import MolecularTarget, Therapy, get_db, Base, engine
-from services.nlp_service import NlpService
+from models import async_engine, engine
+from services.backpressure import BackpressureMiddleware
+from services.migrations import ensure_schema
+from services.model_registry import PREWARM_MODELS, get_model_registry
+from services.pdf_pipeline import shutdown_page_pool
+from services.batch_extract import shutdown_extract_pool
+from services.ocr import shutdown_ocr_pool
+from services.lexicon_store import LEXICON_WATCH_INTERVAL
+from services.nlp_service import get_nlp_service
+import time
+
+startup_report.record("imports", time.perf_counter() - startup_report.started)
 
 app = FastAPI()
 
+# Per-worker concurrency limit; excess requests queue briefly, then get 503 + Retry-After.
+# Added before CORS so that rejections still carry CORS headers.
+app.add_middleware(BackpressureMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -24,15 +35,48 @@ app.add_middleware(
 def read_root():
     return {"status": "ok"}
 
-# Drop + recreate tables on startup
+# Apply pending Alembic migrations (if any); stored data is kept across restarts
+@app.on_event("startup")
+def migrate_database():
+    with startup_report.phase("migrations"):
+        ensure_schema(engine)
+
+@app.on_event("startup")
+async def start_job_workers():
+    with startup_report.phase("job_workers"):
+        await job_queue.start()
+
 @app.on_event("startup")
-def startup_event():
-    print("Dropping all tables...")
-    Base.metadata.drop_all(bind=engine)
-    print("Creating all tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database init complete.")
+def prewarm_models():
+    # Optional: load T5 in the background instead of on the first /guidelines call
+    if PREWARM_MODELS:
+        get_model_registry().prewarm_in_background()
+
+@app.on_event("startup")
+def watch_lexicon():
+    # Optional: pick up new lexicon files without an admin call
+    get_nlp_service().lexicon_store.start_watcher(LEXICON_WATCH_INTERVAL)
+
+@app.on_event("startup")
+def report_startup():
+    startup_report.mark_ready()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    await guideline_engine.stop()
+    shutdown_page_pool()
+    shutdown_extract_pool()
+    shutdown_ocr_pool()
+    get_nlp_service().lexicon_store.stop()
+    await async_engine.dispose()
 
 # Include routers with /api prefix
 app.include_router(upload_router, prefix="/api")
 app.include_router(nlp_router, prefix="/api")
+app.include_router(results_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+app.include_router(search_router, prefix="/api")
+# Served at the conventional scrape path, outside /api
+app.include_router(metrics_router)
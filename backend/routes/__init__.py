@@ -1,2 +1,7 @@
-from .upload import router as upload_router
+from .upload import router as upload_router, guideline_engine
 from .nlp_routes import router as nlp_router
+from .results import router as results_router
+from .jobs import router as jobs_router, job_queue
+from .admin import router as admin_router
+from .metrics import router as metrics_router
+from .search import router as search_router
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+from services.nlp_service import get_nlp_service
+from services.startup import startup_report
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+nlp_service = get_nlp_service()
+
+# Shared secret for /admin routes (sent as X-Admin-Token); unset leaves them open
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.get("/admin/lexicon", dependencies=[Depends(require_admin)])
+async def get_lexicon():
+    """Version, size and source files of the active lexicon."""
+    return nlp_service.lexicon_store.stats()
+
+@router.get("/admin/startup", dependencies=[Depends(require_admin)])
+async def get_startup_report():
+    """Time spent in each boot phase of this process."""
+    return startup_report.summary()
+
+@router.post("/admin/lexicon/reload", dependencies=[Depends(require_admin)])
+async def reload_lexicon():
+    """
+    Rebuild the lexicon from LEXICON_DIR on the background build thread and
+    swap it in. Extractions keep running on the previous version meanwhile.
+    """
+    try:
+        result = await asyncio.wrap_future(nlp_service.lexicon_store.reload_in_background())
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Lexicon rebuild failed: {str(e)}")
+    logger.info(f"[LEXICON] Reloaded via admin endpoint: {result['previous_version']} -> {result['version']}")
+    return result
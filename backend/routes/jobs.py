@@ -0,0 +1,49 @@
+from fastapi import APIRouter, UploadFile, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import IngestJob, AsyncSessionLocal, get_async_db
+from services.job_queue import JOB_UPLOAD_DIR, JobQueue
+from services.nlp_service import get_nlp_service
+from services.pdf_pipeline import FileTooLargeError, spool_upload
+from .upload import MAX_FILE_SIZE
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+job_queue = JobQueue(AsyncSessionLocal, get_nlp_service())
+
+@router.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile, db: AsyncSession = Depends(get_async_db)):
+    """Queue a PDF for background processing and return its job id immediately."""
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+    try:
+        path, size, sha256 = await spool_upload(file, MAX_FILE_SIZE, directory=JOB_UPLOAD_DIR)
+    except FileTooLargeError:
+        raise HTTPException(status_code=400, detail="File size exceeds 20MB limit")
+
+    job = await job_queue.enqueue(db, file.filename, path, sha256)
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Report the progress of a queued or running job."""
+    job = await db.get(IngestJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Return the upload result of a finished job."""
+    job = await db.get(IngestJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Error processing PDF: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
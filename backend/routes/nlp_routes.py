@@ -1,56 +1,157 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict
-from pydantic import BaseModel
-from models import MolecularTarget, Therapy, get_db
-from services.nlp_service import NlpService
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from typing import AsyncIterator, List, Tuple, Union
+from pydantic import BaseModel, ValidationError
+from services.nlp_service import get_nlp_service
+from services.model_registry import get_model_registry
+from services import pfs
+from services.batch_extract import aggregated_metrics, extract_documents, extraction_result
 
 router = APIRouter()
-nlp_service = NlpService()
+nlp_service = get_nlp_service()
 
 class TextRequest(BaseModel):
     text: str
 
+class BatchDocument(BaseModel):
+    id: Union[str, int, None] = None
+    text: str
+
+class BatchTextRequest(BaseModel):
+    texts: List[Union[str, BatchDocument]]
+
 @router.post("/extract_entities")
-async def extract_entities(request: TextRequest):
+async def extract_entities(request: TextRequest, columnar: bool = False):
     try:
-        # Get the list of extracted entities with their PFS values
-        entities = nlp_service.extract_entities_with_pfs(request.text)
-        
-        # Calculate aggregated metrics
-        if entities:
-            avg_MY = sum(entity['MY'] for entity in entities) / len(entities)
-            avg_MN = sum(entity['MN'] for entity in entities) / len(entities)
-            avg_H = sum(entity['hesitancy'] for entity in entities) / len(entities)
-        else:
-            avg_MY = avg_MN = avg_H = 0
-
-        return {
-            "entities": entities,
-            "aggregated_metrics": {
-                "avg_MY": avg_MY,
-                "avg_MN": avg_MN,
-                "avg_hesitancy": avg_H
-            }
-        }
+        # Get the extracted entities with their PFS values (as parallel arrays if `columnar`)
+        # Off the event loop, so one long text does not stall the worker's other requests
+        columns = await asyncio.get_running_loop().run_in_executor(
+            None, nlp_service.extract_entity_columns, request.text
+        )
+        return extraction_result(columns, columnar)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def aggregate_pfs_values(entities_list):
+class RequestStreamingResponse(StreamingResponse):
     """
-    Aggregate PFS values (MY, MN, H) across multiple entities or chunks.
+    StreamingResponse for handlers that keep reading the request body while
+    responding. The default implementation listens for a client disconnect on
+    the same `receive` channel, which would swallow the remaining body chunks.
+    Uvicorn's `send` does not fail after a disconnect either, so the handler
+    checks for one itself: reading the body raises ClientDisconnect, and once
+    the body is read it polls `request.is_disconnected()`.
     """
-    total_MY = sum([entity['MY'] for entity in entities_list])
-    total_MN = sum([entity['MN'] for entity in entities_list])
-    total_H = sum([entity['H'] for entity in entities_list])
 
-    avg_MY = total_MY / len(entities_list) if entities_list else 0
-    avg_MN = total_MN / len(entities_list) if entities_list else 0
-    avg_H = total_H / len(entities_list) if entities_list else 0
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _as_document(index: int, item) -> Tuple[object, str]:
+    """(id, text) for a batch item; documents without an id are numbered by position."""
+    if isinstance(item, str):
+        return index, item
+    if isinstance(item, dict):
+        item = BatchDocument(**item)
+    elif not isinstance(item, BatchDocument):
+        raise ValueError(f"document {index} must be a string or an object with a text field")
+    return (index if item.id is None else item.id), item.text
+
+
+async def _iter_ndjson_documents(request: Request, body_read: asyncio.Event) -> AsyncIterator[Tuple[object, str]]:
+    """Parse an NDJSON body line by line as it arrives; sets `body_read` once it has all been received."""
+    buffer = b""
+    index = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _as_document(index, json.loads(line))
+                index += 1
+    body_read.set()
+    if buffer.strip():
+        yield _as_document(index, json.loads(buffer))
+
+
+async def _iter_listed_documents(items: List) -> AsyncIterator[Tuple[object, str]]:
+    for index, item in enumerate(items):
+        yield _as_document(index, item)
+
+
+@router.post("/extract_entities/batch")
+async def extract_entities_batch(request: Request, columnar: bool = False):
+    """
+    Extract entities from many documents in one request.
+
+    The body is either JSON (`{"texts": ["...", {"id": "pmid:1", "text": "..."}]}`)
+    or NDJSON (`Content-Type: application/x-ndjson`, one string or
+    `{"id", "text"}` object per line), read incrementally. Documents are spread
+    over the extraction process pool and one NDJSON line is streamed back per
+    document as it finishes, followed by a `summary` line with the
+    entity-weighted PFS averages over the whole batch. With `columnar=true`
+    each document's entities come back as parallel arrays.
+    """
+    content_type = request.headers.get("content-type", "")
+    body_read = asyncio.Event()
+    if "ndjson" in content_type:
+        documents = _iter_ndjson_documents(request, body_read)
+    else:
+        try:
+            body = BatchTextRequest(**await request.json())
+        except (ValueError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        documents = _iter_listed_documents(body.texts)
+        body_read.set()
+
+    async def stream():
+        # Per-document means and entity counts, combined into weighted means at the end
+        means: List[List[float]] = [[], [], []]
+        counts: List[int] = []
+        document_count = error_count = 0
+        results = extract_documents(documents, columnar, nlp_service.lexicon_version)
+        try:
+            async for result in results:
+                if body_read.is_set() and await request.is_disconnected():
+                    # Nobody is reading: stop, which cancels the documents still queued for the pool
+                    return
+                document_count += 1
+                if "error" in result:
+                    error_count += 1
+                else:
+                    for column, value in zip(means, result["aggregated_metrics"].values()):
+                        column.append(value)
+                    counts.append(result["entity_count"])
+                yield json.dumps(result) + "\n"
+        except (ValueError, ValidationError) as e:
+            # Malformed NDJSON line: report it and stop reading the body (documents before it are finished)
+            yield json.dumps({"error": f"invalid document: {e}"}) + "\n"
+        except ClientDisconnect:
+            # Gone while the body was still being read
+            return
+        finally:
+            await results.aclose()
+        yield json.dumps({
+            "summary": {
+                "documents": document_count,
+                "errors": error_count,
+                "entities": sum(counts),
+                "aggregated_metrics": aggregated_metrics(pfs.aggregate(*means, weights=counts))
+            }
+        }) + "\n"
+
+    return RequestStreamingResponse(stream(), media_type="application/x-ndjson")
 
-    return avg_MY, avg_MN, avg_H
 
+@router.get("/models")
+async def get_models():
+    """Load state, load time and memory footprint of the shared models."""
+    return get_model_registry().stats()
 
 
 """
@@ -0,0 +1,217 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import false, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from models import Cooccurrence, MolecularTarget, Therapy, AsyncSessionLocal, get_async_db
+from services.cooccurrence import entity_key
+from services.nlp_service import get_nlp_service
+import base64
+import datetime
+import json
+
+router = APIRouter()
+nlp_service = get_nlp_service()
+
+RESULT_MODELS = {
+    "molecular_targets": MolecularTarget,
+    "therapies": Therapy,
+}
+# ?kind= of /cooccurrence -> pair_kind in the index
+COOCCURRENCE_KINDS = {
+    "drug": "target_drug",
+    "target": "target_target",
+}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched per round trip from the server-side cursor in NDJSON mode
+STREAM_BATCH_SIZE = 1000
+
+def encode_cursor(row) -> str:
+    """Opaque keyset cursor pointing just past the id of the given row."""
+    raw = json.dumps({"id": row.id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def build_results_query(
+    model,
+    name: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    after: Optional[int] = None,
+):
+    """
+    Filtered select over one results table, ordered by id. Not by timestamp:
+    that is the last-seen time, rewritten by every upsert, so a row updated
+    mid-pagination would jump past the cursor or be returned twice.
+    """
+    stmt = select(model)
+    if name:
+        stmt = stmt.where(model.name == name)
+    if entity_type:
+        if hasattr(model, "entity_type"):
+            stmt = stmt.where(model.entity_type == entity_type.upper())
+        elif entity_type.upper() != "TARGET":
+            # molecular_targets only ever holds targets
+            stmt = stmt.where(false())
+    if min_confidence is not None:
+        stmt = stmt.where(model.confidence >= min_confidence)
+    if max_confidence is not None:
+        stmt = stmt.where(model.confidence <= max_confidence)
+    if since is not None:
+        stmt = stmt.where(model.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(model.timestamp < until)
+    if after is not None:
+        stmt = stmt.where(model.id > after)
+    return stmt.order_by(model.id)
+
+async def stream_results_ndjson(kinds, filters: dict, limit: Optional[int]):
+    """Yield one JSON line per row, reading through a server-side cursor."""
+    # Own session: the request-scoped one may be closed before streaming ends
+    async with AsyncSessionLocal() as db:
+        for kind in kinds:
+            stmt = build_results_query(RESULT_MODELS[kind], **filters)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            rows = await db.stream_scalars(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for row in rows:
+                yield json.dumps({"kind": kind, **jsonable_encoder(row.to_dict())}) + "\n"
+
+@router.get("/results")
+async def get_results(
+    kind: str = "all",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    format: str = "json",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get stored molecular targets and therapies with their PFS metrics.
+
+    Results are keyset-paginated on id: pass the `next_cursor`
+    of a table back as `cursor` together with `kind` set to that table.
+    `format=ndjson` streams every matching row as newline-delimited JSON.
+    """
+    if kind == "all":
+        kinds = list(RESULT_MODELS)
+    elif kind in RESULT_MODELS:
+        kinds = [kind]
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {kind}")
+    if cursor and len(kinds) > 1:
+        raise HTTPException(status_code=400, detail="A cursor requires a single kind")
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    filters = {
+        "name": name,
+        "entity_type": entity_type,
+        "min_confidence": min_confidence,
+        "max_confidence": max_confidence,
+        "since": since,
+        "until": until,
+        "after": decode_cursor(cursor) if cursor else None,
+    }
+
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_results_ndjson(kinds, filters, limit),
+            media_type="application/x-ndjson"
+        )
+    if format != "json":
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+
+    try:
+        page_size = limit or DEFAULT_PAGE_SIZE
+        response = {"molecular_targets": [], "therapies": [], "next_cursor": {}}
+        for kind in kinds:
+            stmt = build_results_query(RESULT_MODELS[kind], **filters).limit(page_size + 1)
+            rows = (await db.scalars(stmt)).all()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            response[kind] = [row.to_dict() for row in rows]
+            response["next_cursor"][kind] = encode_cursor(rows[-1]) if has_more else None
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching results: {str(e)}")
+
+@router.get("/entities/top")
+async def get_top_entities(
+    kind: str = "molecular_targets",
+    by: str = "documents",
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Most frequent catalogue entries, by number of documents or of mentions."""
+    model = RESULT_MODELS.get(kind)
+    if model is None:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {kind}")
+    order_columns = {
+        "documents": model.document_count,
+        "mentions": model.mention_count,
+    }
+    if by not in order_columns:
+        raise HTTPException(status_code=400, detail=f"Unknown ordering: {by}")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    stmt = select(model).order_by(order_columns[by].desc(), model.id).limit(limit)
+    return {kind: [row.to_dict() for row in await db.scalars(stmt)]}
+
+@router.get("/cooccurrence")
+async def get_cooccurrence(
+    target: str,
+    kind: str = "drug",
+    window: str = "sentence",
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Drugs (kind=drug) or other targets (kind=target) most often mentioned
+    together with `target` across ingested documents, ranked by shared
+    sentences (window=sentence) or shared documents (window=document).
+    Drugs also say whether the lexicon's target -> drug map already lists them.
+    """
+    pair_kind = COOCCURRENCE_KINDS.get(kind)
+    if pair_kind is None:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {kind}")
+    order_columns = {
+        "sentence": (Cooccurrence.sentence_count, Cooccurrence.document_count),
+        "document": (Cooccurrence.document_count, Cooccurrence.sentence_count),
+    }
+    if window not in order_columns:
+        raise HTTPException(status_code=400, detail=f"Unknown window: {window}")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    primary, secondary = order_columns[window]
+    key = entity_key(target, "TARGET")
+    stmt = (
+        select(Cooccurrence)
+        .where(Cooccurrence.pair_kind == pair_kind, Cooccurrence.target == key, primary > 0)
+        .order_by(primary.desc(), secondary.desc(), Cooccurrence.partner)
+        .limit(limit)
+    )
+    rows = (await db.scalars(stmt)).all()
+    results = [row.to_dict() for row in rows]
+    if kind == "drug":
+        known = {drug.upper() for drug in nlp_service.lexicon_store.snapshot.target_drugs.get(key, ())}
+        for result in results:
+            result["in_lexicon"] = result["partner"].upper() in known
+    return {"target": key, "kind": kind, "window": window, "results": results}
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from models import get_async_db
+from services.metrics import stage_timer
+from services.search import search_pages
+
+router = APIRouter()
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Longest accepted query string
+MAX_QUERY_LENGTH = 500
+
+@router.get("/search")
+async def search(
+    q: str,
+    entity_type: Optional[str] = None,
+    entity: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over the pages of ingested documents. `q` takes
+    web-search syntax ("quoted phrases", -excluded words; OR on Postgres).
+    `entity_type` and `entity` keep only pages mentioning that type or entity.
+    Results carry a highlighted snippet and the page's entity spans; facets
+    count matching pages per entity type and entity.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"q must be at most {MAX_QUERY_LENGTH} characters")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+
+    with stage_timer("search"):
+        return await db.run_sync(search_pages, q, entity_type, entity, limit, offset)
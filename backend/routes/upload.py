@@ -1,150 +1,163 @@
 from fastapi import APIRouter, UploadFile, HTTPException, Depends
-from sqlalchemy.orm import Session
-import fitz  # PyMuPDF
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Dict
+import asyncio
+import json
 import os
-from typing import List, Dict
-from models import MolecularTarget, Therapy, get_db
-from services.nlp_service import NlpService
+from models import AsyncSessionLocal, SessionLocal, get_async_db
+from services.backpressure import RETRY_AFTER_SECONDS, ServerBusyError
+from services.guideline_engine import GuidelineCache, GuidelineEngine
+from services.model_registry import T5_MODEL_NAME, T5_QUANTIZE
+from services.nlp_service import GUIDELINE_GENERATION_PARAMS, get_nlp_service
+from services.ingestion import NoTextError, ingest_pdf
+from services.pdf_pipeline import FileTooLargeError, spool_upload
 import logging
-import json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-nlp_service = NlpService()
+nlp_service = get_nlp_service()
+# The model configuration is part of the cache key so switching it invalidates old entries
+guideline_engine = GuidelineEngine(
+    nlp_service,
+    GuidelineCache(SessionLocal),
+    {**GUIDELINE_GENERATION_PARAMS, "model": T5_MODEL_NAME, "quantized": T5_QUANTIZE}
+)
 
 # Maximum file size (20MB in bytes)
 MAX_FILE_SIZE = 20 * 1024 * 1024
+# Entities per "entities" event when a cached result is replayed as a stream
+STREAM_ENTITY_BATCH_SIZE = 200
+UPLOAD_FORMATS = ("json", "ndjson")
+
+def remove_spooled(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+def ndjson_event(event: str, **fields) -> str:
+    return json.dumps({"event": event, **jsonable_encoder(fields)}) + "\n"
+
+async def stream_ingestion(path: str, filename: str, size: int, sha256: str) -> AsyncIterator[str]:
+    """
+    Ingest a spooled PDF in the background and yield its progress as NDJSON:
+    `start`, then a `page` event as each page is committed, carrying the
+    entities first seen on that page; `entities` batches for anything not
+    streamed yet (a cached result arrives all at once); finally `done` with
+    the rest of the upload response, or `error`. Streamed entities list the
+    mentions up to their page; the full lists are in /api/results.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    streamed = set()
+
+    async def on_page(page: Dict) -> None:
+        fresh = []
+        for entity in page["entities"]:
+            if entity["name"].upper() not in streamed:
+                streamed.add(entity["name"].upper())
+                fresh.append({**entity, "mentions": [[page["page"], start, end] for start, end in entity["mentions"]]})
+        await events.put(ndjson_event(
+            "page", page=page["page"], page_count=page["page_count"], entity_count=len(streamed), entities=fresh
+        ))
+
+    async def run() -> None:
+        try:
+            # Own session: the request-scoped one is closed once the response starts
+            async with AsyncSessionLocal() as db:
+                result = await ingest_pdf(path, filename, db, nlp_service, sha256, on_page=on_page)
+            remaining = [e for e in result["entities"] if e["name"].upper() not in streamed]
+            for i in range(0, len(remaining), STREAM_ENTITY_BATCH_SIZE):
+                await events.put(ndjson_event("entities", entities=remaining[i:i + STREAM_ENTITY_BATCH_SIZE]))
+            summary = {key: value for key, value in result.items() if key != "entities"}
+            await events.put(ndjson_event("done", entity_count=len(result["entities"]), **summary))
+        except NoTextError as e:
+            await events.put(ndjson_event("error", status=400, detail=str(e)))
+        except Exception as e:
+            logger.exception("[ERROR] Failed to process PDF")
+            await events.put(ndjson_event("error", status=500, detail=f"Error processing PDF: {str(e)}"))
+        finally:
+            await events.put(None)
 
-def split_text_into_segments(text: str, words_per_segment: int = 50) -> List[str]:
-    """Split text into segments of approximately words_per_segment words."""
-    words = text.split()
-    segments = []
-    for i in range(0, len(words), words_per_segment):
-        segment = " ".join(words[i:i + words_per_segment])
-        segments.append(segment)
-    return segments
+    task = asyncio.create_task(run())
+    try:
+        yield ndjson_event("start", filename=filename, sha256=sha256, size=size)
+        while (line := await events.get()) is not None:
+            yield line
+    finally:
+        # The client went away: stop processing (the current page's transaction rolls back)
+        task.cancel()
+        try:
+            # wait(), not gather(): if this await is cancelled too, the task must not be
+            # cancelled a second time while it closes its session
+            await asyncio.wait([task])
+        finally:
+            remove_spooled(path)
 
 @router.post("/upload")
-async def upload_pdf(file: UploadFile, db: Session = Depends(get_db)):
-    """Upload and process a PDF file."""
+async def upload_pdf(file: UploadFile, format: str = "json", db: AsyncSession = Depends(get_async_db)):
+    """
+    Upload and process a PDF file, page by page.
+
+    `format=ndjson` streams progress events while the document is processed
+    (see stream_ingestion) instead of returning one response at the end.
+    """
     try:
         logger.info(f"[UPLOAD] Starting processing for file: {file.filename}")
-        
+
+        if format not in UPLOAD_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
         if not file.filename.lower().endswith('.pdf'):
             logger.warning("[UPLOAD] Invalid file type.")
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-        
-        content = await file.read()
-        logger.info(f"[UPLOAD] File size: {len(content)} bytes")
-        
-        if len(content) > MAX_FILE_SIZE:
+
+        # Spool to disk in chunks instead of holding the whole upload in memory
+        try:
+            path, size, sha256 = await spool_upload(file, MAX_FILE_SIZE)
+        except FileTooLargeError:
             logger.warning("[UPLOAD] File too large.")
             raise HTTPException(status_code=400, detail="File size exceeds 20MB limit")
-        
-        # Open and read PDF content
+        logger.info(f"[UPLOAD] File size: {size} bytes")
+
+        if format == "ndjson":
+            return StreamingResponse(
+                stream_ingestion(path, file.filename, size, sha256),
+                media_type="application/x-ndjson",
+                # Also covers a client that disconnects before the stream starts
+                background=BackgroundTask(remove_spooled, path),
+                # Keeps nginx from buffering the events
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+
+        # Pages are extracted in a process pool; each page is analysed and
+        # persisted as soon as it arrives
         try:
-            doc = fitz.open(stream=content, filetype="pdf")
-            text_content = []
-
-            logger.info(f"[PDF] Total pages: {len(doc)}")
-
-            for i, page in enumerate(doc):
-                page_text = page.get_text()
-                logger.info(f"[PDF] Extracted text from page {i+1}: {repr(page_text[:200])}...")
-                text_content.append(page_text)
-
-            full_text = " ".join(text_content).strip()
-
-            if not full_text:
-                logger.warning("[PDF] No text extracted from PDF.")
-                raise HTTPException(status_code=400, detail="No text found in PDF")
-
-            segments = split_text_into_segments(full_text)
-            logger.info(f"[TEXT] Total segments: {len(segments)}")
-
-            all_entities = []
-            true_labels = []
-            pred_labels = []
-
-            for i, segment in enumerate(segments):
-                logger.info(f"[NLP] Processing segment {i+1}: {repr(segment[:150])}...")
-
-                entities = nlp_service.extract_entities(segment)
-                logger.info(f"[NLP] Found {len(entities)} entities in segment {i+1}")
-
-                for entity in entities:
-                    logger.info(f"[NLP] Entity: {json.dumps(entity)}")
-                    if entity['entity_type'] in ('DISEASE', 'ANATOMICAL'):
-                        db.add(MolecularTarget(
-                            name=entity['text'],
-                            my=entity['my'],
-                            mn=entity['mn'],
-                            hesitancy=entity['hesitancy'],
-                            confidence=entity['confidence'],
-                            entity_type=entity['entity_type']
-                        ))
-                    elif entity['entity_type'] == 'DRUG':
-                        db.add(Therapy(
-                            name=entity['text'],
-                            entity_type=entity["entity_type"],
-                            my=entity['my'],
-                            mn=entity['mn'],
-                            hesitancy=entity['hesitancy'],
-                            confidence=entity['confidence']                        ))
-
-                all_entities.extend(entities)
-                pred_labels.extend([e['entity_type'] for e in entities])
-                true_labels.extend(['UNKNOWN'] * len(entities))
-
-            db.commit()
-            logger.info(f"[DB] Committed {len(all_entities)} entities to database.")
-
-            metrics = {}
-            if all_entities:
-                metrics = nlp_service.calculate_metrics(true_labels, pred_labels)
-                logger.info(f"[METRICS] Calculated metrics: {metrics}")
-            else:
-                logger.warning("[NLP] No entities found in any segment.")
-
-            return {
-                "message": "PDF processed successfully",
-                "filename": file.filename,
-                "segment_count": len(segments),
-                "entities": all_entities,
-                "metrics": metrics
-            }
-
+            return await ingest_pdf(path, file.filename, db, nlp_service, sha256)
+        except NoTextError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.exception("[ERROR] Failed to process PDF")
             raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+        finally:
+            os.remove(path)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[ERROR] Upload handling failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/guidelines")
-async def get_guidelines(target: str, type: str, db: Session = Depends(get_db)):
-    """Generate handling guidelines for a target."""
+async def get_guidelines(target: str, type: str):
+    """Generate handling guidelines for a target (cached, micro-batched, off the event loop)."""
     try:
-        guidelines = nlp_service.generate_guidelines(target, type)
+        guidelines = await guideline_engine.generate(target, type)
         return {"guidelines": guidelines}
+    except ServerBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating guidelines: {str(e)}")
-
-@router.get("/results")
-async def get_results(db: Session = Depends(get_db)):
-    """Get all stored molecular targets and therapies with their PFS metrics."""
-    try:
-        molecular_targets = db.query(MolecularTarget).all()
-        therapies = db.query(Therapy).all()
-        
-        return {
-            "molecular_targets": [target.to_dict() for target in molecular_targets],
-            "therapies": [therapy.to_dict() for therapy in therapies]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching results: {str(e)}")
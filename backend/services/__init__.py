@@ -1 +1,7 @@
-from .nlp_service import NlpService
+def __getattr__(name):
+    # Resolved lazily so that pool workers importing a light submodule
+    # (e.g. services.pdf_pipeline) do not pull in transformers/sklearn.
+    if name == "NlpService":
+        from .nlp_service import NlpService
+        return NlpService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
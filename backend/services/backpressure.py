@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+from services.metrics import REQUESTS_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Requests handled at once by one worker process (0 = unlimited)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "32"))
+# Requests allowed to wait for a slot; beyond this they are rejected immediately
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "64"))
+# Longest a queued request waits for a slot before it is rejected
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "10"))
+# Retry-After value (seconds) sent with 503 responses
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "5"))
+
+
+class ServerBusyError(Exception):
+    """Raised by internal queues that are full; routes turn it into a 503."""
+
+
+class BackpressureMiddleware:
+    """
+    Per-process admission control for HTTP requests.
+
+    Up to `max_concurrency` requests run at once (a streaming response keeps
+    its slot until the body is sent); up to `max_queue` more wait at most
+    `queue_timeout` seconds for a slot. Anything beyond that gets an
+    immediate 503 with Retry-After, so a saturated worker sheds load instead
+    of accumulating latency. `exempt_paths` (health checks, metrics scrapes) bypass the limit.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        max_queue: int = MAX_QUEUED_REQUESTS,
+        queue_timeout: float = QUEUE_TIMEOUT_SECONDS,
+        retry_after: int = RETRY_AFTER_SECONDS,
+        exempt_paths: Iterable[str] = ("/", "/metrics"),
+    ):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_paths = frozenset(exempt_paths)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_concurrency <= 0 or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self._slots is None:
+            # Created on first use so it binds to the worker's event loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                await self._reject(scope, send)
+                return
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                await self._reject(scope, send)
+                return
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+
+        self.active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def _reject(self, scope, send) -> None:
+        self.rejected += 1
+        REQUESTS_REJECTED.inc()
+        logger.warning(
+            f"[BACKPRESSURE] Rejected {scope['method']} {scope['path']} "
+            f"({self.active} active, {self.waiting} waiting)"
+        )
+        await send_busy(send, self.retry_after)
+
+
+async def send_busy(send, retry_after: int = RETRY_AFTER_SECONDS) -> None:
+    body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
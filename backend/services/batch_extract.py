@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from services import pfs
+from services.metrics import ENTITIES, observe_stage
+
+logger = logging.getLogger(__name__)
+
+# Processes used for batch text extraction
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Documents submitted to the pool ahead of the slowest unfinished one
+EXTRACT_MAX_INFLIGHT = int(os.getenv("EXTRACT_MAX_INFLIGHT", str(4 * EXTRACT_WORKERS)))
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+# NlpService instance owned by a pool process
+_worker_service = None
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _extract_pool
+
+
+def shutdown_extract_pool() -> None:
+    global _extract_pool
+    if _extract_pool is not None:
+        _extract_pool.shutdown(cancel_futures=True)
+        _extract_pool = None
+
+
+def aggregated_metrics(means: Sequence[float]) -> Dict[str, float]:
+    """(my, mn, hesitancy) means in the /extract_entities response format."""
+    avg_my, avg_mn, avg_h = means
+    return {
+        "avg_MY": avg_my,
+        "avg_MN": avg_mn,
+        "avg_hesitancy": avg_h
+    }
+
+
+def extraction_result(columns: pfs.EntityColumns, columnar: bool = False) -> Dict:
+    """Response body for one document: entities plus overall and per-type PFS summaries."""
+    return {
+        "entities": columns.to_dict() if columnar else columns.to_records(),
+        "aggregated_metrics": aggregated_metrics(columns.aggregate()),
+        "by_type": columns.by_type()
+    }
+
+
+def extract_document(doc_id, text: str, columnar: bool = False,
+                     lexicon_version: Optional[str] = None) -> Tuple[Dict, float]:
+    """
+    Runs in a pool process: extract one document with the process-local
+    service, first catching up with the parent's lexicon version if it was
+    reloaded since this process built its own. Returns the result and the
+    extraction time, which the parent records (this process's metrics are
+    never scraped).
+    """
+    global _worker_service
+    if _worker_service is None:
+        from services.nlp_service import NlpService
+        _worker_service = NlpService()
+    if lexicon_version is not None:
+        _worker_service.lexicon_store.ensure_version(lexicon_version)
+    start = time.perf_counter()
+    try:
+        columns = _worker_service.extract_entity_columns(text)
+    except Exception as e:
+        logger.exception(f"[NLP] Batch extraction failed for document {doc_id}")
+        return {"id": doc_id, "error": str(e)}, time.perf_counter() - start
+    seconds = time.perf_counter() - start
+    return {
+        "id": doc_id,
+        "entity_count": len(columns),
+        **extraction_result(columns, columnar)
+    }, seconds
+
+
+def _completed(future) -> Dict:
+    result, seconds = future.result()
+    observe_stage("matching", seconds)
+    ENTITIES.inc(result.get("entity_count", 0))
+    return result
+
+
+async def extract_documents(
+    documents: AsyncIterator[Tuple[object, str]],
+    columnar: bool = False,
+    lexicon_version: Optional[str] = None,
+    max_inflight: int = EXTRACT_MAX_INFLIGHT,
+) -> AsyncIterator[Dict]:
+    """
+    Fan (id, text) pairs out to the extraction pool and yield each result as
+    soon as it finishes (completion order, not input order). At most
+    `max_inflight` documents are pending, so a streamed request body is read
+    only as fast as the pool drains it. A ValueError from `documents` is
+    re-raised after the documents submitted before it have been yielded.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_extract_pool()
+    pending = set()
+    invalid = None
+    try:
+        try:
+            async for doc_id, text in documents:
+                pending.add(loop.run_in_executor(pool, extract_document, doc_id, text, columnar, lexicon_version))
+                if len(pending) >= max_inflight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield _completed(future)
+        except ValueError as e:
+            # A malformed document ends the input; the ones already submitted are still finished
+            invalid = e
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield _completed(future)
+        if invalid is not None:
+            raise invalid
+    finally:
+        for future in pending:
+            future.cancel()
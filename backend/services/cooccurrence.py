@@ -0,0 +1,156 @@
+"""
+Corpus-wide co-occurrence index of targets with drugs and with other targets.
+
+While a document is ingested, DocumentPairs collects which targets and drugs
+share a sentence (from the page's sentence spans and the entities' mention
+offsets) and which share the document. When the document is complete, its
+pairs are upserted into the `cooccurrences` aggregate (one row per pair,
+incremented in place). A copy also goes to `document_cooccurrences`, so a
+re-ingested document can be withdrawn without double counting. Queries
+never rescan documents. Target-target pairs are stored in both directions,
+so "partners of X" is a single indexed range scan.
+"""
+import datetime
+import os
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from models import Cooccurrence, DocumentCooccurrence
+from services.persistence import dialect_insert
+
+# Rows per INSERT statement (keeps SQLite under its bound-parameter limit)
+COOCCURRENCE_BATCH_SIZE = int(os.getenv("COOCCURRENCE_BATCH_SIZE", "500"))
+
+# Partner entity type -> pair_kind
+PAIR_KINDS = {
+    "DRUG": "target_drug",
+    "TARGET": "target_target",
+}
+
+
+def entity_key(name: str, entity_type: str) -> str:
+    # Target names are matched case-insensitively throughout the app
+    return name.upper() if entity_type == "TARGET" else name
+
+
+class DocumentPairs:
+    """Target/drug pairs of one document, with the number of sentences each pair shares."""
+
+    def __init__(self):
+        # (pair_kind, target, partner) -> sentences mentioning both
+        self.sentence_counts: Counter = Counter()
+        self.entities: Set[Tuple[str, str]] = set()
+
+    def add_page(self, entities: List[Dict], spans: List[Tuple[int, int]]) -> None:
+        """Record a page's entities; `mentions` are offsets into the text `spans` were computed on."""
+        starts = [start for start, _ in spans]
+        sentences: Dict[int, Set[Tuple[str, str]]] = defaultdict(set)
+        for entity in entities:
+            entity_type = entity["entity_type"]
+            if entity_type not in PAIR_KINDS:
+                continue
+            member = (entity_key(entity["name"], entity_type), entity_type)
+            self.entities.add(member)
+            for start, _ in entity.get("mentions") or [(entity["start"], entity["end"])]:
+                sentences[bisect_right(starts, start) - 1].add(member)
+        for members in sentences.values():
+            self.sentence_counts.update(_pairs(members))
+
+    def rows(self) -> List[Dict]:
+        """Every pair in the document window, with its sentence-window count."""
+        return [
+            {
+                "pair_kind": pair_kind,
+                "target": target,
+                "partner": partner,
+                "sentence_count": self.sentence_counts.get((pair_kind, target, partner), 0),
+            }
+            for pair_kind, target, partner in sorted(_pairs(self.entities))
+        ]
+
+
+def _pairs(members: Iterable[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    members = list(members)
+    targets = [name for name, entity_type in members if entity_type == "TARGET"]
+    return [
+        (PAIR_KINDS[entity_type], target, partner)
+        for target in targets
+        for partner, entity_type in members
+        if partner != target
+    ]
+
+
+def write_document_pairs(db: Session, document_key: str, pairs: DocumentPairs,
+                         batch_size: int = COOCCURRENCE_BATCH_SIZE) -> int:
+    """
+    Add a document's pairs to the index (caller commits). Pairs the document
+    already has in `document_cooccurrences` (a concurrent upload of the same
+    file got there first) are skipped, so the aggregate counts each document
+    once; see remove_document_pairs for re-ingestion. Returns the number of
+    pairs written.
+    """
+    rows = pairs.rows()
+    insert = dialect_insert(db)
+    now = datetime.datetime.utcnow()
+    written = 0
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        inserted = db.execute(
+            insert(DocumentCooccurrence)
+            .values([{**row, "document_key": document_key} for row in batch])
+            .on_conflict_do_nothing(index_elements=[
+                DocumentCooccurrence.document_key, DocumentCooccurrence.pair_kind,
+                DocumentCooccurrence.target, DocumentCooccurrence.partner,
+            ])
+            .returning(DocumentCooccurrence.pair_kind, DocumentCooccurrence.target, DocumentCooccurrence.partner)
+        ).all()
+        if not inserted:
+            continue
+        new_pairs = {tuple(pair) for pair in inserted}
+        batch = [row for row in batch if (row["pair_kind"], row["target"], row["partner"]) in new_pairs]
+        stmt = insert(Cooccurrence).values([{**row, "document_count": 1, "timestamp": now} for row in batch])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[Cooccurrence.pair_kind, Cooccurrence.target, Cooccurrence.partner],
+            set_={
+                "sentence_count": Cooccurrence.sentence_count + stmt.excluded.sentence_count,
+                "document_count": Cooccurrence.document_count + stmt.excluded.document_count,
+                "timestamp": stmt.excluded.timestamp,
+            }
+        ))
+        written += len(batch)
+    return written
+
+
+def remove_document_pairs(db: Session, document_key: str) -> int:
+    """Withdraw a document's pairs from the index; returns the number removed."""
+    table = DocumentCooccurrence.__table__
+    rows = db.execute(
+        select(table.c.pair_kind, table.c.target, table.c.partner, table.c.sentence_count)
+        .where(table.c.document_key == document_key)
+        .order_by(table.c.pair_kind, table.c.target, table.c.partner)
+    ).all()
+    if not rows:
+        return 0
+    aggregate = Cooccurrence.__table__
+    db.execute(
+        update(aggregate)
+        .where(
+            aggregate.c.pair_kind == bindparam("b_pair_kind"),
+            aggregate.c.target == bindparam("b_target"),
+            aggregate.c.partner == bindparam("b_partner"),
+        )
+        .values(
+            sentence_count=aggregate.c.sentence_count - bindparam("b_sentences"),
+            document_count=aggregate.c.document_count - 1,
+        ),
+        [
+            {"b_pair_kind": kind, "b_target": target, "b_partner": partner, "b_sentences": sentences}
+            for kind, target, partner, sentences in rows
+        ]
+    )
+    db.execute(delete(table).where(table.c.document_key == document_key))
+    return len(rows)
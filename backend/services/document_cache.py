@@ -0,0 +1,69 @@
+import datetime
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Document
+from services.metrics import CACHE_LOOKUPS
+from services.ocr import OCR_ENABLED
+from services.persistence import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change to segmentation, matching or scoring alters extraction
+# output; cached results from other versions are then recomputed on re-upload
+EXTRACTION_VERSION = "2"
+# OCR changes the text of scanned pages, so results with and without it are cached apart
+if OCR_ENABLED:
+    EXTRACTION_VERSION += "+ocr"
+
+
+def get_cached_result(db: Session, sha256: str, lexicon_version: str,
+                      extraction_version: str = EXTRACTION_VERSION) -> Optional[Dict]:
+    """
+    The stored upload response for this content hash, if it was produced with
+    the current lexicon and extraction versions. A hit also records the
+    re-upload; a stale or missing entry returns None.
+    """
+    document = db.get(Document, sha256)
+    if document is None:
+        CACHE_LOOKUPS.inc(cache="documents", result="miss")
+        return None
+    if document.lexicon_version != lexicon_version or document.extraction_version != extraction_version:
+        logger.info(
+            f"[CACHE] Stale result for {sha256[:12]} (lexicon {document.lexicon_version}, "
+            f"extraction {document.extraction_version}); reprocessing"
+        )
+        CACHE_LOOKUPS.inc(cache="documents", result="stale")
+        return None
+    document.upload_count += 1
+    document.last_uploaded_at = datetime.datetime.utcnow()
+    db.commit()
+    CACHE_LOOKUPS.inc(cache="documents", result="hit")
+    logger.info(f"[CACHE] Serving cached result for {sha256[:12]} (upload #{document.upload_count})")
+    return {**document.result, "cached": True}
+
+
+def store_result(db: Session, sha256: str, filename: str, size_bytes: int, result: Dict,
+                 lexicon_version: str, extraction_version: str = EXTRACTION_VERSION) -> None:
+    """
+    Insert or replace the cached result for a content hash (caller commits).
+    An upsert, so concurrent first uploads of the same file both succeed.
+    """
+    now = datetime.datetime.utcnow()
+    values = {
+        "size_bytes": size_bytes,
+        "page_count": result.get("page_count"),
+        "lexicon_version": lexicon_version,
+        "extraction_version": extraction_version,
+        "result": result,
+        "last_uploaded_at": now,
+    }
+    stmt = dialect_insert(db)(Document).values(
+        sha256=sha256, filename=filename, created_at=now, upload_count=1, **values
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Document.sha256],
+        set_={**values, "upload_count": Document.upload_count + 1}
+    ))
@@ -0,0 +1,110 @@
+import logging
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings reachable from word by removing up to max_distance characters."""
+    variants = {word}
+    for n in range(1, min(max_distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), n):
+            variants.add("".join(c for i, c in enumerate(word) if i not in positions))
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions).
+    Gives up early and returns max_distance + 1 once the bound is exceeded.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[-1]
+
+
+def similarity(a: str, b: str, distance: int) -> float:
+    """
+    difflib's SequenceMatcher.ratio() (2 * matches / total length) for two
+    strings `distance` edits apart, taking matches as the longer length minus
+    the edits.
+    """
+    return 2 * (max(len(a), len(b)) - distance) / (len(a) + len(b))
+
+
+class FuzzyIndex:
+    """
+    SymSpell-style deletion-neighbourhood index for near-miss target names.
+
+    Every term is stored under all of its deletion variants (up to max_distance),
+    so a lookup only generates the variants of the query and verifies the few
+    terms sharing one. The cost per token is independent of dictionary size.
+    `min_similarity` keeps the old difflib cutoff semantics (see similarity()),
+    so 'HDAC1' still finds 'HDAC' while 'BCL-2' is not confused with 'BCL-3'.
+    """
+
+    def __init__(
+        self,
+        terms: Iterable[str],
+        max_distance: int = 1,
+        min_similarity: float = 0.85,
+        cache_size: int = 4096,
+    ):
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        self._terms = sorted({t.upper() for t in terms})
+        self._index: Dict[str, List[str]] = {}
+        for term in self._terms:
+            for variant in _deletes(term, max_distance):
+                self._index.setdefault(variant, []).append(term)
+        self._max_len = max((len(t) for t in self._terms), default=0)
+        # Per-token memo: repeated non-entity words are rejected without rescoring
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        logger.info(
+            f"[FUZZY] Indexed {len(self._terms)} terms "
+            f"({len(self._index)} deletion variants, max distance {max_distance})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _lookup(self, word: str) -> Optional[str]:
+        """Return the nearest indexed term within the configured bounds, or None."""
+        word = word.upper()
+        if not word or len(word) > self._max_len + self.max_distance:
+            return None
+
+        best, best_distance = None, self.max_distance + 1
+        # Ties on distance go to the alphabetically first term, for stable results
+        seen = set()
+        for variant in _deletes(word, self.max_distance):
+            for term in self._index.get(variant, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                distance = edit_distance(word, term, self.max_distance)
+                if distance > self.max_distance or (distance, term) >= (best_distance, best or ""):
+                    continue
+                if similarity(word, term, distance) < self.min_similarity:
+                    continue
+                best, best_distance = term, distance
+                if distance == 0:
+                    return best
+        return best
+
+    def cache_info(self):
+        return self.lookup.cache_info()
@@ -0,0 +1,246 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from models import GuidelineCacheEntry
+from services.backpressure import ServerBusyError
+from services.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Requests merged into one `generate` call, and how long the first waits for company
+GUIDELINE_MAX_BATCH = int(os.getenv("GUIDELINE_MAX_BATCH", "8"))
+GUIDELINE_BATCH_WAIT_MS = float(os.getenv("GUIDELINE_BATCH_WAIT_MS", "25"))
+GUIDELINE_CACHE_SIZE = int(os.getenv("GUIDELINE_CACHE_SIZE", "2048"))
+GUIDELINE_CACHE_TTL = int(os.getenv("GUIDELINE_CACHE_TTL", str(30 * 24 * 3600)))
+# Distinct uncached requests allowed to wait for generation in this process
+GUIDELINE_MAX_PENDING = int(os.getenv("GUIDELINE_MAX_PENDING", "64"))
+
+
+class GuidelineCache:
+    """
+    Two-level cache for generated guidelines: an in-memory LRU in front of the
+    `guideline_cache` table. Entries older than `ttl` seconds are treated as
+    misses at both levels and pruned from the table as new entries arrive.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, session_factory, max_size: int = GUIDELINE_CACHE_SIZE, ttl: int = GUIDELINE_CACHE_TTL):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(target: str, entity_type: str, params: Dict) -> str:
+        raw = json.dumps([target, entity_type, params], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, text = entry
+                if time.time() - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(cache="guidelines", result="hit")
+                    return text
+                del self._memory[key]
+
+        db = self.session_factory()
+        try:
+            row = db.get(GuidelineCacheEntry, key)
+            if row is not None:
+                created = row.created_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+                if time.time() - created < self.ttl:
+                    self._remember(key, created, row.guidelines)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(cache="guidelines", result="hit")
+                    return row.guidelines
+        finally:
+            db.close()
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="guidelines", result="miss")
+        return None
+
+    def put_many(self, entries: List[Tuple[str, str, str, Dict, str]]) -> None:
+        """Store (key, target, entity_type, params, text) entries in one transaction."""
+        now = datetime.datetime.utcnow()
+        created = now.replace(tzinfo=datetime.timezone.utc).timestamp()
+        for key, _, _, _, text in entries:
+            self._remember(key, created, text)
+        db = self.session_factory()
+        try:
+            for key, target, entity_type, params, text in entries:
+                db.merge(GuidelineCacheEntry(
+                    key=key,
+                    target=target,
+                    entity_type=entity_type,
+                    params=params,
+                    guidelines=text,
+                    created_at=now
+                ))
+            previous = self._puts
+            self._puts += len(entries)
+            if previous // self.PRUNE_EVERY != self._puts // self.PRUNE_EVERY:
+                cutoff = now - datetime.timedelta(seconds=self.ttl)
+                db.query(GuidelineCacheEntry).filter(GuidelineCacheEntry.created_at < cutoff).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def _remember(self, key: str, created: float, text: str) -> None:
+        with self._lock:
+            self._memory[key] = (created, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+
+class GuidelineEngine:
+    """
+    Serves /guidelines requests without blocking the event loop.
+
+    Cache hits return immediately. Misses for the same key share one pending
+    future; distinct misses are queued and micro-batched (up to `max_batch`
+    requests, waiting at most `wait_ms` for the batch to fill) into a single
+    `generate_guidelines_batch` call on a dedicated inference thread.
+    A batch's results are written to the cache together, off the batch loop;
+    their keys stay in flight (with resolved futures) until the write is
+    done, so a repeat request in between does not generate again. Batches served by the fallback checkpoint (see ModelRegistry.select_t5)
+    are returned but not cached, since the cache key names the primary model.
+    """
+
+    def __init__(self, nlp_service, cache: GuidelineCache, params: Dict,
+                 max_batch: int = GUIDELINE_MAX_BATCH, wait_ms: float = GUIDELINE_BATCH_WAIT_MS,
+                 max_pending: int = GUIDELINE_MAX_PENDING):
+        self.nlp_service = nlp_service
+        self.cache = cache
+        self.params = params
+        self.max_batch = max_batch
+        self.wait_seconds = wait_ms / 1000
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cache_writes: Set[asyncio.Task] = set()
+
+    async def generate(self, target: str, entity_type: str) -> str:
+        loop = asyncio.get_running_loop()
+        key = self.cache.make_key(target, entity_type, self.params)
+
+        cached = await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is None:
+            if len(self._inflight) >= self.max_pending:
+                raise ServerBusyError(f"{len(self._inflight)} guideline requests already pending")
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._ensure_batcher()
+            await self._queue.put((key, target, entity_type, future))
+        return await asyncio.shield(future)
+
+    def _ensure_batcher(self) -> None:
+        if self._executor is None:
+            # One thread: the model is used by one batch at a time
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guidelines")
+        if self._batcher is None or self._batcher.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._batcher = asyncio.create_task(self._run_batches())
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.wait_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            requests = [(target, entity_type) for _, target, entity_type, _ in batch]
+            start = time.perf_counter()
+            try:
+                model_name, texts = await loop.run_in_executor(
+                    self._executor, self.nlp_service.generate_guidelines_with_model, requests
+                )
+            except Exception as e:
+                logger.exception("[GUIDELINES] Batch generation failed")
+                for key, _, _, future in batch:
+                    self._inflight.pop(key, None)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            logger.info(
+                f"[GUIDELINES] Generated batch of {len(batch)} with {model_name} in {time.perf_counter() - start:.2f}s"
+            )
+            for (_, _, _, future), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+
+            entries = [(key, target, entity_type, self.params, text)
+                       for (key, target, entity_type, _), text in zip(batch, texts)]
+            if model_name == self.nlp_service.t5_model_name:
+                write = asyncio.create_task(self._cache_batch(entries, [future for *_, future in batch]))
+                self._cache_writes.add(write)
+                write.add_done_callback(self._cache_writes.discard)
+            else:
+                self._release([entry[0] for entry in entries], [future for *_, future in batch])
+
+    async def _cache_batch(self, entries: List[Tuple[str, str, str, Dict, str]],
+                           futures: List[asyncio.Future]) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.put_many, entries)
+        except Exception:
+            logger.exception("[GUIDELINES] Failed to cache guidelines")
+        finally:
+            self._release([entry[0] for entry in entries], futures)
+
+    def _release(self, keys: List[str], futures: List[asyncio.Future]) -> None:
+        for key, future in zip(keys, futures):
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def stop(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        # Let pending cache writes finish before the database goes away
+        await asyncio.gather(*self._cache_writes, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        return {
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cached_in_memory": len(self.cache),
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,137 @@
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from services.cooccurrence import DocumentPairs, remove_document_pairs, write_document_pairs
+from services.document_cache import get_cached_result, store_result
+from services.metrics import debug_sampled, stage_timer
+from services.ocr import get_ocr_fallback
+from services.pdf_pipeline import process_pdf
+from services.persistence import EntityWriter, remove_document
+from services.search import remove_document_pages, store_page
+
+logger = logging.getLogger(__name__)
+
+
+class NoTextError(Exception):
+    """Raised when a PDF yields no extractable text."""
+
+
+def _write_page(session: Session, writer: EntityWriter, document_key: str, page: Dict) -> None:
+    writer.add(page["entities"])
+    writer.flush()
+    store_page(session, document_key, page["page"], page["text"], page["entities"])
+
+
+async def ingest_pdf(
+    path: str,
+    filename: str,
+    db: AsyncSession,
+    nlp_service,
+    document_key: str,
+    on_page: Optional[Callable[[Dict], Awaitable[None]]] = None,
+) -> Dict:
+    """
+    Run the page pipeline over a spooled PDF, committing each page's entities
+    as it completes; `document_key` (the file's SHA-256) identifies the
+    document in the entity catalogue. Scanned pages go through the OCR
+    fallback when it is enabled (services.ocr). `on_page` is awaited after every page (before the commit),
+    which lets callers record progress in the same transaction.
+
+    Entities are deduplicated across the whole document: the response lists
+    each one once, at its first page and span, with `mentions` holding
+    [page, start, end] for every occurrence.
+
+    Target/drug co-occurrences (sentence and document windows) are added to
+    the corpus index once the whole document has been read. Each page's text
+    and entity spans are stored for full-text search (services.search).
+
+    Results are cached per content hash: a re-upload extracted with the
+    current lexicon and extraction versions returns the stored payload
+    without opening the PDF. Otherwise any earlier contribution of the
+    document to the catalogue is withdrawn before it is processed again.
+    Returns the upload response payload.
+
+    The catalogue writers are synchronous code; they run through
+    `db.run_sync`, so with the async driver every query awaits instead of
+    blocking the event loop.
+    """
+    # One dictionary version for the whole document, even if a reload lands mid-way
+    snapshot = nlp_service.lexicon_store.snapshot
+    lexicon_version = snapshot.version
+    cached = await db.run_sync(get_cached_result, document_key, lexicon_version)
+    if cached is not None:
+        return cached
+    await db.run_sync(remove_document, document_key)
+    await db.run_sync(remove_document_pairs, document_key)
+    await db.run_sync(remove_document_pages, document_key)
+
+    # canonical name -> document-level entity
+    document_entities: Dict[str, Dict] = {}
+    segment_count = 0
+    page_count = 0
+    text_chars = 0
+    writer = EntityWriter(db.sync_session, document_key)
+    pairs = DocumentPairs()
+
+    async for page in process_pdf(path, nlp_service, snapshot, get_ocr_fallback()):
+        entities = page["entities"]
+        segment_count += page["segment_count"]
+        page_count = page["page_count"]
+        text_chars += page["chars"]
+        debug_sampled(
+            logger, lambda: f"[NLP] Found {len(entities)} entities on page {page['page']}/{page['page_count']}"
+        )
+
+        await db.run_sync(_write_page, writer, document_key, page)
+        pairs.add_page(entities, page["spans"])
+        for entity in entities:
+            mentions = [[page["page"], start, end] for start, end in entity["mentions"]]
+            known = document_entities.get(entity["name"].upper())
+            if known is None:
+                document_entities[entity["name"].upper()] = {**entity, "mentions": mentions}
+            else:
+                known["mentions"].extend(mentions)
+        page["document_entity_count"] = len(document_entities)
+        if on_page is not None:
+            await on_page(page)
+        with stage_timer("db_commit"):
+            await db.commit()
+
+    if not text_chars:
+        logger.warning("[PDF] No text extracted from PDF.")
+        raise NoTextError("No text found in PDF")
+
+    all_entities = list(document_entities.values())
+    pred_labels = [e['entity_type'] for e in all_entities]
+    true_labels = ['UNKNOWN'] * len(all_entities)
+
+    logger.info(f"[TEXT] Total segments: {segment_count}")
+    logger.info(f"[DB] Committed {len(all_entities)} entities to database.")
+    writer.log_stats()
+
+    metrics = {}
+    if all_entities:
+        metrics = nlp_service.calculate_metrics(true_labels, pred_labels)
+        logger.info(f"[METRICS] Calculated metrics: {metrics}")
+    else:
+        logger.warning("[NLP] No entities found in any segment.")
+
+    result = {
+        "message": "PDF processed successfully",
+        "filename": filename,
+        "sha256": document_key,
+        "page_count": page_count,
+        "segment_count": segment_count,
+        "entities": all_entities,
+        "metrics": metrics
+    }
+    with stage_timer("cooccurrence"):
+        pair_count = await db.run_sync(write_document_pairs, document_key, pairs)
+    logger.info(f"[DB] Indexed {pair_count} co-occurrence pairs")
+    await db.run_sync(store_result, document_key, filename, os.path.getsize(path), result, lexicon_version)
+    await db.commit()
+    return {**result, "cached": False}
@@ -0,0 +1,205 @@
+"""
+Local target -> drug interaction store.
+
+Lookups during extraction read an indexed SQLite file through an in-memory
+LRU and never touch the network. The store is filled from DGIdb TSV dumps:
+
+    python -m services.interaction_store import interactions.tsv
+
+With DGIDB_REFRESH=1, targets missing from the store are fetched from the
+DGIdb API on a background thread and written back for later lookups.
+"""
+import csv
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple
+
+from services.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+DGIDB_STORE_PATH = os.getenv(
+    "DGIDB_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "dgidb.sqlite")
+)
+DGIDB_CACHE_SIZE = int(os.getenv("DGIDB_CACHE_SIZE", "50000"))
+# Seconds a miss is remembered before the store (and the API, if enabled) is asked again
+DGIDB_NEGATIVE_TTL = int(os.getenv("DGIDB_NEGATIVE_TTL", "3600"))
+DGIDB_REFRESH = os.getenv("DGIDB_REFRESH", "0") == "1"
+DGIDB_API_URL = "https://dgidb.org/api/v2/interactions.json"
+IMPORT_BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    gene_name TEXT NOT NULL,
+    drug_name TEXT NOT NULL,
+    source TEXT,
+    PRIMARY KEY (gene_name, drug_name)
+) WITHOUT ROWID;
+"""
+
+
+def fetch_drugs_from_api(target: str, timeout: float = 10) -> List[str]:
+    """Query the DGIdb API for a single gene (network call; never on the hot path)."""
+    import requests
+
+    resp = requests.get(DGIDB_API_URL, params={"genes": target}, timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    for item in data.get("matchedTerms", []):
+        if item.get("geneName", "").upper() == target.upper():
+            return [i["drugName"] for i in item.get("interactions", [])]
+    return []
+
+
+class InteractionStore:
+    """Read-through LRU (with negative entries) over the SQLite interaction table."""
+
+    def __init__(
+        self,
+        path: str = DGIDB_STORE_PATH,
+        cache_size: int = DGIDB_CACHE_SIZE,
+        negative_ttl: int = DGIDB_NEGATIVE_TTL,
+        refresh: bool = DGIDB_REFRESH,
+    ):
+        self.path = path
+        self.cache_size = cache_size
+        self.negative_ttl = negative_ttl
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        # gene -> (drugs, cached_at); an empty tuple is a negative entry
+        self._cache: "OrderedDict[str, Tuple[Tuple[str, ...], float]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._refresher: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._pid = None
+        self._open()
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._pid = os.getpid()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork (preloaded gunicorn workers); reopen per process
+        if self._pid != os.getpid():
+            self._open()
+        return self._conn
+
+    def drugs_for(self, target: str) -> List[str]:
+        """Known drugs for a target; [] on a miss. Never blocks on the network."""
+        gene = target.upper()
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(gene)
+            if entry is not None:
+                drugs, cached_at = entry
+                if drugs or now - cached_at < self.negative_ttl:
+                    self._cache.move_to_end(gene)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(cache="dgidb", result="hit")
+                    return list(drugs)
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="dgidb", result="miss")
+            rows = self.conn.execute(
+                "SELECT drug_name FROM interactions WHERE gene_name = ? ORDER BY drug_name", (gene,)
+            ).fetchall()
+            drugs = tuple(row[0] for row in rows)
+            self._remember(gene, drugs, now)
+
+        if not drugs and self.refresh:
+            self._schedule_refresh(gene)
+        return list(drugs)
+
+    def _remember(self, gene: str, drugs: Tuple[str, ...], now: float) -> None:
+        self._cache[gene] = (drugs, now)
+        self._cache.move_to_end(gene)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def add(self, pairs: Iterable[Tuple[str, str]], source: str = "") -> int:
+        """Insert (gene, drug) pairs, ignoring duplicates. Returns rows inserted."""
+        rows = [(gene.upper(), drug, source) for gene, drug in pairs if gene and drug]
+        with self._lock:
+            conn = self.conn
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO interactions (gene_name, drug_name, source) VALUES (?, ?, ?)", rows
+            )
+            conn.commit()
+            for gene in {row[0] for row in rows}:
+                self._cache.pop(gene, None)
+            return conn.total_changes - before
+
+    def import_tsv(self, tsv_path: str, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """
+        Bulk-load a DGIdb interactions dump. Uses the normalised gene_name /
+        drug_name columns, falling back to the claim names when they are empty.
+        """
+        inserted = 0
+        batch: List[Tuple[str, str]] = []
+        with open(tsv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f, delimiter="\t"):
+                gene = row.get("gene_name") or row.get("gene_claim_name")
+                drug = row.get("drug_name") or row.get("drug_claim_name")
+                batch.append((gene, drug))
+                if len(batch) >= batch_size:
+                    inserted += self.add(batch, source=os.path.basename(tsv_path))
+                    batch = []
+        if batch:
+            inserted += self.add(batch, source=os.path.basename(tsv_path))
+        logger.info(f"[DGIdb] Imported {inserted} interactions from {tsv_path}")
+        return inserted
+
+    def _schedule_refresh(self, gene: str) -> None:
+        with self._lock:
+            if gene in self._refreshing:
+                return
+            self._refreshing.add(gene)
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dgidb-refresh")
+        self._refresher.submit(self._refresh, gene)
+
+    def _refresh(self, gene: str) -> None:
+        try:
+            drugs = fetch_drugs_from_api(gene)
+            if drugs:
+                self.add(((gene, drug) for drug in drugs), source="api")
+        except Exception as e:
+            logger.warning(f"[DGIdb] Background refresh failed for {gene}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(gene)
+
+    def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.shutdown(wait=False, cancel_futures=True)
+        self._conn.close()
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) < 2 or argv[0] != "import":
+        print("usage: python -m services.interaction_store import <interactions.tsv> [...]")
+        sys.exit(2)
+    logging.basicConfig(level=logging.INFO)
+    store = InteractionStore()
+    for tsv_path in argv[1:]:
+        store.import_tsv(tsv_path)
+    store.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,193 @@
+import asyncio
+import datetime
+import logging
+import os
+import tempfile
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import IngestJob
+from services.ingestion import ingest_pdf
+from services.pdf_pipeline import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Number of documents processed concurrently by this process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# How often idle workers re-check the table for jobs queued by other worker processes
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))
+# Running jobs untouched for this long are assumed orphaned and requeued
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "molecular-jobs"))
+
+
+class JobQueue:
+    """
+    Persistent ingestion queue backed by the `ingest_jobs` table.
+
+    Uploads are spooled to JOB_UPLOAD_DIR and recorded as 'queued' rows; a fixed
+    number of in-process workers claim them (FOR UPDATE SKIP LOCKED on Postgres,
+    so the worker processes of one host can share the table) and run the
+    regular page pipeline, writing progress back to the row after every page.
+    Jobs point at files on local disk, so replicas on other hosts must not
+    share the table unless JOB_UPLOAD_DIR is on shared storage.
+    `session_factory` makes AsyncSessions, so the workers never block the
+    event loop on the database.
+    """
+
+    def __init__(self, session_factory, nlp_service, workers: int = JOB_WORKERS,
+                 poll_interval: float = JOB_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.nlp_service = nlp_service
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def enqueue(self, db: AsyncSession, filename: str, path: str, sha256: Optional[str] = None) -> IngestJob:
+        """Record a spooled upload (and its digest, if known) as a queued job and wake an idle worker."""
+        job = IngestJob(id=uuid.uuid4().hex, filename=filename, path=path, sha256=sha256, status="queued")
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"[JOBS] Queued job {job.id} for {filename}")
+        return job
+
+    async def start(self) -> None:
+        os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+        await self._requeue_stale()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"[JOBS] Started {self.workers} ingestion workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _requeue_stale(self) -> None:
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=JOB_STALE_SECONDS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(IngestJob)
+                .where(IngestJob.status == "running", IngestJob.updated_at < cutoff)
+                .values(status="queued", pages_done=0, entities_found=0)
+            )
+            await db.commit()
+            if result.rowcount:
+                logger.warning(f"[JOBS] Requeued {result.rowcount} stale running jobs")
+
+    async def _requeue(self, job_id: str) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                update(IngestJob)
+                .where(IngestJob.id == job_id, IngestJob.status == "running")
+                .values(status="queued", pages_done=0, entities_found=0)
+            )
+            await db.commit()
+        logger.info(f"[JOBS] Requeued interrupted job {job_id}")
+
+    async def _claim(self) -> Optional[Tuple[str, str, str]]:
+        """
+        Atomically move the oldest queued job to 'running'. The conditional
+        UPDATE makes the claim safe even where SKIP LOCKED is unavailable
+        (SQLite) and workers interleave between the select and the commit.
+        """
+        async with self.session_factory() as db:
+            job = (await db.execute(
+                select(IngestJob.id, IngestJob.path, IngestJob.filename)
+                .where(IngestJob.status == "queued")
+                .order_by(IngestJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).first()
+            if job is None:
+                await db.rollback()
+                return None
+            claimed = await db.execute(
+                update(IngestJob)
+                .where(IngestJob.id == job.id, IngestJob.status == "queued")
+                .values(status="running")
+            )
+            await db.commit()
+            if not claimed.rowcount:
+                return None
+            return job.id, job.path, job.filename
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            try:
+                claimed = await self._claim()
+            except Exception:
+                logger.exception(f"[JOBS] Worker {n} failed to claim a job")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(*claimed)
+
+    async def _run(self, job_id: str, path: str, filename: str) -> None:
+        logger.info(f"[JOBS] Processing job {job_id} ({filename})")
+        db = self.session_factory()
+        job = await db.get(IngestJob, job_id)
+        if job is None:
+            # The job row was deleted after it was claimed
+            logger.warning(f"[JOBS] Job {job_id} no longer exists, dropping it")
+            await db.close()
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        progress = {"entities": 0}
+
+        async def on_page(page: Dict) -> None:
+            progress["entities"] = page["document_entity_count"]
+            job.page_count = page["page_count"]
+            job.pages_done = page["page"]
+            job.entities_found = progress["entities"]
+
+        try:
+            document_key = job.sha256
+            if document_key is None:
+                # Queued before digests were recorded; hash off the event loop
+                loop = asyncio.get_running_loop()
+                document_key = await loop.run_in_executor(None, file_sha256, path)
+            result = await ingest_pdf(path, filename, db, self.nlp_service, document_key, on_page=on_page)
+            if result.get("cached"):
+                # Served from the document cache; no pages were processed
+                job.page_count = job.pages_done = result.get("page_count")
+                job.entities_found = progress["entities"] = len(result["entities"])
+            job.status = "done"
+            job.result = result
+            await db.commit()
+            logger.info(f"[JOBS] Job {job_id} finished with {progress['entities']} entities")
+        except asyncio.CancelledError:
+            # Shutdown mid-job: put it back in the queue so the next start picks it up at once
+            await db.rollback()
+            try:
+                await asyncio.shield(self._requeue(job_id))
+            except Exception:
+                logger.exception(f"[JOBS] Could not requeue interrupted job {job_id}")
+            raise
+        except Exception as e:
+            logger.exception(f"[JOBS] Job {job_id} failed")
+            await db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            await db.commit()
+        finally:
+            await db.close()
+
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,177 @@
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters that can appear inside a token (mirrors NlpService.tokenize_text).
+# A dictionary hit only counts when it is not glued to other token characters.
+TOKEN_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-'"
+)
+
+
+def fold_text(text: str) -> str:
+    """
+    Case-fold text while keeping character offsets aligned with the original.
+    A few code points lower-case to more than one character (e.g. 'İ');
+    those are left untouched so spans stay valid.
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class LexiconMatch:
+    """A single dictionary hit: [start, end) offsets into the scanned text."""
+
+    __slots__ = ("start", "end", "canonical", "entity_type")
+
+    def __init__(self, start: int, end: int, canonical: str, entity_type: str):
+        self.start = start
+        self.end = end
+        self.canonical = canonical
+        self.entity_type = entity_type
+
+    def __repr__(self):
+        return (
+            f"LexiconMatch({self.start}, {self.end}, "
+            f"{self.canonical!r}, {self.entity_type!r})"
+        )
+
+
+class LexiconIndex:
+    """
+    Aho-Corasick automaton over case-folded dictionary terms.
+
+    Built once from canonical names, synonyms and multi-word phrases; `find_all`
+    scans a text in a single pass and returns leftmost-longest, non-overlapping
+    matches that sit on token boundaries.
+    """
+
+    def __init__(self, terms: Dict[str, Tuple[str, str]]):
+        # terms: folded surface form -> (canonical name, entity type)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # For every state, the length of the longest term ending there (0 = none)
+        self._out: List[int] = [0]
+        self._out_link: List[int] = [0]
+        self._terms = dict(terms)
+
+        for surface in self._terms:
+            self._insert(surface)
+        self._build_failure_links()
+        logger.info(f"[LEXICON] Compiled {len(self._terms)} terms into {len(self._goto)} states")
+
+    @classmethod
+    def from_dictionaries(
+        cls,
+        targets: Iterable[str],
+        drugs: Iterable[str],
+        synonyms: Optional[Dict[str, str]] = None,
+    ) -> "LexiconIndex":
+        """
+        Build an index from target/drug name sets and a synonym -> canonical map.
+        Targets win over drugs when a name appears in both.
+        """
+        terms: Dict[str, Tuple[str, str]] = {}
+        for drug in drugs:
+            terms[fold_text(drug)] = (drug, "DRUG")
+        for target in targets:
+            terms[fold_text(target)] = (target, "TARGET")
+
+        for synonym, canonical in (synonyms or {}).items():
+            resolved = terms.get(fold_text(canonical))
+            if resolved is None:
+                logger.warning(f"[LEXICON] Synonym {synonym!r} points to unknown term {canonical!r}")
+                continue
+            terms.setdefault(fold_text(synonym), resolved)
+        return cls(terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def lookup(self, term: str) -> Optional[Tuple[str, str]]:
+        """Exact (case-insensitive) lookup of a single term."""
+        return self._terms.get(fold_text(term))
+
+    def _insert(self, surface: str) -> None:
+        state = 0
+        for ch in surface:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+                self._out_link.append(0)
+            state = nxt
+        self._out[state] = len(surface)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Nearest suffix state that terminates a term
+                fail = self._fail[nxt]
+                self._out_link[nxt] = fail if self._out[fail] else self._out_link[fail]
+
+    def find_all(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        folded: Optional[str] = None,
+    ) -> List[LexiconMatch]:
+        """
+        Scan text[start:end] once and return non-overlapping term matches.
+        Pass `folded` (from fold_text) to reuse a pre-folded buffer across calls.
+        """
+        if folded is None:
+            folded = fold_text(text)
+        if end is None:
+            end = len(folded)
+
+        goto, fail, out, out_link = self._goto, self._fail, self._out, self._out_link
+        # Candidate spans as (start, end); resolved to leftmost-longest below
+        candidates: List[Tuple[int, int]] = []
+        state = 0
+
+        for pos in range(start, end):
+            ch = folded[pos]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not state:
+                continue
+
+            stop = pos + 1
+            if stop < end and folded[stop] in TOKEN_CHARS:
+                continue
+
+            hit = state if out[state] else out_link[state]
+            while hit:
+                begin = stop - out[hit]
+                if begin == start or folded[begin - 1] not in TOKEN_CHARS:
+                    candidates.append((begin, stop))
+                hit = out_link[hit]
+
+        candidates.sort(key=lambda span: (span[0], -span[1]))
+        matches: List[LexiconMatch] = []
+        last_end = start
+        for begin, stop in candidates:
+            if begin < last_end:
+                continue
+            canonical, entity_type = self._terms[folded[begin:stop]]
+            matches.append(LexiconMatch(begin, stop, canonical, entity_type))
+            last_end = stop
+        return matches
@@ -0,0 +1,319 @@
+"""
+Hot-reloadable dictionaries for entity extraction.
+
+Term lists are read from LEXICON_DIR (TSV and JSON files, see
+load_lexicon_files) on top of the built-in seed lexicon, compiled into an
+immutable LexiconSnapshot and published with a single reference swap.
+Extraction takes the current snapshot once per document, so a reload never
+changes the dictionaries halfway through a text.
+
+Reloads are triggered by POST /api/admin/lexicon/reload or, with
+LEXICON_WATCH_INTERVAL > 0, by a thread polling the directory for changes.
+Each process holds its own store; with several workers use the watcher so
+every process picks up new files.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services.fuzzy_index import FuzzyIndex
+from services.lexicon import LexiconIndex
+
+logger = logging.getLogger(__name__)
+
+LEXICON_DIR = os.getenv(
+    "LEXICON_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "lexicon")
+)
+# Merge the seed dictionaries from nlp_service with the files (0 = files only)
+LEXICON_INCLUDE_BUILTIN = os.getenv("LEXICON_INCLUDE_BUILTIN", "1") == "1"
+# Seconds between checks of LEXICON_DIR for changed files (0 = no watcher)
+LEXICON_WATCH_INTERVAL = float(os.getenv("LEXICON_WATCH_INTERVAL", "0"))
+
+LEXICON_EXTENSIONS = (".tsv", ".json")
+
+
+class LexiconData:
+    """Mutable term lists collected from the seed lexicon and files, before compilation."""
+
+    def __init__(self):
+        self.targets: Set[str] = set()
+        self.drugs: Set[str] = set()
+        self.synonyms: Dict[str, str] = {}
+        self.target_drugs: Dict[str, List[str]] = {}
+
+    def update(self, targets: Iterable[str] = (), drugs: Iterable[str] = (),
+               synonyms: Optional[Dict[str, str]] = None,
+               target_drugs: Optional[Dict[str, Iterable[str]]] = None) -> None:
+        self.targets.update(targets)
+        self.drugs.update(drugs)
+        self.synonyms.update(synonyms or {})
+        for target, drugs_for_target in (target_drugs or {}).items():
+            known = self.target_drugs.setdefault(target.upper(), [])
+            known.extend(d for d in drugs_for_target if d not in known)
+
+    def term_count(self) -> int:
+        return len(self.targets) + len(self.drugs) + len(self.synonyms)
+
+
+class LexiconSnapshot:
+    """
+    One compiled, read-only generation of the dictionaries: the Aho-Corasick
+    index, the fuzzy target index, the target -> drugs map and the version
+    string that keys cached extraction results.
+    """
+
+    __slots__ = ("version", "index", "fuzzy_index", "known_targets_upper", "target_drugs",
+                 "term_count", "files", "built_at", "build_seconds")
+
+    def __init__(self, version: str, index: LexiconIndex, fuzzy_index: FuzzyIndex,
+                 known_targets_upper: frozenset, target_drugs: Dict[str, Tuple[str, ...]],
+                 term_count: int, files: List[str], build_seconds: float):
+        self.version = version
+        self.index = index
+        self.fuzzy_index = fuzzy_index
+        self.known_targets_upper = known_targets_upper
+        self.target_drugs = target_drugs
+        self.term_count = term_count
+        self.files = files
+        self.built_at = time.time()
+        self.build_seconds = build_seconds
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "terms": self.term_count,
+            "files": self.files,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+
+def lexicon_files(directory: str) -> List[str]:
+    """Lexicon files in `directory`, in the (name) order they are applied."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(LEXICON_EXTENSIONS) and not name.startswith(".")
+    )
+
+
+def _load_tsv(path: str, data: LexiconData) -> None:
+    """
+    Two TSV layouts, told apart by the header row:
+      term <TAB> type [<TAB> canonical]  - a TARGET/DRUG name, or a synonym when canonical is set
+      target <TAB> drug                  - one target -> drug relation per row
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f, delimiter="\t")
+        columns = set(reader.fieldnames or ())
+        if {"target", "drug"} <= columns:
+            for row in reader:
+                if row["target"] and row["drug"]:
+                    data.update(target_drugs={row["target"].strip(): [row["drug"].strip()]})
+        elif {"term", "type"} <= columns:
+            for row in reader:
+                term = (row["term"] or "").strip()
+                if not term:
+                    continue
+                canonical = (row.get("canonical") or "").strip()
+                if canonical:
+                    data.synonyms[term] = canonical
+                elif row["type"].strip().upper() == "TARGET":
+                    data.targets.add(term)
+                elif row["type"].strip().upper() == "DRUG":
+                    data.drugs.add(term)
+        else:
+            raise ValueError(f"{path}: expected term/type or target/drug columns, got {sorted(columns)}")
+
+
+def _load_json(path: str, data: LexiconData) -> None:
+    """{"targets": [...], "drugs": [...], "synonyms": {...}, "target_drugs": {...}}; all keys optional."""
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    data.update(
+        targets=document.get("targets", ()),
+        drugs=document.get("drugs", ()),
+        synonyms=document.get("synonyms"),
+        target_drugs=document.get("target_drugs"),
+    )
+
+
+def load_lexicon_files(files: List[str], data: LexiconData) -> str:
+    """Apply the files to `data` in order; returns a digest of their contents."""
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(os.path.basename(path).encode() + b"\0" + f.read())
+        if path.endswith(".tsv"):
+            _load_tsv(path, data)
+        else:
+            _load_json(path, data)
+    return digest.hexdigest()
+
+
+class LexiconStore:
+    """
+    Holds the current LexiconSnapshot and rebuilds it on demand.
+
+    `snapshot` is a plain attribute read, so readers never lock; rebuilds are
+    serialised and run off the request path, and the new snapshot replaces
+    the old one only once it is fully compiled. In-flight extractions keep
+    using the snapshot they started with.
+    """
+
+    def __init__(self, seed: Optional[LexiconData] = None, directory: str = LEXICON_DIR,
+                 fuzzy_settings: Optional[Dict] = None, include_builtin: bool = LEXICON_INCLUDE_BUILTIN):
+        self.seed = seed or LexiconData()
+        self.directory = directory
+        self.fuzzy_settings = fuzzy_settings or {}
+        self.include_builtin = include_builtin
+        self._build_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self._files_signature = self._signature()
+        self.reload_count = 0
+        # Version requested by ensure_version -> file signature it was last tried against
+        self._attempted_versions: Dict[str, Tuple] = {}
+        self.last_error: Optional[str] = None
+        self.snapshot: LexiconSnapshot = self._build()
+
+    def _signature(self) -> Tuple:
+        """Cheap change detector: (name, size, mtime) of every lexicon file."""
+        signature = []
+        for path in lexicon_files(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def _build(self) -> LexiconSnapshot:
+        start = time.perf_counter()
+        data = LexiconData()
+        if self.include_builtin:
+            data.update(self.seed.targets, self.seed.drugs, self.seed.synonyms, self.seed.target_drugs)
+        files = lexicon_files(self.directory)
+        files_digest = load_lexicon_files(files, data)
+
+        index = LexiconIndex.from_dictionaries(data.targets, data.drugs, data.synonyms)
+        fuzzy_index = FuzzyIndex(set(data.target_drugs) | data.targets, **self.fuzzy_settings)
+        version_source = json.dumps([
+            sorted(data.targets), sorted(data.drugs), sorted(data.synonyms.items()),
+            sorted(data.target_drugs.items()),
+            # Matching bounds change results; the memo size does not
+            {k: v for k, v in self.fuzzy_settings.items() if k != "cache_size"}
+        ], sort_keys=True)
+        snapshot = LexiconSnapshot(
+            version=hashlib.sha256(version_source.encode()).hexdigest()[:16],
+            index=index,
+            fuzzy_index=fuzzy_index,
+            known_targets_upper=frozenset(t.upper() for t in data.targets),
+            target_drugs={target: tuple(drugs) for target, drugs in data.target_drugs.items()},
+            term_count=data.term_count(),
+            files=[os.path.basename(path) for path in files],
+            build_seconds=time.perf_counter() - start,
+        )
+        logger.info(
+            f"[LEXICON] Built version {snapshot.version} ({snapshot.term_count} terms, "
+            f"{len(files)} files, digest {files_digest[:12]}) in {snapshot.build_seconds:.2f}s"
+        )
+        return snapshot
+
+    def reload(self) -> Dict:
+        """
+        Rebuild from the files and swap the result in. Runs in the calling
+        thread; a failed build (e.g. a malformed file) leaves the current
+        snapshot in place and is re-raised.
+        """
+        with self._build_lock:
+            previous = self.snapshot
+            self._files_signature = self._signature()
+            try:
+                snapshot = self._build()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception(f"[LEXICON] Rebuild failed; keeping version {previous.version}")
+                raise
+            self.last_error = None
+            self.snapshot = snapshot
+            self.reload_count += 1
+        return {
+            "previous_version": previous.version,
+            "changed": snapshot.version != previous.version,
+            **snapshot.stats(),
+        }
+
+    def reload_in_background(self) -> Future:
+        """Schedule reload() on the store's build thread."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lexicon-build")
+        return self._executor.submit(self.reload)
+
+    def ensure_version(self, version: str) -> None:
+        """
+        Reload when another process has already moved to a different version.
+        Each requested version is tried once per state of the lexicon files:
+        a version this process cannot rebuild (a different seed or settings)
+        would otherwise cost a full rebuild for every document.
+        """
+        if self.snapshot.version == version:
+            return
+        signature = self._signature()
+        if self._attempted_versions.get(version) == signature:
+            return
+        self._attempted_versions[version] = signature
+        try:
+            self.reload()
+        except Exception as e:
+            logger.warning(f"[LEXICON] Could not catch up with version {version}: {e}")
+            return
+        if self.snapshot.version != version:
+            logger.warning(
+                f"[LEXICON] Rebuilt version {self.snapshot.version} but version {version} was requested; "
+                f"not retrying until the lexicon files change"
+            )
+
+    def start_watcher(self, interval: float = LEXICON_WATCH_INTERVAL) -> None:
+        """Poll the lexicon directory every `interval` seconds and reload on changes."""
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                if self._signature() != self._files_signature:
+                    logger.info(f"[LEXICON] Change detected in {self.directory}")
+                    try:
+                        self.reload()
+                    except Exception as e:
+                        logger.warning(f"[LEXICON] Watcher reload failed, will retry on the next change: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="lexicon-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"[LEXICON] Watching {self.directory} every {interval:g}s")
+
+    def stop(self) -> None:
+        self._stop_watching.set()
+        self._watcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        return {
+            **self.snapshot.stats(),
+            "directory": self.directory,
+            "reload_count": self.reload_count,
+            "watching": self._watcher is not None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,179 @@
+"""
+Lightweight in-process instrumentation.
+
+Pipeline stages record their latency into one histogram labelled by stage,
+and counters track pages, segments, entities and cache lookups. GET /metrics
+renders everything in the Prometheus text exposition format.
+
+Every process has its own registry. Under gunicorn a scrape reaches one
+worker, and its series carry that worker's `pid` label. Work done inside the
+spawn pools is timed in the pool process and reported back to the caller, so
+it still shows up here. Hot loops log through debug_sampled() instead of
+logging every item.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Fraction of hot-loop debug messages that are emitted when DEBUG logging is enabled
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+# Upper bounds (seconds) of the latency buckets; chosen to cover sub-ms matching and multi-second generation
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        # An unlabelled counter is exported as 0 before its first increment
+        self._values: Dict[Tuple[str, ...], float] = {} if self.label_names else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self, base_labels: Dict[str, str]) -> List[str]:
+        names = tuple(base_labels) + self.label_names
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(names, tuple(base_labels.values()) + key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative bucket counts plus sum and count, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, base_labels: Dict[str, str]) -> List[str]:
+        names = tuple(base_labels) + self.label_names
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            values = tuple(base_labels.values()) + key
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(names, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(names, values)} {repr(total)}")
+            lines.append(f"{self.name}_count{_format_labels(names, values)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        base_labels = {"pid": str(os.getpid())}
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(base_labels))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Stages: pdf_open, page_text, ocr, segmentation, matching, dgidb_lookup, db_upsert, db_commit,
+# cooccurrence, search, t5_generate
+STAGE_SECONDS = registry.histogram("molecular_stage_seconds", "Time spent in each pipeline stage", ["stage"])
+PAGES = registry.counter("molecular_pages_total", "PDF pages processed")
+SEGMENTS = registry.counter("molecular_segments_total", "Sentence segments scanned for entities")
+ENTITIES = registry.counter("molecular_entities_total", "Distinct entities extracted per text or page")
+CACHE_LOOKUPS = registry.counter(
+    "molecular_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+REQUESTS_REJECTED = registry.counter(
+    "molecular_requests_rejected_total", "Requests turned away with 503 by admission control"
+)
+
+
+def stage_timer(stage: str):
+    """Context manager that records the block's duration for `stage`."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record a duration measured elsewhere (e.g. in a pool process)."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def debug_sampled(logger: logging.Logger, message: Callable[[], str], rate: float = LOG_SAMPLE_RATE) -> None:
+    """
+    Debug logging for per-segment and per-entity loops: nothing is formatted
+    unless DEBUG is enabled for `logger`, and then only a `rate` fraction of
+    calls is logged. `message` builds the text lazily.
+    """
+    if rate > 0 and logger.isEnabledFor(logging.DEBUG) and (rate >= 1 or random.random() < rate):
+        logger.debug(message())
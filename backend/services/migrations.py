@@ -0,0 +1,75 @@
+import logging
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Apply pending Alembic migrations at startup; with 0 the app only checks the
+# revision and refuses to start on an outdated schema (run `alembic upgrade head`)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") == "1"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# Postgres advisory lock key serialising migrations across replicas starting together
+MIGRATION_LOCK_KEY = 0x6D6F6C65  # "mole"
+# Revision matching the schema the old drop_all/create_all startup produced
+BASELINE_REVISION = "86e26b1b3f3d"
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    # Reuse the app's connection and keep the app's logging configuration
+    config.attributes["connection"] = connection
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def _revisions(connection: Connection):
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    current = MigrationContext.configure(connection).get_current_revision()
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    return current, head
+
+
+def ensure_schema(engine: Engine, auto_migrate: bool = AUTO_MIGRATE) -> Dict:
+    """
+    Bring the database to the Alembic head revision, touching nothing when it
+    is already there (the common case: one read of alembic_version). Never
+    drops tables; existing rows survive restarts.
+    """
+    with engine.connect() as connection:
+        current, head = _revisions(connection)
+    if current == head:
+        logger.info(f"[DB] Schema at revision {head}")
+        return {"revision": head, "upgraded": False}
+
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}; run `alembic upgrade head`"
+        )
+
+    from alembic import command
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Another replica may be migrating; wait for it, then re-check
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            current, head = _revisions(connection)
+            if current == head:
+                return {"revision": head, "upgraded": False}
+
+        config = alembic_config(connection)
+        if current is None and inspect(connection).has_table("molecular_targets"):
+            # Tables from the pre-migration create_all startup, never versioned. Older
+            # ones lack ingest_jobs; revision c4d1a8e7f325 creates it when missing
+            logger.warning(f"[DB] Unversioned schema found; stamping baseline {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+        logger.info(f"[DB] Upgrading schema from {current} to {head}")
+        command.upgrade(config, "head")
+    return {"revision": head, "previous_revision": current, "upgraded": True}
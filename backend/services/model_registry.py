@@ -0,0 +1,199 @@
+import logging
+import os
+import resource
+import contextlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+T5_MODEL_NAME = os.getenv("T5_MODEL_NAME", "t5-base")
+# Load the guideline model in a background thread right after startup
+PREWARM_MODELS = os.getenv("PREWARM_MODELS", "0") == "1"
+
+# CPU inference tuning
+# Dynamic int8 quantisation of the Linear layers after loading
+T5_QUANTIZE = os.getenv("T5_QUANTIZE", "0") == "1"
+# Intra-op threads per worker process (0 = torch default, i.e. all cores)
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+# Smaller checkpoint used when the primary model's per-request latency exceeds the budget
+T5_FALLBACK_MODEL = os.getenv("T5_FALLBACK_MODEL", "")
+GUIDELINE_LATENCY_BUDGET_MS = float(os.getenv("GUIDELINE_LATENCY_BUDGET_MS", "0"))
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+# While over budget, every Nth request still goes to the primary to re-measure it
+LATENCY_PROBE_EVERY = 20
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for heavy models.
+
+    Each model is loaded once, on first use, under a lock so concurrent first
+    requests do not load it twice. Load time and memory footprint are recorded
+    for the /api/models endpoint.
+    """
+
+    def __init__(
+        self,
+        quantize: bool = T5_QUANTIZE,
+        num_threads: int = TORCH_NUM_THREADS,
+        fallback_model: str = T5_FALLBACK_MODEL,
+        latency_budget_ms: float = GUIDELINE_LATENCY_BUDGET_MS,
+    ):
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.fallback_model = fallback_model
+        self.latency_budget_ms = latency_budget_ms
+        self._lock = threading.Lock()
+        self._models: Dict[str, Tuple[object, object]] = {}
+        self._stats: Dict[str, Dict] = {}
+        # Moving average of per-request generation latency, per model
+        self._latency_ms: Dict[str, float] = {}
+        self._fallback_count = 0
+        self._torch_configured = False
+        self._prewarm_thread: Optional[threading.Thread] = None
+
+    def get_t5(self, name: str = T5_MODEL_NAME) -> Tuple[object, object]:
+        """Return (tokenizer, model) for a T5 checkpoint, loading it if needed."""
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None:
+                loaded = self._load_t5(name)
+                self._models[name] = loaded
+        return loaded
+
+    def _configure_torch(self) -> None:
+        import torch
+
+        if self._torch_configured:
+            return
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+        self._torch_configured = True
+        logger.info(f"[MODELS] torch intra-op threads: {torch.get_num_threads()}")
+
+    def _load_t5(self, name: str) -> Tuple[object, object]:
+        import torch
+        from transformers import T5ForConditionalGeneration, T5Tokenizer
+
+        self._configure_torch()
+        logger.info(f"[MODELS] Loading {name}...")
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        tokenizer = T5Tokenizer.from_pretrained(name)
+        model = T5ForConditionalGeneration.from_pretrained(name)
+        model.eval()
+        if self.quantize:
+            # Weights of every nn.Linear stored as int8; activations quantised on the fly
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        seconds = time.perf_counter() - start
+
+        # Quantised Linear weights are packed outside .parameters(), so this
+        # only counts what remains in float (embeddings, layer norms)
+        parameter_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        self._stats[name] = {
+            "load_seconds": round(seconds, 3),
+            "parameter_bytes": parameter_bytes,
+            "rss_delta_bytes": current_rss_bytes() - rss_before,
+            "quantized": self.quantize,
+        }
+        logger.info(f"[MODELS] Loaded {name} in {seconds:.1f}s (quantized={self.quantize})")
+        return tokenizer, model
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """Change the intra-op thread count, e.g. for each forked server worker."""
+        self.num_threads = num_threads
+        self._torch_configured = False
+        if self._models:
+            # torch is already imported; apply now rather than on the next load
+            self._configure_torch()
+
+    def inference_context(self):
+        """Context manager disabling autograd bookkeeping for generation."""
+        try:
+            import torch
+        except ImportError:
+            return contextlib.nullcontext()
+        return torch.inference_mode()
+
+    def select_t5(self, name: str = T5_MODEL_NAME) -> str:
+        """
+        The checkpoint to generate with: the requested one, unless a fallback
+        and a latency budget are configured and its recent latency is over budget.
+        """
+        if not self.fallback_model or self.latency_budget_ms <= 0:
+            return name
+        latency = self._latency_ms.get(name)
+        if latency is None or latency <= self.latency_budget_ms:
+            return name
+        self._fallback_count += 1
+        if self._fallback_count % LATENCY_PROBE_EVERY == 0:
+            return name
+        return self.fallback_model
+
+    def record_latency(self, name: str, seconds_per_request: float) -> None:
+        sample = seconds_per_request * 1000
+        previous = self._latency_ms.get(name)
+        self._latency_ms[name] = sample if previous is None else (
+            LATENCY_EWMA_ALPHA * sample + (1 - LATENCY_EWMA_ALPHA) * previous
+        )
+
+    def is_loaded(self, name: str = T5_MODEL_NAME) -> bool:
+        return name in self._models
+
+    def prewarm_in_background(self, name: str = T5_MODEL_NAME) -> threading.Thread:
+        """Start loading a model on a daemon thread so startup does not wait for it."""
+        if self._prewarm_thread is None:
+            def prewarm():
+                try:
+                    self.get_t5(name)
+                except Exception:
+                    logger.exception(f"[MODELS] Background load of {name} failed")
+
+            self._prewarm_thread = threading.Thread(target=prewarm, name="model-prewarm", daemon=True)
+            self._prewarm_thread.start()
+        return self._prewarm_thread
+
+    def stats(self) -> Dict:
+        return {
+            "process_rss_bytes": current_rss_bytes(),
+            "models": {
+                name: {
+                    "loaded": name in self._models,
+                    "latency_ms": self._latency_ms.get(name),
+                    **self._stats.get(name, {})
+                }
+                for name in sorted(set(self._stats) | {T5_MODEL_NAME})
+            },
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """The shared registry for this process."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
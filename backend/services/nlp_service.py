@@ -1,30 +1,39 @@
 import os
 import logging
-import math
-from typing import List, Dict, Tuple
-import requests
-from transformers import (
-    T5ForConditionalGeneration,
-    T5Tokenizer,
-)
-from sklearn.metrics import precision_recall_fscore_support
-from difflib import get_close_matches
+from typing import List, Dict, Optional, Tuple
+import threading
+import time
 import re
+from services.lexicon import fold_text
+from services.lexicon_store import LexiconData, LexiconSnapshot, LexiconStore
+from services.segmentation import sentence_spans
+from services import pfs
+from services.pfs import LINGUISTIC_TERMS, EntityColumns
+from services.interaction_store import InteractionStore
+from services.metrics import ENTITIES, SEGMENTS, debug_sampled, observe_stage, stage_timer
+from services.model_registry import T5_MODEL_NAME, get_model_registry
+
+TOKEN_PATTERN = re.compile(r"[a-zA-Z0-9\-\']+")
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-LINGUISTIC_TERMS = {
-    'very_high': (0.9, 0.1),
-    'high': (0.7, 0.3),
-    'medium': (0.5, 0.5),
-    'low': (0.3, 0.7),
-    'very_low': (0.1, 0.9)
+# Fuzzy target matching bounds (edit distance, old difflib-style similarity cutoff)
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "1"))
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.85"))
+FUZZY_CACHE_SIZE = int(os.getenv("FUZZY_CACHE_SIZE", "65536"))
+
+# Beam search settings for guideline generation (also part of the guideline cache key)
+GUIDELINE_GENERATION_PARAMS = {
+    "max_length": 150,
+    "num_beams": 4,
+    "length_penalty": 2.0,
+    "early_stopping": True,
 }
 
 # Instead of mapping from Hugging Face tags, we'll define static known targets/drugs:
-# (Populate/expand these as you wish)
+# (Seed lexicon; extend it with files in LEXICON_DIR, see services.lexicon_store)
 KNOWN_TARGETS = {
     "BCL-2", "PTHRPP", "CD44", "IHH", "PDGFRB", 
     "COX-2", "PPARC", "XIAP", "HDAC", "VEGF"
@@ -61,139 +70,170 @@ class NlpService:
     def __init__(self):
         logger.info("Initializing static rule-based pipeline...")
 
-        # (No huggingface model loading here)
+        # Compile the dictionaries once; extraction is a single pass over the text.
+        # The store swaps in a new compiled snapshot when the lexicon files change.
+        seed = LexiconData()
+        seed.update(KNOWN_TARGETS, KNOWN_DRUGS, SYNONYMS, KNOWN_TARGET_DRUGS)
+        self.lexicon_store = LexiconStore(seed, fuzzy_settings={
+            "max_distance": FUZZY_MAX_DISTANCE,
+            "min_similarity": FUZZY_MIN_SIMILARITY,
+            "cache_size": FUZZY_CACHE_SIZE,
+        })
+        self.interaction_store = InteractionStore()
         logger.info("Rule-based NER pipeline initialized.")
 
-        # Still load T5 if you need it for guidelines generation
-        t5_model = "t5-base"
-        logger.info("Loading T5 model...")
-        self.t5_tokenizer = T5Tokenizer.from_pretrained(t5_model)
-        self.t5_model = T5ForConditionalGeneration.from_pretrained(t5_model)
-        logger.info("T5 model loaded successfully.")
+        # T5 (guidelines generation) is loaded by the shared model registry on first use
+        self.t5_model_name = T5_MODEL_NAME
+
+    @property
+    def lexicon(self):
+        return self.lexicon_store.snapshot.index
+
+    @property
+    def fuzzy_index(self):
+        return self.lexicon_store.snapshot.fuzzy_index
+
+    @property
+    def known_targets_upper(self):
+        return self.lexicon_store.snapshot.known_targets_upper
+
+    @property
+    def lexicon_version(self) -> str:
+        """Version of the current dictionaries; part of the document cache key."""
+        return self.lexicon_store.snapshot.version
+
+    @property
+    def t5_tokenizer(self):
+        return get_model_registry().get_t5(self.t5_model_name)[0]
+
+    @property
+    def t5_model(self):
+        return get_model_registry().get_t5(self.t5_model_name)[1]
 
     def compute_pfs(self, confidence: float) -> Tuple[float, float, float]:
         """
         Convert a confidence (0..1) into fuzzy membership (my, mn)
-        and compute hesitancy h. This is carried over from your original logic.
+        and compute hesitancy h. Batches should use services.pfs.compute_pfs.
         """
-        if confidence >= 0.9:
-            my, mn = LINGUISTIC_TERMS['very_high']
-        elif confidence >= 0.7:
-            my, mn = LINGUISTIC_TERMS['high']
-        elif confidence >= 0.5:
-            my, mn = LINGUISTIC_TERMS['medium']
-        elif confidence >= 0.3:
-            my, mn = LINGUISTIC_TERMS['low']
-        else:
-            my, mn = LINGUISTIC_TERMS['very_low']
-        h = math.sqrt(abs(1 - my ** 2 - mn ** 2))
-        return my, mn, h
+        return pfs.compute_pfs_scalar(confidence)
 
     def fetch_drugs_from_dgidb(self, target: str) -> List[str]:
         """
-        Optionally fetch known drug interactions from DGIdb
-        if we don't already have them in KNOWN_TARGET_DRUGS.
+        Known drug interactions for targets missing from KNOWN_TARGET_DRUGS,
+        read from the local DGIdb store (see services.interaction_store).
+        Never blocks on the network; misses return [].
         """
-        try:
-            url = f"https://dgidb.org/api/v2/interactions.json?genes={target}"
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            matched = data.get("matchedTerms", [])
-            for item in matched:
-                if item.get("geneName", "").upper() == target.upper():
-                    return [i["drugName"] for i in item.get("interactions", [])]
-        except Exception as e:
-            logger.warning(f"[DGIdb] Failed to fetch drugs for {target}: {e}")
-        return []
-
-    def fuzzy_match_target(self, word: str) -> str:
+        with stage_timer("dgidb_lookup"):
+            return self.interaction_store.drugs_for(target)
+
+    def fuzzy_match_target(self, word: str, snapshot: Optional[LexiconSnapshot] = None) -> str:
         """
         Fuzzy match the extracted token to known target keys (e.g., 'BCL-2', 'COX-2', etc.).
         If no match found, just return the original word.
         """
-        all_known_targets = list(KNOWN_TARGET_DRUGS.keys())
-        match = get_close_matches(word.upper(), all_known_targets, n=1, cutoff=0.85)
-        return match[0] if match else word
+        snapshot = snapshot or self.lexicon_store.snapshot
+        match = snapshot.fuzzy_index.lookup(word.upper())
+        return match if match else word
 
     def tokenize_text(self, text: str) -> List[str]:
         """
         Basic tokenizer that preserves letters, digits, and dashes.
         Adjust if needed.
         """
-        return re.findall(r"[a-zA-Z0-9\-\']+", text)
+        return TOKEN_PATTERN.findall(text)
 
-    def extract_entities(self, text: str) -> List[Dict]:
+    def extract_entities(self, text: str, spans: Optional[List[Tuple[int, int]]] = None,
+                         snapshot: Optional[LexiconSnapshot] = None) -> List[Dict]:
         """
         Main method for entity extraction, but now purely static/dictionary-based.
-        1) Tokenize the text.
-        2) Check if each token is a known target or drug (directly or via synonyms/fuzzy).
+        Returns one dict per distinct entity with its canonical name, first
+        character span, every mention span, confidence and (my, mn, h); see
+        extract_entity_columns.
+        """
+        return self.extract_entity_columns(text, spans, snapshot).to_records()
+
+    def extract_entity_columns(self, text: str, spans: Optional[List[Tuple[int, int]]] = None,
+                               snapshot: Optional[LexiconSnapshot] = None) -> EntityColumns:
+        """
+        Columnar form of extract_entities:
+        1) Scan each sentence (or each given (start, end) span) of the text
+           with the compiled lexicon (names, synonyms, phrases). Spans are
+           offsets into `text`, which is folded once and never sliced.
+        2) Fuzzy-match the remaining tokens against known targets.
         3) Assign a synthetic confidence score (e.g., 0.99).
-        4) Convert confidence to (my, mn, h).
-        5) Return the resulting list of entities.
+        4) Convert all confidences to (my, mn, h) in one array pass.
+        5) Return the distinct entities as parallel arrays
+           (services.pfs.EntityColumns), with the spans of all their mentions.
+        All lookups use one lexicon snapshot (the current one unless given),
+        so a concurrent reload cannot mix dictionary versions in a result.
         """
-        logger.info("Extracting entities (static pipeline) from text...")
-
-        tokens = self.tokenize_text(text)
-        merged = []
-        seen = set()
-
-        for tok in tokens:
-            original_tok = tok  # store
-            upper_tok = tok.upper()
-
-            # Check synonyms
-            if upper_tok in SYNONYMS:
-                upper_tok = SYNONYMS[upper_tok].upper()
-
-            # Decide entity_type
-            if upper_tok in (t.upper() for t in KNOWN_TARGETS):
-                entity_type = "TARGET"
-            elif upper_tok in (d.upper() for d in KNOWN_DRUGS):
-                entity_type = "DRUG"
-            else:
-                # Optionally do fuzzy target matching 
-                # (Only if you want to treat near matches as targets)
-                # For drugs, you could do something similar if you wish.
-                possible_match = self.fuzzy_match_target(upper_tok)
-                if possible_match.upper() in (t.upper() for t in KNOWN_TARGETS):
-                    entity_type = "TARGET"
-                    upper_tok = possible_match.upper()
-                else:
-                    continue  # Not recognized as target or drug
-
-            # Avoid duplicates
-            if upper_tok in seen:
-                continue
+        snapshot = snapshot or self.lexicon_store.snapshot
+        if spans is None:
+            with stage_timer("segmentation"):
+                spans = sentence_spans(text)
+        # Matching time includes DGIdb lookups, which are also timed on their own
+        start_time = time.perf_counter()
+        folded = fold_text(text)
+        hits = []
+        for span_start, span_end in spans:
+            span_hits = [
+                (m.start, m.end, m.canonical, m.entity_type)
+                for m in snapshot.index.find_all(text, span_start, span_end, folded=folded)
+            ]
 
-            # Synthetic confidence
-            confidence = 0.99  # or 1.0, or anything
-            my, mn, h = self.compute_pfs(confidence)
+            # Tokens not covered by a dictionary hit get a fuzzy target lookup
+            covered = iter(span_hits)
+            next_hit = next(covered, None)
+            for tok in TOKEN_PATTERN.finditer(text, span_start, span_end):
+                while next_hit is not None and next_hit[1] <= tok.start():
+                    next_hit = next(covered, None)
+                if next_hit is not None and next_hit[0] < tok.end():
+                    continue
+                possible_match = self.fuzzy_match_target(tok.group().upper(), snapshot)
+                if possible_match.upper() in snapshot.known_targets_upper:
+                    # Report the lexicon's spelling, as a dictionary hit would
+                    canonical, _ = snapshot.index.lookup(possible_match)
+                    span_hits.append((tok.start(), tok.end(), canonical, "TARGET"))
+            hits.extend(span_hits)
+        hits.sort()
 
-            entity = {
-                'text': original_tok,
-                'entity_type': entity_type,
-                'confidence': confidence,
-                'my': my,
-                'mn': mn,
-                'hesitancy': h
-            }
+        texts, names, types, starts, ends, related_drugs, mentions = [], [], [], [], [], [], []
+        # canonical key -> slot of the entity's first mention
+        seen: Dict[str, int] = {}
 
+        for start, end, canonical, entity_type in hits:
+            key = canonical.upper()
+            # Repeated mentions only add their span
+            if key in seen:
+                mentions[seen[key]].append((start, end))
+                continue
+            seen[key] = len(names)
+
+            related = None
             # If it's a TARGET, see if we have related drugs
             if entity_type == "TARGET":
-                # upper_tok might be e.g. 'BCL-2'
-                related = KNOWN_TARGET_DRUGS.get(upper_tok, [])
+                # key might be e.g. 'BCL-2'
+                related = list(snapshot.target_drugs.get(key, ()))
                 if not related:
                     # Optionally fetch from DGIdb
-                    related = self.fetch_drugs_from_dgidb(upper_tok)
-                if related:
-                    entity["related_drugs"] = related
+                    related = self.fetch_drugs_from_dgidb(key)
 
-            merged.append(entity)
-            seen.add(upper_tok)
+            texts.append(text[start:end])
+            names.append(canonical)
+            types.append(entity_type)
+            starts.append(start)
+            ends.append(end)
+            related_drugs.append(related or None)
+            mentions.append([(start, end)])
 
-        logger.info(f"Returning {len(merged)} processed entities (static pipeline)")
-        return merged
+        # Synthetic confidence
+        confidence = [0.99] * len(names)  # or 1.0, or anything
+        columns = EntityColumns(texts, names, types, starts, ends, confidence, related_drugs, mentions)
+        observe_stage("matching", time.perf_counter() - start_time)
+        SEGMENTS.inc(len(spans))
+        ENTITIES.inc(len(columns))
+        debug_sampled(logger, lambda: f"[NLP] {len(columns)} entities in {len(spans)} segments ({len(text)} chars)")
+        return columns
 
     def organize_entities_by_type(self, entities: List[Dict]) -> Dict[str, List[Dict]]:
         """
@@ -217,42 +257,72 @@ class NlpService:
         """
         Average my, mn, and hesitancy across all entities.
         """
-        total_my = sum(e['my'] for e in entities)
-        total_mn = sum(e['mn'] for e in entities)
-        total_h = sum(e['hesitancy'] for e in entities)
-        n = len(entities)
-        return (
-            total_my / n if n else 0,
-            total_mn / n if n else 0,
-            total_h / n if n else 0
-        )
+        return pfs.aggregate_entities(entities)
 
     def generate_guidelines(self, target_name: str, entity_type: str) -> str:
         """
         Generate guidelines using a T5 model (unchanged from your original code).
         """
-        prompt = f"Generate clinical guidelines for {entity_type} {target_name}:"
-        inputs = self.t5_tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True)
-        outputs = self.t5_model.generate(
-            inputs.input_ids,
-            max_length=150,
-            num_beams=4,
-            length_penalty=2.0,
-            early_stopping=True
-        )
-        return self.t5_tokenizer.decode(outputs[0], skip_special_tokens=True)
+        return self.generate_guidelines_batch([(target_name, entity_type)])[0]
+
+    def generate_guidelines_batch(self, requests: List[Tuple[str, str]]) -> List[str]:
+        """
+        Generate guidelines for several (target_name, entity_type) pairs with a
+        single padded `generate` call.
+        """
+        return self.generate_guidelines_with_model(requests)[1]
+
+    def generate_guidelines_with_model(self, requests: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        """generate_guidelines_batch, plus the checkpoint that actually produced the texts."""
+        registry = get_model_registry()
+        # May route to the fallback checkpoint when the primary is over its latency budget
+        model_name = registry.select_t5(self.t5_model_name)
+        tokenizer, model = registry.get_t5(model_name)
+        prompts = [
+            f"Generate clinical guidelines for {entity_type} {target_name}:"
+            for target_name, entity_type in requests
+        ]
+        start = time.perf_counter()
+        with registry.inference_context():
+            inputs = tokenizer(prompts, return_tensors="pt", max_length=512, truncation=True, padding=True)
+            outputs = model.generate(
+                inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                **GUIDELINE_GENERATION_PARAMS
+            )
+        elapsed = time.perf_counter() - start
+        observe_stage("t5_generate", elapsed)
+        registry.record_latency(model_name, elapsed / len(requests))
+        return model_name, tokenizer.batch_decode(outputs, skip_special_tokens=True)
 
     def calculate_metrics(self, true_labels: List[str], pred_labels: List[str]) -> Dict[str, float]:
         """
         Calculate precision, recall, and F1 score for a set of labels.
         (Kept from your original code for completeness.)
         """
+        # Deferred: scikit-learn takes about a second to import and is only needed here
+        from sklearn.metrics import precision_recall_fscore_support
+
         precision, recall, f1, _ = precision_recall_fscore_support(
             true_labels, pred_labels, average='weighted', zero_division=0
         )
         return {'precision': precision, 'recall': recall, 'f1': f1}
 
 
+_nlp_service = None
+_nlp_service_lock = threading.Lock()
+
+
+def get_nlp_service() -> NlpService:
+    """The NlpService shared by every router in this process."""
+    global _nlp_service
+    if _nlp_service is None:
+        with _nlp_service_lock:
+            if _nlp_service is None:
+                _nlp_service = NlpService()
+    return _nlp_service
+
+
 # -------------------------
 # Example usage (if you want to try locally):
 # -------------------------
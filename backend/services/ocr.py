@@ -0,0 +1,138 @@
+"""
+Optional OCR fallback for scanned PDFs (OCR_ENABLED=1).
+
+Pages are routed one at a time. A page is OCR'd only if its text layer has
+fewer than OCR_MIN_CHARS characters and the page contains an image; every
+other page keeps its embedded text. The page pool hashes the rendered image
+of each candidate page. Recognised text is stored in `ocr_cache` under that
+hash, so re-uploads and repeated pages (cover sheets, scanned boilerplate)
+skip Tesseract.
+
+Recognition runs local Tesseract through PyMuPDF's get_textpage_ocr. It has
+its own pool of OCR_WORKERS processes, so ordinary text extraction never
+queues behind a scan. Tesseract and its language data must be installed,
+with TESSDATA_PREFIX set (see the Dockerfile). If OCR fails, the page keeps
+its text layer and a warning is logged.
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from models import OcrCacheEntry, SessionLocal
+from services.metrics import CACHE_LOOKUPS, observe_stage
+from services.persistence import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "0") == "1"
+# Pages with less embedded text than this (after stripping whitespace) are OCR candidates
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", "50"))
+# Tesseract language(s), e.g. "eng" or "eng+deu"
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+# Resolution pages are rendered at for recognition
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+# Processes running Tesseract; at most this many pages are OCR'd at once in this worker
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "1"))
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_fallback = None
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(cancel_futures=True)
+        _ocr_pool = None
+
+
+def _recognise_page(path: str, page_no: int, language: str, dpi: int) -> Tuple[str, float]:
+    """Runs in the OCR pool; returns the page's text and the time taken."""
+    import fitz  # PyMuPDF
+
+    start = time.perf_counter()
+    with fitz.open(path) as doc:
+        page = doc[page_no]
+        textpage = page.get_textpage_ocr(flags=fitz.TEXTFLAGS_TEXT, language=language, dpi=dpi, full=True)
+        text = page.get_text(textpage=textpage)
+    return text, time.perf_counter() - start
+
+
+class OcrFallback:
+    """OCR for pages without a usable text layer, cached by page image hash."""
+
+    def __init__(self, session_factory, min_chars: int = OCR_MIN_CHARS, language: str = OCR_LANGUAGE,
+                 dpi: int = OCR_DPI):
+        self.session_factory = session_factory
+        self.min_chars = min_chars
+        self.language = language
+        self.dpi = dpi
+
+    def make_key(self, image_hash: str) -> str:
+        raw = json.dumps([image_hash, self.language, self.dpi])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def cached_text(self, key: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            row = db.get(OcrCacheEntry, key)
+        finally:
+            db.close()
+        CACHE_LOOKUPS.inc(cache="ocr", result="miss" if row is None else "hit")
+        return None if row is None else row.text
+
+    def store_text(self, key: str, text: str) -> None:
+        db = self.session_factory()
+        try:
+            # Another worker may have recognised the same page meanwhile
+            db.execute(dialect_insert(db)(OcrCacheEntry).values(
+                key=key, text=text, created_at=datetime.datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=[OcrCacheEntry.key]))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"[OCR] Could not cache recognised text: {e}")
+        finally:
+            db.close()
+
+    async def recognise(self, path: str, page_no: int, image_hash: str) -> Optional[str]:
+        """Text of the page (0-based `page_no`) from the cache or Tesseract; None if OCR failed."""
+        loop = asyncio.get_running_loop()
+        key = self.make_key(image_hash)
+        text = await loop.run_in_executor(None, self.cached_text, key)
+        if text is not None:
+            return text
+        try:
+            text, seconds = await loop.run_in_executor(
+                get_ocr_pool(), _recognise_page, path, page_no, self.language, self.dpi
+            )
+        except Exception as e:
+            logger.warning(f"[OCR] Page {page_no + 1} could not be recognised, keeping its text layer: {e}")
+            return None
+        observe_stage("ocr", seconds)
+        # Not awaited: on SQLite the write waits for the upload's own open transaction
+        loop.run_in_executor(None, self.store_text, key, text)
+        return text
+
+
+def get_ocr_fallback() -> Optional[OcrFallback]:
+    """The process-wide OCR fallback, or None when OCR is disabled."""
+    global _ocr_fallback
+    if OCR_ENABLED and _ocr_fallback is None:
+        _ocr_fallback = OcrFallback(SessionLocal)
+    return _ocr_fallback
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from services.metrics import PAGES, debug_sampled, observe_stage, stage_timer
+from services.segmentation import sentence_spans
+
+logger = logging.getLogger(__name__)
+
+# Worker processes used for page text extraction
+PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maximum number of pages extracted ahead of the consumer; bounds peak memory
+PDF_PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", "8"))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+
+
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit while spooling."""
+
+
+def get_page_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all uploads in this worker, created on first use."""
+    global _page_pool
+    if _page_pool is None:
+        # spawn: never fork a process that already holds model weights and threads
+        _page_pool = ProcessPoolExecutor(
+            max_workers=PDF_PAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _page_pool
+
+
+def shutdown_page_pool() -> None:
+    global _page_pool
+    if _page_pool is not None:
+        _page_pool.shutdown(cancel_futures=True)
+        _page_pool = None
+
+
+# Each pool process keeps a few recently used documents open, so a run of
+# pages from the same file does not re-parse the PDF for every page and
+# concurrent uploads do not keep evicting each other. Entries remember the
+# file's identity: temp paths are reused once an upload's file is removed,
+# so an entry whose file is gone or replaced is closed on the next access.
+# The process that reads a document's last page closes it straight away.
+OPEN_DOCUMENT_LIMIT = 4
+_open_docs: "OrderedDict[str, Tuple[tuple, object]]" = OrderedDict()
+
+
+def _file_identity(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _close_document(path: str) -> None:
+    entry = _open_docs.pop(path, None)
+    if entry is not None:
+        entry[1].close()
+
+
+def _get_document(path: str):
+    # PyMuPDF is only imported in the pool processes that open PDFs
+    import fitz
+
+    for open_path, (identity, _) in list(_open_docs.items()):
+        if _file_identity(open_path) != identity:
+            _close_document(open_path)
+    entry = _open_docs.get(path)
+    if entry is not None:
+        _open_docs.move_to_end(path)
+        return entry[1]
+    identity = _file_identity(path)
+    doc = fitz.open(path)
+    _open_docs[path] = (identity, doc)
+    while len(_open_docs) > OPEN_DOCUMENT_LIMIT:
+        _, (_, oldest) = _open_docs.popitem(last=False)
+        oldest.close()
+    return doc
+
+
+# Both run in the pool and return their own duration, since the pool's metrics are never scraped
+
+def _count_pages(path: str) -> Tuple[int, float]:
+    start = time.perf_counter()
+    return len(_get_document(path)), time.perf_counter() - start
+
+
+def _extract_page_text(path: str, page_no: int, ocr_min_chars: int = 0) -> Tuple[str, Optional[str], float]:
+    """
+    The page's embedded text. For a page with less than `ocr_min_chars`
+    characters of text that contains an image (an OCR candidate), also the
+    SHA-256 of the rendered page; otherwise None.
+    """
+    start = time.perf_counter()
+    doc = _get_document(path)
+    page = doc[page_no]
+    text = page.get_text()
+    image_hash = None
+    if len(text.strip()) < ocr_min_chars and page.get_images():
+        image_hash = hashlib.sha256(page.get_pixmap().samples).hexdigest()
+    if page_no == len(doc) - 1:
+        _close_document(path)
+    return text, image_hash, time.perf_counter() - start
+
+
+async def spool_upload(
+    file,
+    max_size: int,
+    directory: Optional[str] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Tuple[str, int, str]:
+    """
+    Stream an UploadFile to a temporary file in fixed-size chunks, hashing it
+    on the way. Returns (path, size, sha256 hexdigest); the caller owns the
+    file and must remove it.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(f"File size exceeds {max_size // (1024 * 1024)}MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, size, digest.hexdigest()
+
+
+def file_sha256(path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def iter_page_texts(path: str, window: int = PDF_PAGE_WINDOW,
+                          ocr=None) -> AsyncIterator[Tuple[int, int, str]]:
+    """
+    Yield (page_index, page_count, text) in page order while at most `window`
+    pages are being extracted in the process pool. With an `ocr` fallback
+    (services.ocr.OcrFallback), pages without a usable text layer are
+    recognised instead, concurrently with the extraction of later pages.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_page_pool()
+    page_count, seconds = await loop.run_in_executor(pool, _count_pages, path)
+    observe_stage("pdf_open", seconds)
+    ocr_min_chars = ocr.min_chars if ocr is not None else 0
+
+    async def read_page(page_no: int) -> str:
+        text, image_hash, seconds = await loop.run_in_executor(
+            pool, _extract_page_text, path, page_no, ocr_min_chars
+        )
+        observe_stage("page_text", seconds)
+        if image_hash is not None:
+            recognised = await ocr.recognise(path, page_no, image_hash)
+            if recognised is not None:
+                text = recognised
+        return text
+
+    pending = deque()
+    next_page = 0
+    try:
+        while next_page < page_count or pending:
+            while next_page < page_count and len(pending) < window:
+                pending.append(asyncio.ensure_future(read_page(next_page)))
+                next_page += 1
+            page_no = next_page - len(pending)
+            text = await pending.popleft()
+            yield page_no, page_count, text
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def process_pdf(path: str, nlp_service, snapshot=None, ocr=None) -> AsyncIterator[Dict]:
+    """
+    Pipelined ingestion: pages are extracted in the process pool and each page
+    goes to entity extraction (off the event loop) as soon as it arrives. The
+    page is scanned sentence by sentence in place; entity spans are character
+    offsets into the page text (`text`), as are the sentence offsets in `spans`.
+    Yields one result dict per page, with each distinct entity on the page
+    tagged with its page number. `snapshot` pins the lexicon version used
+    for every page; `ocr` is passed on to iter_page_texts.
+    """
+    loop = asyncio.get_running_loop()
+    async for page_no, page_count, text in iter_page_texts(path, ocr=ocr):
+        debug_sampled(
+            logger, lambda: f"[PDF] Extracted text from page {page_no + 1}/{page_count}: {text[:200]!r}..."
+        )
+        with stage_timer("segmentation"):
+            spans = sentence_spans(text)
+        entities = await loop.run_in_executor(None, nlp_service.extract_entities, text, spans, snapshot)
+        for entity in entities:
+            entity["page"] = page_no + 1
+        PAGES.inc()
+        yield {
+            "page": page_no + 1,
+            "page_count": page_count,
+            "chars": len(text.strip()),
+            "segment_count": len(spans),
+            "text": text,
+            "spans": spans,
+            "entities": entities,
+        }
@@ -0,0 +1,207 @@
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from models import EntityOccurrence, MolecularTarget, Therapy
+from services.metrics import debug_sampled, observe_stage
+
+logger = logging.getLogger(__name__)
+
+# Distinct entities buffered before an upsert batch is issued
+ENTITY_BATCH_SIZE = int(os.getenv("ENTITY_BATCH_SIZE", "500"))
+
+TARGET_TYPES = ('TARGET', 'DISEASE', 'ANATOMICAL')
+THERAPY_TYPES = ('DRUG',)
+
+# entity_kind value in entity_occurrences -> catalogue model
+ENTITY_KINDS = {
+    "target": MolecularTarget,
+    "therapy": Therapy,
+}
+
+
+def dialect_insert(db: Session):
+    """The dialect-specific insert() construct that supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert
+
+
+def remove_document(db: Session, document_key: str) -> int:
+    """
+    Withdraw a document's contribution to the catalogue (mention and document
+    counts) and delete its occurrence rows, so it can be re-ingested without
+    double counting. Returns the number of occurrences removed.
+    """
+    table = EntityOccurrence.__table__
+    removed = 0
+    for kind, model in ENTITY_KINDS.items():
+        rows = db.execute(
+            select(table.c.entity_id, table.c.mentions)
+            .where(table.c.entity_kind == kind, table.c.document_key == document_key)
+            .order_by(table.c.entity_id)
+        ).all()
+        if not rows:
+            continue
+        catalogue = model.__table__
+        db.execute(
+            update(catalogue)
+            .where(catalogue.c.id == bindparam('b_entity_id'))
+            .values(
+                mention_count=catalogue.c.mention_count - bindparam('b_mentions'),
+                document_count=catalogue.c.document_count - 1,
+            ),
+            [{'b_entity_id': entity_id, 'b_mentions': mentions} for entity_id, mentions in rows]
+        )
+        db.execute(delete(table).where(table.c.entity_kind == kind, table.c.document_key == document_key))
+        removed += len(rows)
+    return removed
+
+
+class EntityWriter:
+    """
+    Maintains the deduplicated entity catalogue for one document.
+
+    Mentions are aggregated per canonical name in memory and written in
+    batches with INSERT ... ON CONFLICT: the catalogue row's mention_count is
+    incremented, a (entity, document) occurrence row is created or bumped, and
+    document_count is incremented only when the occurrence is new. Call flush()
+    before committing.
+    """
+
+    def __init__(self, db: Session, document_key: str, batch_size: int = ENTITY_BATCH_SIZE):
+        self.db = db
+        self.document_key = document_key
+        self.batch_size = batch_size
+        self._insert = dialect_insert(db)
+        # (entity_kind, name) -> catalogue row with a pending mention count
+        self._pending: Dict[Tuple[str, str], Dict] = {}
+        self.rows_written = 0
+        self.seconds = 0.0
+
+    def add(self, entities: List[Dict]) -> None:
+        for entity in entities:
+            debug_sampled(logger, lambda: f"[NLP] Entity: {json.dumps(entity)}")
+            if entity['entity_type'] in TARGET_TYPES:
+                kind = "target"
+            elif entity['entity_type'] in THERAPY_TYPES:
+                kind = "therapy"
+            else:
+                continue
+
+            name = entity.get('name', entity['text'])
+            row = self._pending.get((kind, name))
+            if row is None:
+                row = {'name': name, 'mention_count': 0}
+                if kind == "therapy":
+                    row['entity_type'] = entity['entity_type']
+                self._pending[(kind, name)] = row
+            row.update(
+                my=entity['my'],
+                mn=entity['mn'],
+                hesitancy=entity['hesitancy'],
+                confidence=entity['confidence']
+            )
+            row['mention_count'] += len(entity.get('mentions', ())) or 1
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        start = time.perf_counter()
+        now = datetime.datetime.utcnow()
+        for kind, model in ENTITY_KINDS.items():
+            # Sorted so concurrent writers lock catalogue rows in the same order
+            rows = [row for (k, _), row in sorted(self._pending.items()) if k == kind]
+            if rows:
+                self._upsert(kind, model, rows, now)
+        elapsed = time.perf_counter() - start
+        observe_stage("db_upsert", elapsed)
+        self.seconds += elapsed
+        self.rows_written += len(self._pending)
+        self._pending = {}
+
+    def _upsert(self, kind: str, model, rows: List[Dict], now: datetime.datetime) -> None:
+        insert = self._insert
+        mentions_by_name = {row['name']: row['mention_count'] for row in rows}
+
+        stmt = insert(model).values([{**row, 'timestamp': now} for row in rows])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.name],
+            set_={
+                'mention_count': model.mention_count + stmt.excluded.mention_count,
+                'my': stmt.excluded.my,
+                'mn': stmt.excluded.mn,
+                'hesitancy': stmt.excluded.hesitancy,
+                'confidence': stmt.excluded.confidence,
+                'timestamp': stmt.excluded.timestamp,
+            }
+        ).returning(model.id, model.name)
+        mentions_by_id = {
+            entity_id: mentions_by_name[name]
+            for entity_id, name in self.db.execute(stmt).all()
+        }
+
+        # New (entity, document) pairs come back from RETURNING; the rest
+        # already existed and only need their mention count bumped
+        occurrences = insert(EntityOccurrence).values([
+            {
+                'entity_kind': kind,
+                'entity_id': entity_id,
+                'document_key': self.document_key,
+                'mentions': mentions,
+                'timestamp': now,
+            }
+            for entity_id, mentions in sorted(mentions_by_id.items())
+        ]).on_conflict_do_nothing(
+            index_elements=['entity_kind', 'entity_id', 'document_key']
+        ).returning(EntityOccurrence.entity_id)
+        new_ids = set(self.db.execute(occurrences).scalars().all())
+
+        existing = [
+            {'b_entity_id': entity_id, 'b_mentions': mentions}
+            for entity_id, mentions in mentions_by_id.items()
+            if entity_id not in new_ids
+        ]
+        if existing:
+            table = EntityOccurrence.__table__
+            self.db.execute(
+                update(table)
+                .where(and_(
+                    table.c.entity_kind == kind,
+                    table.c.entity_id == bindparam('b_entity_id'),
+                    table.c.document_key == self.document_key,
+                ))
+                .values(mentions=table.c.mentions + bindparam('b_mentions')),
+                existing
+            )
+        if new_ids:
+            self.db.execute(
+                update(model)
+                .where(model.id.in_(new_ids))
+                .values(document_count=model.document_count + 1),
+                execution_options={"synchronize_session": False}
+            )
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_written / self.seconds if self.seconds else 0.0
+
+    def log_stats(self) -> None:
+        logger.info(
+            f"[DB] Upserted {self.rows_written} catalogue rows in {self.seconds:.3f}s "
+            f"({self.rows_per_second:.0f} rows/sec)"
+        )
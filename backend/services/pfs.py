@@ -0,0 +1,189 @@
+"""
+Picture fuzzy scores (PFS) over whole batches of entities.
+
+A confidence in 0..1 maps to a linguistic term and from there to a
+membership / non-membership pair (my, mn); hesitancy is
+sqrt(|1 - my^2 - mn^2|). Everything here works on NumPy arrays so a
+document's entities are scored and summarised in a few array passes
+instead of per-entity Python calls.
+"""
+import bisect
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LINGUISTIC_TERMS = {
+    'very_high': (0.9, 0.1),
+    'high': (0.7, 0.3),
+    'medium': (0.5, 0.5),
+    'low': (0.3, 0.7),
+    'very_low': (0.1, 0.9)
+}
+
+# Lower confidence bound of each term above 'very_low' (a bound belongs to the term it opens)
+TERM_THRESHOLDS = np.array([0.3, 0.5, 0.7, 0.9])
+_TERM_ORDER = ['very_low', 'low', 'medium', 'high', 'very_high']
+_TERM_MY = np.array([LINGUISTIC_TERMS[t][0] for t in _TERM_ORDER])
+_TERM_MN = np.array([LINGUISTIC_TERMS[t][1] for t in _TERM_ORDER])
+_TERM_H = np.sqrt(np.abs(1 - _TERM_MY ** 2 - _TERM_MN ** 2))
+_THRESHOLD_LIST = TERM_THRESHOLDS.tolist()
+
+PFS_KEYS = ('my', 'mn', 'hesitancy')
+
+
+def term_index(confidence) -> np.ndarray:
+    """
+    Index into the term table for each confidence. NaN maps to 'very_low',
+    as in the original if/elif chain (every comparison with NaN is false);
+    searchsorted alone would sort it past the last threshold.
+    """
+    confidence = np.asarray(confidence, dtype=float)
+    return np.where(np.isnan(confidence), 0, np.searchsorted(TERM_THRESHOLDS, confidence, side='right'))
+
+
+def compute_pfs(confidence) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Map a confidence array to (my, mn, hesitancy) arrays."""
+    idx = term_index(confidence)
+    return _TERM_MY[idx], _TERM_MN[idx], _TERM_H[idx]
+
+
+def compute_pfs_scalar(confidence: float) -> Tuple[float, float, float]:
+    """Single-value variant of compute_pfs without the array round trip."""
+    idx = 0 if math.isnan(confidence) else bisect.bisect_right(_THRESHOLD_LIST, confidence)
+    return float(_TERM_MY[idx]), float(_TERM_MN[idx]), float(_TERM_H[idx])
+
+
+def aggregate(my, mn, hesitancy, weights=None) -> Tuple[float, float, float]:
+    """
+    (Weighted) means of the three PFS components in one pass over a stacked
+    3 x n array. Empty input (or zero total weight) gives zeros.
+    """
+    values = np.vstack((my, mn, hesitancy)).astype(float, copy=False)
+    if values.shape[1] == 0:
+        return 0, 0, 0
+    if weights is None:
+        means = values.mean(axis=1)
+    else:
+        weights = np.asarray(weights, dtype=float)
+        total = weights.sum()
+        if total == 0:
+            return 0, 0, 0
+        means = values @ weights / total
+    return tuple(means.tolist())
+
+
+def aggregate_by_type(entity_types: Sequence[str], my, mn, hesitancy) -> Dict[str, Dict[str, float]]:
+    """Per-type count and PFS means, via one np.unique and three bincounts."""
+    if len(entity_types) == 0:
+        return {}
+    types, codes = np.unique(np.asarray(entity_types), return_inverse=True)
+    counts = np.bincount(codes)
+    sums = [np.bincount(codes, weights=column) for column in (my, mn, hesitancy)]
+    return {
+        entity_type: {
+            "count": int(counts[i]),
+            **{key: float(s[i] / counts[i]) for key, s in zip(PFS_KEYS, sums)}
+        }
+        for i, entity_type in enumerate(types.tolist())
+    }
+
+
+def pfs_arrays(entities: Iterable[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pull (my, mn, hesitancy) arrays out of a list of entity dicts."""
+    entities = entities if isinstance(entities, list) else list(entities)
+    values = np.fromiter(
+        (v for e in entities for v in (e['my'], e['mn'], e['hesitancy'])),
+        dtype=float, count=3 * len(entities)
+    ).reshape(-1, 3)
+    return values[:, 0], values[:, 1], values[:, 2]
+
+
+def aggregate_entities(entities: List[Dict]) -> Tuple[float, float, float]:
+    """Average my, mn and hesitancy over entity dicts."""
+    return aggregate(*pfs_arrays(entities))
+
+
+class EntityColumns:
+    """
+    Extraction result stored as parallel arrays, one slot per entity.
+
+    Numeric fields are NumPy arrays; names, types and related drugs stay in
+    lists, and `mentions` holds every [start, end) span of each entity (the
+    `start`/`end` columns are its first mention). For large documents this is
+    far smaller than a list of dicts and the PFS summaries read the arrays
+    directly. `to_records()` gives the usual list-of-dicts form and
+    `to_dict()` a JSON-ready column layout.
+    """
+
+    NUMERIC = ('start', 'end', 'confidence', 'my', 'mn', 'hesitancy')
+
+    def __init__(self, text: List[str], name: List[str], entity_type: List[str],
+                 start, end, confidence, related_drugs: Optional[List[Optional[List[str]]]] = None,
+                 mentions: Optional[List[List[Tuple[int, int]]]] = None):
+        self.text = text
+        self.name = name
+        self.entity_type = entity_type
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.confidence = np.asarray(confidence, dtype=float)
+        self.my, self.mn, self.hesitancy = compute_pfs(self.confidence)
+        self.related_drugs = related_drugs if related_drugs is not None else [None] * len(name)
+        self.mentions = mentions if mentions is not None else [[(s, e)] for s, e in zip(start, end)]
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    @classmethod
+    def from_records(cls, entities: List[Dict]) -> "EntityColumns":
+        return cls(
+            text=[e['text'] for e in entities],
+            name=[e['name'] for e in entities],
+            entity_type=[e['entity_type'] for e in entities],
+            start=[e.get('start', -1) for e in entities],
+            end=[e.get('end', -1) for e in entities],
+            confidence=[e['confidence'] for e in entities],
+            related_drugs=[e.get('related_drugs') for e in entities],
+            mentions=[e.get('mentions', [(e.get('start', -1), e.get('end', -1))]) for e in entities],
+        )
+
+    def aggregate(self, weights=None) -> Tuple[float, float, float]:
+        return aggregate(self.my, self.mn, self.hesitancy, weights)
+
+    def by_type(self) -> Dict[str, Dict[str, float]]:
+        return aggregate_by_type(self.entity_type, self.my, self.mn, self.hesitancy)
+
+    def to_records(self) -> List[Dict]:
+        numeric = [getattr(self, column).tolist() for column in self.NUMERIC]
+        records = []
+        for i, (text, name, entity_type, related, mentions) in enumerate(
+            zip(self.text, self.name, self.entity_type, self.related_drugs, self.mentions)
+        ):
+            record = {
+                'text': text,
+                'name': name,
+                'entity_type': entity_type,
+                'confidence': numeric[2][i],
+                'my': numeric[3][i],
+                'mn': numeric[4][i],
+                'hesitancy': numeric[5][i],
+                'start': numeric[0][i],
+                'end': numeric[1][i],
+                'mentions': [list(span) for span in mentions]
+            }
+            if related:
+                record['related_drugs'] = related
+            records.append(record)
+        return records
+
+    def to_dict(self) -> Dict[str, List]:
+        columns = {
+            'text': self.text,
+            'name': self.name,
+            'entity_type': self.entity_type,
+            'related_drugs': self.related_drugs,
+            'mentions': [[list(span) for span in spans] for spans in self.mentions],
+        }
+        for column in self.NUMERIC:
+            columns[column] = getattr(self, column).tolist()
+        return columns
@@ -0,0 +1,199 @@
+"""
+Full-text search over the pages of ingested documents.
+
+Ingestion stores each page's text in `document_pages` and its entities, with
+their mention spans, in `page_entities`. On Postgres, pages are matched with
+websearch_to_tsquery against a GIN expression index on
+to_tsvector('english', text). That index is created by the migration, so
+quoted phrases, OR and -exclusions all work. Matches are ranked with
+ts_rank_cd and snippets come from ts_headline, computed only for the
+returned page of results.
+
+Other databases (SQLite in development) fall back to case-insensitive LIKE
+matching of the same terms. There, OR is ignored, results are unranked and
+snippets are cut in Python.
+
+Results can be narrowed to pages mentioning an entity or entity type. The
+facets count the matching pages per entity type and per entity.
+"""
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, literal_column, not_, select
+from sqlalchemy.orm import Session
+
+from models import Document, DocumentPage, PageEntity
+from services.persistence import dialect_insert
+
+# Text search configuration; must match the index expression in the migration
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+# Entities listed in the facets of a search
+SEARCH_FACET_LIMIT = int(os.getenv("SEARCH_FACET_LIMIT", "20"))
+# Characters of context on each side of the first match in fallback snippets
+SNIPPET_CONTEXT = 80
+
+# "quoted phrase", -excluded, or a bare word
+QUERY_TERM = re.compile(r'(-?)"([^"]+)"|(-?)(\S+)')
+
+
+def store_page(db: Session, document_key: str, page: int, text: str, entities: List[Dict]) -> None:
+    """
+    Save a page's text and entities for search (caller commits). Rows already
+    written by a concurrent upload of the same file are kept, not duplicated.
+    """
+    pages = DocumentPage.__table__
+    insert = dialect_insert(db)
+    # Postgres text cannot hold NUL; a space keeps the entity offsets valid
+    page_row = insert(pages).values(document_key=document_key, page=page, text=text.replace("\x00", " "))
+    page_id = db.execute(
+        # DO UPDATE rather than DO NOTHING, so that RETURNING also yields an existing row's id
+        page_row.on_conflict_do_update(
+            index_elements=[pages.c.document_key, pages.c.page], set_={"text": page_row.excluded.text}
+        ).returning(pages.c.id)
+    ).scalar_one()
+    if entities:
+        page_entities = PageEntity.__table__
+        db.execute(insert(page_entities).on_conflict_do_nothing(
+            index_elements=[page_entities.c.page_id, page_entities.c.name_key, page_entities.c.entity_type]
+        ), [
+            {
+                "page_id": page_id,
+                "document_key": document_key,
+                "name": entity["name"],
+                "name_key": entity["name"].lower(),
+                "entity_type": entity["entity_type"],
+                "mentions": [list(span) for span in entity["mentions"]],
+            }
+            for entity in entities
+        ])
+
+
+def remove_document_pages(db: Session, document_key: str) -> int:
+    """Delete a document's stored pages and page entities; returns the number of pages removed."""
+    db.execute(delete(PageEntity.__table__).where(PageEntity.document_key == document_key))
+    return db.execute(delete(DocumentPage.__table__).where(DocumentPage.document_key == document_key)).rowcount
+
+
+def parse_terms(query: str) -> Tuple[List[str], List[str]]:
+    """(required, excluded) phrases and words of a web-search style query, for the LIKE fallback."""
+    required, excluded = [], []
+    for match in QUERY_TERM.finditer(query):
+        negated = match.group(1) or match.group(3)
+        term = match.group(2) or match.group(4)
+        if not term or term.lower() == "or":
+            continue
+        (excluded if negated else required).append(term)
+    return required, excluded
+
+
+def fallback_snippet(text: str, terms: List[str]) -> str:
+    """Context around the first match, with every term occurrence marked."""
+    lowered = text.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    first = min((p for p in positions if p >= 0), default=0)
+    start = max(0, first - SNIPPET_CONTEXT)
+    end = min(len(text), first + SNIPPET_CONTEXT)
+    snippet = " ".join(text[start:end].split())
+    if terms:
+        pattern = re.compile("|".join(re.escape(" ".join(term.split())) for term in terms), re.IGNORECASE)
+        snippet = pattern.sub(lambda m: f"<mark>{m.group()}</mark>", snippet)
+    return ("… " if start else "") + snippet + (" …" if end < len(text) else "")
+
+
+def search_pages(db: Session, query: str, entity_type: Optional[str] = None, entity: Optional[str] = None,
+                 limit: int = 20, offset: int = 0) -> Dict:
+    """One page of search results, the total number of matching pages and entity facets."""
+    pages = DocumentPage.__table__
+    page_entities = PageEntity.__table__
+    postgres = db.get_bind().dialect.name == "postgresql"
+
+    if postgres:
+        config = literal_column(f"'{SEARCH_CONFIG}'")
+        tsquery = func.websearch_to_tsquery(config, query)
+        vector = func.to_tsvector(config, pages.c.text)
+        conditions = [vector.op("@@")(tsquery)]
+        rank = func.ts_rank_cd(vector, tsquery)
+    else:
+        required, excluded = parse_terms(query)
+        conditions = [func.lower(pages.c.text).contains(term.lower(), autoescape=True) for term in required]
+        conditions += [not_(func.lower(pages.c.text).contains(term.lower(), autoescape=True)) for term in excluded]
+        rank = literal_column("0.0")
+    if entity_type:
+        conditions.append(pages.c.id.in_(
+            select(page_entities.c.page_id).where(page_entities.c.entity_type == entity_type.upper())
+        ))
+    if entity:
+        conditions.append(pages.c.id.in_(
+            select(page_entities.c.page_id).where(page_entities.c.name_key == entity.lower())
+        ))
+
+    matched = select(pages.c.id).where(*conditions)
+    total = db.scalar(select(func.count()).select_from(matched.subquery()))
+
+    top = (
+        select(pages.c.id, rank.label("rank"))
+        .where(*conditions)
+        .order_by(rank.desc(), pages.c.id)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    snippet = func.ts_headline(config, pages.c.text, tsquery, HEADLINE_OPTIONS) if postgres else pages.c.text
+    rows = db.execute(
+        select(pages.c.id, pages.c.document_key, pages.c.page, top.c.rank, snippet.label("snippet"),
+               Document.filename)
+        .select_from(top.join(pages, pages.c.id == top.c.id))
+        .outerjoin(Document, Document.sha256 == pages.c.document_key)
+        .order_by(top.c.rank.desc(), pages.c.id)
+    ).all()
+
+    entities_by_page: Dict[int, List[Dict]] = {row.id: [] for row in rows}
+    if rows:
+        for page_id, name, kind, mentions in db.execute(
+            select(page_entities.c.page_id, page_entities.c.name, page_entities.c.entity_type,
+                   page_entities.c.mentions)
+            .where(page_entities.c.page_id.in_(list(entities_by_page)))
+            .order_by(page_entities.c.page_id, page_entities.c.name)
+        ):
+            entities_by_page[page_id].append({"name": name, "entity_type": kind, "mentions": mentions})
+
+    # Facets over every matching page, not just the returned ones
+    in_matched = page_entities.c.page_id.in_(matched)
+    page_count = func.count(page_entities.c.page_id.distinct()).label("pages")
+    type_facets = db.execute(
+        select(page_entities.c.entity_type, page_count).where(in_matched).group_by(page_entities.c.entity_type)
+    ).all()
+    entity_facets = db.execute(
+        select(page_entities.c.name, page_entities.c.entity_type, page_count)
+        .where(in_matched)
+        .group_by(page_entities.c.name, page_entities.c.entity_type)
+        .order_by(page_count.desc(), page_entities.c.name)
+        .limit(SEARCH_FACET_LIMIT)
+    ).all()
+
+    terms = [] if postgres else parse_terms(query)[0]
+    return {
+        "query": query,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "results": [
+            {
+                "document_key": row.document_key,
+                "filename": row.filename,
+                "page": row.page,
+                "rank": float(row.rank),
+                "snippet": row.snippet if postgres else fallback_snippet(row.snippet, terms),
+                "entities": entities_by_page[row.id],
+            }
+            for row in rows
+        ],
+        "facets": {
+            "entity_type": {kind: count for kind, count in type_facets},
+            "entities": [
+                {"name": name, "entity_type": kind, "pages": count} for name, kind, count in entity_facets
+            ],
+        },
+    }
@@ -0,0 +1,57 @@
+"""
+Sentence segmentation as (start, end) offsets into the page text.
+
+Nothing here slices or re-joins the text: callers scan the original buffer
+between the returned offsets, so every match position is already a
+character span in the page.
+"""
+import re
+from typing import List, Optional, Tuple
+
+# Sentence-final punctuation (plus closing quotes/brackets) followed by
+# whitespace and a plausible sentence start, or a blank line
+SENTENCE_BOUNDARY = re.compile(r"[.!?][\"')\]]*\s+(?=[A-Z0-9(\[\"'])|\n[ \t]*\n\s*")
+
+# Words that end in a period without ending the sentence (compared lower-cased, without the dot)
+ABBREVIATIONS = {
+    "al", "approx", "ca", "cf", "dr", "e.g", "eq", "et", "etc", "fig", "figs",
+    "i.e", "inc", "no", "nos", "ref", "refs", "resp", "suppl", "vol", "vs",
+}
+
+
+def _ends_with_abbreviation(text: str, sentence_start: int, dot: int) -> bool:
+    word_start = max(sentence_start, text.rfind(" ", sentence_start, dot) + 1, text.rfind("\n", sentence_start, dot) + 1)
+    word = text[word_start:dot].lstrip("([\"'")
+    if len(word) == 1 and word.isupper():
+        # An initial, as in "J. Smith"
+        return True
+    return word.lower() in ABBREVIATIONS
+
+
+def sentence_spans(text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split text[start:end] into sentences, returned as (start, end) offsets
+    with surrounding whitespace excluded. Single line breaks (PDF line wraps)
+    do not end a sentence; blank lines do.
+    """
+    if end is None:
+        end = len(text)
+    spans = []
+    sentence_start = start
+    for boundary in SENTENCE_BOUNDARY.finditer(text, start, end):
+        if text[boundary.start()] == "." and _ends_with_abbreviation(text, sentence_start, boundary.start()):
+            continue
+        stop = boundary.start() + len(boundary.group().rstrip()) if text[boundary.start()] != "\n" else boundary.start()
+        _append_trimmed(text, spans, sentence_start, stop)
+        sentence_start = boundary.end()
+    _append_trimmed(text, spans, sentence_start, end)
+    return spans
+
+
+def _append_trimmed(text: str, spans: List[Tuple[int, int]], start: int, end: int) -> None:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        spans.append((start, end))
@@ -0,0 +1,40 @@
+import contextlib
+import logging
+import time
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Wall-clock time of each boot phase, from the first import of main to ready."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.ready_seconds = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark_ready(self) -> None:
+        self.ready_seconds = time.perf_counter() - self.started
+        timings = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases)
+        logger.info(f"[STARTUP] Ready in {self.ready_seconds:.2f}s ({timings})")
+
+    def summary(self) -> Dict:
+        return {
+            "ready_seconds": None if self.ready_seconds is None else round(self.ready_seconds, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases},
+        }
+
+
+startup_report = StartupReport()
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+TEXT = "Imatinib inhibits PDGFRB. BCL-2 was not affected."
+
+
+def ndjson_batch(client, lines):
+    response = client.post(
+        "/api/extract_entities/batch",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_json_batch_streams_one_line_per_document_and_a_summary(client):
+    response = client.post("/api/extract_entities/batch", json={"texts": [TEXT, {"id": "pmid:1", "text": "No entities."}]})
+    assert response.status_code == 200
+    *results, summary = [json.loads(line) for line in response.text.splitlines()]
+
+    by_id = {result["id"]: result for result in results}
+    assert set(by_id) == {0, "pmid:1"}
+    assert {e["name"] for e in by_id[0]["entities"]} == {"Imatinib", "PDGFRB", "BCL-2"}
+    assert by_id["pmid:1"]["entity_count"] == 0
+    assert summary["summary"]["documents"] == 2
+    assert summary["summary"]["entities"] == by_id[0]["entity_count"]
+
+
+def test_ndjson_batch_reads_strings_and_objects(client):
+    *results, summary = ndjson_batch(client, [json.dumps(TEXT), json.dumps({"id": 7, "text": TEXT})])
+    assert sorted(str(result["id"]) for result in results) == ["0", "7"]
+    assert summary["summary"] == {**summary["summary"], "documents": 2, "errors": 0}
+
+
+@pytest.mark.parametrize("bad_line", ["123", "null", "[1, 2]", '{"id": 1}', '{"text": 5}', "{not json"])
+def test_malformed_ndjson_line_keeps_earlier_documents(client, bad_line):
+    lines = ndjson_batch(client, [json.dumps({"id": "first", "text": TEXT}), bad_line, json.dumps("never read")])
+    assert [line.get("id") for line in lines if "entities" in line] == ["first"]
+    assert lines[-2]["error"].startswith("invalid document")
+    assert lines[-1]["summary"]["documents"] == 1
+
+
+def test_json_batch_rejects_non_documents(client):
+    response = client.post("/api/extract_entities/batch", json={"texts": [TEXT, 123]})
+    assert response.status_code == 422
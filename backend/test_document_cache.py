@@ -0,0 +1,66 @@
+import fitz
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Document
+from services.document_cache import EXTRACTION_VERSION, get_cached_result, store_result
+
+SHA = "ab" * 32
+RESULT = {"filename": "paper.pdf", "page_count": 3, "entities": [{"name": "PDGFRB"}]}
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'documents.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_hit_returns_the_stored_response_and_counts_the_upload(db):
+    assert get_cached_result(db, SHA, "lex-1") is None
+    store_result(db, SHA, "paper.pdf", 1024, RESULT, "lex-1")
+    db.commit()
+
+    assert get_cached_result(db, SHA, "lex-1") == {**RESULT, "cached": True}
+    document = db.get(Document, SHA)
+    assert (document.upload_count, document.page_count, document.extraction_version) == (2, 3, EXTRACTION_VERSION)
+
+
+@pytest.mark.parametrize("lexicon_version, extraction_version", [
+    ("lex-2", EXTRACTION_VERSION),
+    ("lex-1", EXTRACTION_VERSION + "-next"),
+])
+def test_results_from_other_versions_are_stale(db, lexicon_version, extraction_version):
+    store_result(db, SHA, "paper.pdf", 1024, RESULT, "lex-1")
+    db.commit()
+    assert get_cached_result(db, SHA, lexicon_version, extraction_version) is None
+    assert db.get(Document, SHA).upload_count == 1
+
+
+def test_reprocessing_replaces_the_stale_result(db):
+    store_result(db, SHA, "paper.pdf", 1024, RESULT, "lex-1", "1")
+    db.commit()
+    fresh = {**RESULT, "entities": []}
+    store_result(db, SHA, "renamed.pdf", 1024, fresh, "lex-1")
+    db.commit()
+
+    assert get_cached_result(db, SHA, "lex-1") == {**fresh, "cached": True}
+    document = db.get(Document, SHA)
+    # The first upload's name is kept; every upload is counted
+    assert (document.filename, document.upload_count) == ("paper.pdf", 3)
+
+
+def test_reupload_is_served_from_the_cache(client):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Celecoxib inhibits COX-2 in cached documents.")
+    pdf = doc.tobytes()
+
+    first = client.post("/api/upload", files={"file": ("cox.pdf", pdf, "application/pdf")})
+    second = client.post("/api/upload", files={"file": ("cox-again.pdf", pdf, "application/pdf")})
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert (first.json()["cached"], second.json()["cached"]) == (False, True)
+    assert second.json()["entities"] == first.json()["entities"]
@@ -0,0 +1,62 @@
+import difflib
+
+import pytest
+
+from services.fuzzy_index import FuzzyIndex, edit_distance, similarity
+from services.lexicon_store import LexiconData, LexiconStore
+from services.nlp_service import NlpService
+
+TARGETS = ["HDAC", "VEGF", "XIAP", "CD44", "BCL-2", "BCL-3", "PDGFRB", "IHH"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return FuzzyIndex(TARGETS, max_distance=1, min_similarity=0.85)
+
+
+def test_exact_match(index):
+    assert index.lookup("PDGFRB") == "PDGFRB"
+    assert index.lookup("hdac") == "HDAC"
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("HDAC1", "HDAC"),
+    ("VEGFA", "VEGF"),
+    ("XIAP1", "XIAP"),
+    ("CD44V", "CD44"),
+    ("PDGFRBB", "PDGFRB"),
+])
+def test_near_misses_that_difflib_matched(index, word, expected):
+    assert index.lookup(word) == expected
+
+
+@pytest.mark.parametrize("word", ["BCL-4", "PDGFRA", "IHX", "HDAC12", "IMATINIB"])
+def test_below_cutoff_or_too_far(index, word):
+    assert index.lookup(word) is None
+
+
+@pytest.mark.parametrize("word", ["HDAC1", "VEGFA", "CD44V", "BCL-4", "PDGFRA", "PDGRFB", "HDA", "IHHH", "XIAP"])
+def test_agrees_with_difflib_cutoff(index, word):
+    expected = difflib.get_close_matches(word, sorted(index._terms), n=1, cutoff=0.85)
+    assert index.lookup(word) == (expected[0] if expected else None)
+
+
+def test_similarity_matches_difflib_ratio():
+    for a, b in [("HDAC1", "HDAC"), ("BCL-2", "BCL-3"), ("PDGFRA", "PDGFRB")]:
+        distance = edit_distance(a, b, 2)
+        assert similarity(a, b, distance) == pytest.approx(difflib.SequenceMatcher(None, a, b).ratio())
+
+
+def test_edit_distance_counts_transpositions_and_gives_up_early():
+    assert edit_distance("PDGRFB", "PDGFRB", 1) == 1
+    assert edit_distance("HDAC", "XIAP", 1) == 2
+
+
+def test_fuzzy_hits_use_the_lexicon_spelling(tmp_path):
+    seed = LexiconData()
+    seed.update(targets={"Her2"}, target_drugs={"Her2": ["Trastuzumab"]})
+    snapshot = LexiconStore(seed, directory=str(tmp_path)).snapshot
+    # Only the matching code is exercised, so skip loading the stores
+    nlp = NlpService.__new__(NlpService)
+    entities = nlp.extract_entities("HER2X and Her2", snapshot=snapshot)
+    assert [(e["name"], e["mentions"]) for e in entities] == [("Her2", [[0, 5], [10, 14]])]
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+from services.guideline_engine import GuidelineCache, GuidelineEngine
+
+PARAMS = {"model": "t5-test"}
+
+
+class FakeService:
+    t5_model_name = "t5-test"
+
+    def __init__(self, model_name="t5-test"):
+        self.model_name = model_name
+        self.batches = []
+
+    def generate_guidelines_with_model(self, requests):
+        self.batches.append(list(requests))
+        return self.model_name, [f"Guidelines for {target} ({entity_type})" for target, entity_type in requests]
+
+
+class SlowCache(GuidelineCache):
+    """Holds every put_many until released, to observe requests arriving meanwhile."""
+
+    def __init__(self, session_factory):
+        super().__init__(session_factory)
+        self.release = threading.Event()
+        self.writes = []
+
+    def put_many(self, entries):
+        self.release.wait(10)
+        self.writes.append([entry[0] for entry in entries])
+        super().put_many(entries)
+
+
+def make_cache(tmp_path, cls=GuidelineCache):
+    engine = create_engine(f"sqlite:///{tmp_path / 'guidelines.db'}")
+    Base.metadata.create_all(engine)
+    return cls(sessionmaker(bind=engine))
+
+
+def test_batch_is_cached_in_one_write_and_repeats_do_not_regenerate(tmp_path):
+    service = FakeService()
+    cache = make_cache(tmp_path, SlowCache)
+
+    async def scenario():
+        engine = GuidelineEngine(service, cache, PARAMS, max_batch=4, wait_ms=50)
+        first = await asyncio.gather(*(engine.generate(t, "TARGET") for t in ("EGFR", "HER2", "EGFR")))
+        # The results are out but their cache write is still blocked: a repeat must not regenerate
+        repeat = await engine.generate("HER2", "TARGET")
+        cache.release.set()
+        await engine.stop()
+        return first, repeat, engine.stats()
+
+    first, repeat, stats = asyncio.run(scenario())
+    assert first == ["Guidelines for EGFR (TARGET)", "Guidelines for HER2 (TARGET)", "Guidelines for EGFR (TARGET)"]
+    assert repeat == "Guidelines for HER2 (TARGET)"
+    assert len(service.batches) == 1
+    assert sorted(service.batches[0]) == [("EGFR", "TARGET"), ("HER2", "TARGET")]
+    assert len(cache.writes) == 1 and len(cache.writes[0]) == 2
+    assert stats["inflight"] == 0
+
+
+def test_cached_guidelines_survive_a_new_engine(tmp_path):
+    service = FakeService()
+    cache = make_cache(tmp_path)
+
+    async def generate_twice():
+        engine = GuidelineEngine(service, cache, PARAMS, wait_ms=1)
+        await engine.generate("VEGF", "TARGET")
+        await engine.stop()
+        fresh = GuidelineCache(cache.session_factory)
+        engine = GuidelineEngine(service, fresh, PARAMS, wait_ms=1)
+        text = await engine.generate("VEGF", "TARGET")
+        await engine.stop()
+        return text, fresh.hits
+
+    text, hits = asyncio.run(generate_twice())
+    assert text == "Guidelines for VEGF (TARGET)"
+    assert hits == 1
+    assert len(service.batches) == 1
+
+
+def test_fallback_model_output_is_not_cached(tmp_path):
+    service = FakeService(model_name="t5-small-fallback")
+    cache = make_cache(tmp_path)
+
+    async def scenario():
+        engine = GuidelineEngine(service, cache, PARAMS, wait_ms=1)
+        await engine.generate("VEGF", "TARGET")
+        await engine.generate("VEGF", "TARGET")
+        await engine.stop()
+
+    asyncio.run(scenario())
+    assert len(service.batches) == 2
+    assert len(cache) == 0
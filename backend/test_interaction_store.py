@@ -0,0 +1,94 @@
+import sqlite3
+import time
+
+import pytest
+
+import services.interaction_store as interaction_store_module
+from services.interaction_store import InteractionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = InteractionStore(path=str(tmp_path / "dgidb.sqlite"), cache_size=2, negative_ttl=60, refresh=False)
+    yield store
+    store.close()
+
+
+def insert_behind_the_cache(store, gene, drug):
+    # Another process (e.g. an import) writing to the same file
+    conn = sqlite3.connect(store.path)
+    conn.execute("INSERT INTO interactions (gene_name, drug_name, source) VALUES (?, ?, 'other')", (gene, drug))
+    conn.commit()
+    conn.close()
+
+
+def test_lookups_are_case_insensitive_and_sorted(store):
+    assert store.add([("egfr", "Gefitinib"), ("EGFR", "Erlotinib"), ("EGFR", "Erlotinib"), ("", "Orphan")]) == 2
+    assert store.drugs_for("Egfr") == ["Erlotinib", "Gefitinib"]
+    assert store.drugs_for("EGFR") == ["Erlotinib", "Gefitinib"]
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_misses_are_remembered_until_the_negative_ttl(store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(interaction_store_module.time, "time", lambda: now[0])
+    assert store.drugs_for("KRAS") == []
+    insert_behind_the_cache(store, "KRAS", "Sotorasib")
+
+    now[0] += 59
+    assert store.drugs_for("KRAS") == []
+    now[0] += 2
+    assert store.drugs_for("KRAS") == ["Sotorasib"]
+    # Hits do not expire
+    now[0] += 3600
+    assert store.drugs_for("KRAS") == ["Sotorasib"]
+    assert (store.hits, store.misses) == (2, 2)
+
+
+def test_add_invalidates_cached_entries(store):
+    assert store.drugs_for("BRAF") == []
+    store.add([("BRAF", "Vemurafenib")])
+    assert store.drugs_for("braf") == ["Vemurafenib"]
+    store.add([("BRAF", "Dabrafenib")])
+    assert store.drugs_for("BRAF") == ["Dabrafenib", "Vemurafenib"]
+
+
+def test_cache_is_bounded(store):
+    for gene in ("A1", "A2", "A3"):
+        store.drugs_for(gene)
+    assert list(store._cache) == ["A2", "A3"]
+
+
+def test_import_tsv_falls_back_to_claim_names(store, tmp_path):
+    tsv = tmp_path / "interactions.tsv"
+    tsv.write_text(
+        "gene_claim_name\tgene_name\tdrug_claim_name\tdrug_name\n"
+        "ALK\tALK\tcrizotinib\tCRIZOTINIB\n"
+        "ALK-1\t\tLORLATINIB\t\n"
+        "ALK\tALK\tcrizotinib\tCRIZOTINIB\n",
+        encoding="utf-8",
+    )
+    assert store.import_tsv(str(tsv), batch_size=2) == 2
+    assert store.drugs_for("ALK") == ["CRIZOTINIB"]
+    assert store.drugs_for("alk-1") == ["LORLATINIB"]
+
+
+def test_refresh_fetches_misses_in_the_background(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_fetch(gene):
+        calls.append(gene)
+        return ["Osimertinib"]
+
+    monkeypatch.setattr(interaction_store_module, "fetch_drugs_from_api", fake_fetch)
+    store = InteractionStore(path=str(tmp_path / "dgidb.sqlite"), negative_ttl=60, refresh=True)
+    try:
+        # The miss is answered from the store straight away
+        assert store.drugs_for("EGFR") == []
+        deadline = time.monotonic() + 5
+        while store.drugs_for("EGFR") == [] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.drugs_for("EGFR") == ["Osimertinib"]
+        assert calls == ["EGFR"]
+    finally:
+        store.close()
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import fitz
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import services.job_queue as job_queue_module
+from models import Base, IngestJob
+from services.job_queue import JobQueue
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A database of its own, so the app's workers never claim these jobs
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def spooled(tmp_path):
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(b"%PDF-1.4 not really")
+    return str(path), hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+async def get_job(session_factory, job_id):
+    async with session_factory() as db:
+        return await db.get(IngestJob, job_id)
+
+
+async def wait_for_status(session_factory, job_id, status, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await get_job(session_factory, job_id)
+        if job.status == status:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} never became {status} (is {job.status})")
+
+
+def test_job_runs_with_the_digest_recorded_at_upload(session_factory, spooled, monkeypatch):
+    path, sha256 = spooled
+    calls = []
+
+    async def fake_ingest(path, filename, db, nlp_service, document_key, on_page=None):
+        calls.append(document_key)
+        await on_page({"page": 1, "page_count": 1, "document_entity_count": 2})
+        return {"filename": filename, "entities": []}
+
+    monkeypatch.setattr(job_queue_module, "ingest_pdf", fake_ingest)
+    # Hashing again would mean the recorded digest was ignored
+    monkeypatch.setattr(job_queue_module, "file_sha256", lambda path: pytest.fail("file hashed twice"))
+
+    async def scenario():
+        queue = JobQueue(session_factory, nlp_service=None, workers=1, poll_interval=0.05)
+        await queue.start()
+        try:
+            async with session_factory() as db:
+                job = await queue.enqueue(db, "upload.pdf", path, sha256)
+            return await wait_for_status(session_factory, job.id, "done")
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+    assert calls == [sha256]
+    assert (job.sha256, job.pages_done, job.entities_found) == (sha256, 1, 2)
+    assert job.result == {"filename": "upload.pdf", "entities": []}
+    assert not os.path.exists(path)
+
+
+def test_job_cancelled_at_shutdown_is_requeued_and_rerun(session_factory, spooled, monkeypatch):
+    path, sha256 = spooled
+    state = {"runs": 0}
+
+    async def slow_ingest(path, filename, db, nlp_service, document_key, on_page=None):
+        state["runs"] += 1
+        if state["runs"] == 1:
+            state["started"].set()
+            await asyncio.sleep(60)
+        return {"filename": filename, "entities": []}
+
+    monkeypatch.setattr(job_queue_module, "ingest_pdf", slow_ingest)
+
+    async def scenario():
+        state["started"] = asyncio.Event()
+        queue = JobQueue(session_factory, nlp_service=None, workers=1, poll_interval=0.05)
+        await queue.start()
+        async with session_factory() as db:
+            job = await queue.enqueue(db, "upload.pdf", path, sha256)
+        await asyncio.wait_for(state["started"].wait(), timeout=10)
+        await queue.stop()
+
+        interrupted = await get_job(session_factory, job.id)
+        # A restart picks it up straight away, without waiting for JOB_STALE_SECONDS
+        await queue.start()
+        try:
+            finished = await wait_for_status(session_factory, job.id, "done")
+        finally:
+            await queue.stop()
+        return interrupted, finished
+
+    interrupted, finished = asyncio.run(scenario())
+    assert interrupted.status == "queued"
+    assert state["runs"] == 2
+    assert finished.status == "done"
+
+
+def test_failed_job_records_the_error(session_factory, spooled, monkeypatch):
+    path, sha256 = spooled
+
+    async def broken_ingest(*args, **kwargs):
+        raise RuntimeError("not a PDF")
+
+    monkeypatch.setattr(job_queue_module, "ingest_pdf", broken_ingest)
+
+    async def scenario():
+        queue = JobQueue(session_factory, nlp_service=None, workers=1, poll_interval=0.05)
+        await queue.start()
+        try:
+            async with session_factory() as db:
+                job = await queue.enqueue(db, "upload.pdf", path, sha256)
+            return await wait_for_status(session_factory, job.id, "failed")
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+    assert job.error == "not a PDF"
+
+
+def test_deleted_job_is_dropped(session_factory, spooled):
+    path, _ = spooled
+    queue = JobQueue(session_factory, nlp_service=None)
+    asyncio.run(queue._run("missing", path, "upload.pdf"))
+    assert not os.path.exists(path)
+
+
+def test_jobs_api_round_trip(client):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Imatinib inhibits PDGFRB in these tumours.")
+    pdf = doc.tobytes()
+
+    response = client.post("/api/jobs", files={"file": ("paper.pdf", pdf, "application/pdf")})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/jobs/{job_id}").json()
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert status["status"] == "done", status
+    assert status["pages_done"] == status["page_count"] == 1
+
+    result = client.get(f"/api/jobs/{job_id}/result").json()
+    assert {"Imatinib", "PDGFRB"} <= {entity["name"] for entity in result["entities"]}
+    assert client.get("/api/jobs/unknown").status_code == 404
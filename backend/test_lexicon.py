@@ -0,0 +1,59 @@
+import pytest
+
+from services.lexicon import LexiconIndex, fold_text
+
+
+@pytest.fixture(scope="module")
+def index():
+    return LexiconIndex.from_dictionaries(
+        targets=["BCL-2", "PD-1", "PD-L1", "EGFR", "HER2"],
+        drugs=["Imatinib", "Anti-PD-1 antibody", "Trastuzumab"],
+        synonyms={"ERBB2": "HER2", "Herceptin": "Trastuzumab", "Gleevec": "NOPE"},
+    )
+
+
+def spans(text, matches):
+    return [(text[m.start:m.end], m.canonical, m.entity_type) for m in matches]
+
+
+def test_longest_match_wins_over_contained_terms(index):
+    text = "Treated with anti-PD-1 antibody after PD-L1 staining."
+    assert spans(text, index.find_all(text)) == [
+        ("anti-PD-1 antibody", "Anti-PD-1 antibody", "DRUG"),
+        ("PD-L1", "PD-L1", "TARGET"),
+    ]
+
+
+def test_spans_point_into_the_original_text(index):
+    text = "EGFR and ERBB2; herceptin targets HER2."
+    matches = index.find_all(text)
+    assert [(m.start, m.end) for m in matches] == [(0, 4), (9, 14), (16, 25), (34, 38)]
+    assert spans(text, matches) == [
+        ("EGFR", "EGFR", "TARGET"),
+        ("ERBB2", "HER2", "TARGET"),
+        ("herceptin", "Trastuzumab", "DRUG"),
+        ("HER2", "HER2", "TARGET"),
+    ]
+
+
+def test_matches_must_sit_on_token_boundaries(index):
+    assert index.find_all("EGFRvIII and pEGFR and BCL-22") == []
+    assert spans("(BCL-2)", index.find_all("(BCL-2)")) == [("BCL-2", "BCL-2", "TARGET")]
+
+
+def test_scan_window_and_prefolded_buffer(index):
+    text = "EGFR, then HER2, then PD-1."
+    folded = fold_text(text)
+    matches = index.find_all(text, start=6, end=16, folded=folded)
+    assert spans(text, matches) == [("HER2", "HER2", "TARGET")]
+
+
+def test_fold_text_keeps_offsets_aligned():
+    text = "İmatinib EGFR"
+    assert len(fold_text(text)) == len(text)
+    assert fold_text("EGFR") == "egfr"
+
+
+def test_synonym_to_unknown_term_is_skipped(index):
+    assert index.lookup("gleevec") is None
+    assert index.lookup("erbb2") == ("HER2", "TARGET")
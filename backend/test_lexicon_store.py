@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from services.lexicon_store import LexiconData, LexiconStore
+
+
+@pytest.fixture
+def seed():
+    data = LexiconData()
+    data.update(targets=["EGFR"], drugs=["Imatinib"], target_drugs={"EGFR": ["Gefitinib"]})
+    return data
+
+
+@pytest.fixture
+def store(tmp_path, seed):
+    store = LexiconStore(seed=seed, directory=str(tmp_path))
+    yield store
+    store.stop()
+
+
+def names(snapshot, text):
+    return [(m.canonical, m.entity_type) for m in snapshot.index.find_all(text)]
+
+
+def test_reload_picks_up_new_files(tmp_path, store):
+    before = store.snapshot
+    assert names(before, "EGFR and HER2") == [("EGFR", "TARGET")]
+
+    (tmp_path / "targets.tsv").write_text("term\ttype\tcanonical\nHER2\tTARGET\t\nERBB2\tTARGET\tHER2\n")
+    (tmp_path / "drugs.json").write_text(json.dumps({"drugs": ["Trastuzumab"], "target_drugs": {"her2": ["Trastuzumab"]}}))
+    result = store.reload()
+
+    assert result["changed"] and result["previous_version"] == before.version
+    assert result["files"] == ["drugs.json", "targets.tsv"]
+    after = store.snapshot
+    assert after.version != before.version
+    assert names(after, "EGFR, ERBB2 and trastuzumab") == [
+        ("EGFR", "TARGET"), ("HER2", "TARGET"), ("Trastuzumab", "DRUG")
+    ]
+    assert after.target_drugs["HER2"] == ("Trastuzumab",)
+    # Readers holding the old snapshot keep the old dictionaries
+    assert names(before, "ERBB2") == []
+    assert store.stats()["reload_count"] == 1
+
+
+def test_reload_without_changes_keeps_the_version(store):
+    version = store.snapshot.version
+    result = store.reload()
+    assert not result["changed"]
+    assert store.snapshot.version == version
+
+
+def test_failed_build_keeps_the_current_snapshot(tmp_path, store):
+    (tmp_path / "targets.tsv").write_text("term\ttype\nHER2\tTARGET\n")
+    store.reload()
+    good = store.snapshot
+
+    (tmp_path / "broken.tsv").write_text("name\tkind\nVEGF\tTARGET\n")
+    with pytest.raises(ValueError):
+        store.reload()
+    assert store.snapshot is good
+    assert "expected term/type" in store.stats()["last_error"]
+    assert store.stats()["reload_count"] == 1
+
+    (tmp_path / "broken.tsv").unlink()
+    store.reload()
+    assert store.stats()["last_error"] is None
+    assert store.snapshot.version == good.version
+
+
+def test_malformed_json_is_rolled_back_by_ensure_version(tmp_path, store, caplog):
+    good = store.snapshot
+    (tmp_path / "bad.json").write_text("{not json")
+    store.ensure_version("some-other-version")
+    assert store.snapshot is good
+    assert store.stats()["last_error"]
+    assert "Could not catch up with version some-other-version" in caplog.text
+
+
+def test_files_only_store_ignores_the_seed(tmp_path, seed):
+    (tmp_path / "targets.tsv").write_text("term\ttype\nHER2\tTARGET\n")
+    store = LexiconStore(seed=seed, directory=str(tmp_path), include_builtin=False)
+    assert names(store.snapshot, "EGFR and HER2") == [("HER2", "TARGET")]
+
+
+def test_background_reload(tmp_path, store):
+    (tmp_path / "targets.tsv").write_text("term\ttype\nHER2\tTARGET\n")
+    result = store.reload_in_background().result(timeout=10)
+    assert result["changed"]
+    assert store.snapshot.version == result["version"]
+
+
+def test_ensure_version_rebuilds_once_per_unreachable_version(tmp_path, store, caplog):
+    for _ in range(5):
+        store.ensure_version("unreachable")
+    assert store.reload_count == 1
+    assert "not retrying" in caplog.text
+
+    store.ensure_version("another-version")
+    assert store.reload_count == 2
+
+    # New files may make the version reachable, so it is tried again
+    (tmp_path / "targets.tsv").write_text("term\ttype\nHER2\tTARGET\n")
+    store.ensure_version("unreachable")
+    assert store.reload_count == 3
+    assert names(store.snapshot, "HER2") == [("HER2", "TARGET")]
+
+
+def test_ensure_version_is_a_no_op_at_the_current_version(store):
+    store.ensure_version(store.snapshot.version)
+    assert store.reload_count == 0
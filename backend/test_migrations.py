@@ -0,0 +1,67 @@
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from services.migrations import BASELINE_REVISION, _revisions, alembic_config, ensure_schema
+
+HEAD = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def assert_matches_models(engine):
+    # Raises AutogenerateDiffsDetected when the migrated schema differs from models.py
+    with engine.begin() as connection:
+        command.check(alembic_config(connection))
+
+
+def test_chain_has_one_head_back_to_the_baseline():
+    script = ScriptDirectory.from_config(alembic_config())
+    assert len(script.get_heads()) == 1
+    assert [r.revision for r in script.walk_revisions()][-1] == BASELINE_REVISION
+
+
+def test_empty_database_upgrades_to_head(engine):
+    assert ensure_schema(engine, auto_migrate=True) == {"revision": HEAD, "previous_revision": None, "upgraded": True}
+    assert_matches_models(engine)
+    # Restarts only read the revision
+    assert ensure_schema(engine, auto_migrate=True) == {"revision": HEAD, "upgraded": False}
+
+
+def test_unversioned_baseline_database_is_stamped_and_upgraded(engine):
+    # What the old drop_all/create_all startup left behind: the two result tables, no alembic_version
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), BASELINE_REVISION)
+        connection.execute(text("DROP TABLE ingest_jobs"))
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.execute(text("INSERT INTO therapies (name, entity_type, confidence) VALUES ('Imatinib', 'DRUG', 0.99)"))
+
+    assert ensure_schema(engine, auto_migrate=True)["upgraded"]
+    with engine.connect() as connection:
+        assert _revisions(connection) == (HEAD, HEAD)
+        assert inspect(connection).has_table("ingest_jobs")
+        assert connection.execute(text("SELECT name FROM therapies")).scalars().all() == ["Imatinib"]
+    assert_matches_models(engine)
+
+
+def test_outdated_schema_is_refused_without_auto_migrate(engine):
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), BASELINE_REVISION)
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        ensure_schema(engine, auto_migrate=False)
+
+
+def test_downgrade_to_baseline_and_back(engine):
+    ensure_schema(engine, auto_migrate=True)
+    with engine.begin() as connection:
+        command.downgrade(alembic_config(connection), BASELINE_REVISION)
+    with engine.connect() as connection:
+        assert _revisions(connection) == (BASELINE_REVISION, HEAD)
+    ensure_schema(engine, auto_migrate=True)
+    assert_matches_models(engine)
@@ -1,7 +1,9 @@
+import pytest
+
 from services.nlp_service import NlpService
 
-# Test text
-text = """Chondrosarcoma is histologically classified as grade 1–3 according
+# A clinical passage naming none of the lexicon's targets or drugs
+CHONDROSARCOMA_TEXT = """Chondrosarcoma is histologically classified as grade 1–3 according
 to the degree of malignancy, in addition, there are dedifferentiated
 and mesenchymal subtypes. Grade 3 chondrosarcoma is highly cellular with a mucomyxoid matrix and mitoses. Grade 3 chondrosarcoma tumors are mainly observed in adults, and most involve the
 pelvis, followed by the femur and humerus, and have a poor prognosis.1
@@ -15,14 +17,44 @@ immediately adjacent to a low-grade chondroid neoplasm.8 The incidence of DDCS i
 10%–15% of patients with central chondrosarcoma.10,11 The prognosis of DDCS is poor, with early distant metastasis and 5-year OAS
 rates of 6%–24%."""
 
-# Initialize service and run test
-nlp = NlpService()
-results = nlp.test_clinical_text(text)
+# Synonyms, a near miss (HDAC1), a repeated target and a multi-word drug
+TARGETED_TEXT = (
+    "BCL2 is overexpressed in grade 3 tumours. Imatinib targets PDGFR-beta, and HDAC1 "
+    "levels fell; pdgfrb again. VEGF inhibitors were not used."
+)
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    return NlpService()
+
 
-# Print results
-print("\nExtracted Entities by Type:")
-print("==========================")
-for entity_type, entities in results.items():
-    print(f"\n{entity_type}:")
+def test_text_without_lexicon_terms_yields_no_entities(nlp):
+    assert nlp.extract_entities(CHONDROSARCOMA_TEXT) == []
+
+
+def test_entities_are_resolved_to_canonical_names(nlp):
+    entities = nlp.extract_entities(TARGETED_TEXT)
+    assert [(e["text"], e["name"], e["entity_type"]) for e in entities] == [
+        ("BCL2", "BCL-2", "TARGET"),
+        ("Imatinib", "Imatinib", "DRUG"),
+        ("PDGFR-beta", "PDGFRB", "TARGET"),
+        ("HDAC1", "HDAC", "TARGET"),
+        ("VEGF inhibitors", "VEGF inhibitors", "DRUG"),
+    ]
+    by_name = {e["name"]: e for e in entities}
+    assert by_name["PDGFRB"]["related_drugs"] == ["Imatinib", "Sunitinib"]
+    assert "related_drugs" not in by_name["Imatinib"]
+    # Every mention of an entity, as offsets into the original text
+    assert [TARGETED_TEXT[start:end] for start, end in by_name["PDGFRB"]["mentions"]] == ["PDGFR-beta", "pdgfrb"]
     for e in entities:
-        print(f"- {e['text']} (confidence: {e['score']:.3f}, hesitancy: {e['hesitancy']:.3f})")
+        assert TARGETED_TEXT[e["start"]:e["end"]] == e["text"]
+        assert e["confidence"] == pytest.approx(0.99)
+        assert 0 <= e["hesitancy"] <= 1 and e["my"] + e["mn"] <= 1
+
+
+def test_organize_entities_by_type(nlp):
+    organized = nlp.organize_entities_by_type(nlp.extract_entities(TARGETED_TEXT))
+    assert [e["name"] for e in organized["targets"]] == ["BCL-2", "PDGFRB", "HDAC"]
+    assert [e["name"] for e in organized["drugs"]] == ["Imatinib", "VEGF inhibitors"]
+    assert organized["diseases"] == organized["anatomical"] == []
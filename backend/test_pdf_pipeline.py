@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+import fitz
+import pytest
+
+from services import pdf_pipeline
+
+
+def write_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def no_open_documents():
+    yield
+    for path in list(pdf_pipeline._open_docs):
+        pdf_pipeline._close_document(path)
+
+
+def page_text(path, page_no):
+    return pdf_pipeline._extract_page_text(path, page_no)[0].strip()
+
+
+def test_documents_stay_open_across_interleaved_uploads(tmp_path):
+    a = write_pdf(tmp_path / "a.pdf", ["A1", "A2", "A3"])
+    b = write_pdf(tmp_path / "b.pdf", ["B1", "B2", "B3"])
+    first_a = pdf_pipeline._get_document(a)
+    assert [page_text(a, 0), page_text(b, 0), page_text(a, 1), page_text(b, 1)] == ["A1", "B1", "A2", "B2"]
+    assert pdf_pipeline._get_document(a) is first_a
+
+
+def test_last_page_closes_the_document(tmp_path):
+    a = write_pdf(tmp_path / "a.pdf", ["A1", "A2"])
+    page_text(a, 0)
+    assert a in pdf_pipeline._open_docs
+    page_text(a, 1)
+    assert a not in pdf_pipeline._open_docs
+
+
+def test_reused_path_opens_the_new_file(tmp_path):
+    path = write_pdf(tmp_path / "upload.pdf", ["old first", "old second"])
+    assert page_text(path, 0) == "old first"
+    os.remove(path)
+    write_pdf(tmp_path / "upload.pdf", ["new first", "new second", "new third"])
+    assert page_text(path, 0) == "new first"
+
+
+def test_removed_files_are_closed_on_the_next_access(tmp_path):
+    gone = write_pdf(tmp_path / "gone.pdf", ["G1", "G2"])
+    kept = write_pdf(tmp_path / "kept.pdf", ["K1", "K2"])
+    page_text(gone, 0)
+    os.remove(gone)
+    page_text(kept, 0)
+    assert list(pdf_pipeline._open_docs) == [kept]
+
+
+def test_open_documents_are_bounded(tmp_path):
+    paths = [write_pdf(tmp_path / f"{i}.pdf", ["first", "second"]) for i in range(pdf_pipeline.OPEN_DOCUMENT_LIMIT + 2)]
+    for path in paths:
+        page_text(path, 0)
+    assert list(pdf_pipeline._open_docs) == paths[-pdf_pipeline.OPEN_DOCUMENT_LIMIT:]
+
+
+def test_iter_page_texts_yields_pages_in_order(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(1, 12)])
+
+    async def collect():
+        return [(page_no, count, text.strip()) async for page_no, count, text in pdf_pipeline.iter_page_texts(path, window=3)]
+
+    try:
+        pages = asyncio.run(collect())
+    finally:
+        pdf_pipeline.shutdown_page_pool()
+    assert pages == [(i, 11, f"Page {i + 1}") for i in range(11)]
@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+import pytest
+
+from services import pfs
+from services.pfs import LINGUISTIC_TERMS, EntityColumns
+
+
+def scalar_pfs(confidence):
+    """The per-entity mapping pfs replaced (the original NlpService.compute_pfs)."""
+    if confidence >= 0.9:
+        my, mn = LINGUISTIC_TERMS['very_high']
+    elif confidence >= 0.7:
+        my, mn = LINGUISTIC_TERMS['high']
+    elif confidence >= 0.5:
+        my, mn = LINGUISTIC_TERMS['medium']
+    elif confidence >= 0.3:
+        my, mn = LINGUISTIC_TERMS['low']
+    else:
+        my, mn = LINGUISTIC_TERMS['very_low']
+    h = math.sqrt(abs(1 - my ** 2 - mn ** 2))
+    return my, mn, h
+
+
+def scalar_aggregate(entities):
+    """The original NlpService.aggregate_pfs_values."""
+    n = len(entities)
+    return (
+        sum(e['my'] for e in entities) / n if n else 0,
+        sum(e['mn'] for e in entities) / n if n else 0,
+        sum(e['hesitancy'] for e in entities) / n if n else 0,
+    )
+
+
+# Every term boundary, just either side of it, and the ends of the range
+CONFIDENCES = sorted(
+    {0.0, 1.0, 0.05, 0.42, 0.66, 0.85, 0.95}
+    | {t + d for t in (0.3, 0.5, 0.7, 0.9) for d in (-1e-9, 0.0, 1e-9)}
+) + [float("nan")]
+
+
+def make_entities(confidences, types):
+    entities = []
+    for confidence, entity_type in zip(confidences, types):
+        my, mn, h = scalar_pfs(confidence)
+        entities.append({'entity_type': entity_type, 'confidence': confidence, 'my': my, 'mn': mn, 'hesitancy': h})
+    return entities
+
+
+def test_compute_pfs_matches_scalar_mapping():
+    my, mn, h = pfs.compute_pfs(CONFIDENCES)
+    assert list(zip(my.tolist(), mn.tolist(), h.tolist())) == pytest.approx(
+        [scalar_pfs(c) for c in CONFIDENCES]
+    )
+
+
+@pytest.mark.parametrize("confidence", CONFIDENCES)
+def test_compute_pfs_scalar_matches_scalar_mapping(confidence):
+    assert pfs.compute_pfs_scalar(confidence) == pytest.approx(scalar_pfs(confidence))
+
+
+def test_aggregate_matches_scalar_means():
+    rng = np.random.default_rng(0)
+    confidences = rng.random(500).tolist()
+    entities = make_entities(confidences, ['TARGET'] * len(confidences))
+    assert pfs.aggregate_entities(entities) == pytest.approx(scalar_aggregate(entities))
+    assert pfs.aggregate_entities([]) == scalar_aggregate([]) == (0, 0, 0)
+
+
+def test_aggregate_by_type_matches_grouped_scalar_means():
+    rng = np.random.default_rng(1)
+    confidences = rng.random(300).tolist()
+    types = rng.choice(['TARGET', 'DRUG', 'DISEASE'], size=300).tolist()
+    entities = make_entities(confidences, types)
+    columns = EntityColumns.from_records([dict(e, text='x', name='x') for e in entities])
+
+    by_type = columns.by_type()
+    assert sorted(by_type) == sorted(set(types))
+    for entity_type, summary in by_type.items():
+        group = [e for e in entities if e['entity_type'] == entity_type]
+        assert summary['count'] == len(group)
+        assert (summary['my'], summary['mn'], summary['hesitancy']) == pytest.approx(scalar_aggregate(group))
+
+
+def test_weighted_aggregate_matches_repeated_entities():
+    confidences = [0.2, 0.6, 0.95]
+    weights = [3, 1, 2]
+    repeated = make_entities([c for c, w in zip(confidences, weights) for _ in range(w)], ['TARGET'] * 6)
+    columns = EntityColumns.from_records([dict(e, text='x', name='x') for e in make_entities(confidences, ['TARGET'] * 3)])
+    assert columns.aggregate(weights) == pytest.approx(scalar_aggregate(repeated))
+    assert columns.aggregate([0, 0, 0]) == (0, 0, 0)
@@ -0,0 +1,101 @@
+import datetime
+import json
+
+import pytest
+from sqlalchemy import update
+
+from models import MolecularTarget, SessionLocal, Therapy
+
+# A confidence band no extraction produces, so other tests' rows stay out of these queries
+BAND = {"min_confidence": 0.1230, "max_confidence": 0.1239}
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    db = SessionLocal()
+    try:
+        therapies = [
+            Therapy(name=f"pagination-drug-{i}", entity_type="DISEASE" if i % 4 == 0 else "DRUG",
+                    confidence=0.1234, my=0.1, mn=0.9, hesitancy=0.0)
+            for i in range(12)
+        ]
+        targets = [MolecularTarget(name=f"PAGINATION-T{i}", confidence=0.1235) for i in range(3)]
+        db.add_all(therapies + targets)
+        db.commit()
+        return [t.id for t in therapies], [t.id for t in targets]
+    finally:
+        db.close()
+
+
+def fetch_all(client, kind, limit, params=None, between_pages=None):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = {"kind": kind, "limit": limit, **BAND, **(params or {})}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/results", params=query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        ids += [row["id"] for row in body[kind]]
+        pages += 1
+        cursor = body["next_cursor"][kind]
+        if cursor is None:
+            return ids, pages
+        if between_pages:
+            between_pages()
+
+
+def test_pages_walk_every_row_once_in_id_order(client, seeded):
+    therapy_ids, _ = seeded
+    ids, pages = fetch_all(client, "therapies", 5)
+    assert ids == sorted(therapy_ids)
+    assert pages == 3
+
+
+def test_upserts_between_pages_do_not_skip_or_repeat_rows(client, seeded):
+    therapy_ids, _ = seeded
+
+    def touch_first_row():
+        # What an upsert of an already-seen entity does: move its last-seen timestamp forward
+        db = SessionLocal()
+        try:
+            db.execute(update(Therapy).where(Therapy.id == therapy_ids[0])
+                       .values(timestamp=datetime.datetime.utcnow() + datetime.timedelta(days=1)))
+            db.commit()
+        finally:
+            db.close()
+
+    ids, _ = fetch_all(client, "therapies", 4, between_pages=touch_first_row)
+    assert ids == sorted(therapy_ids)
+
+
+def test_filters(client, seeded):
+    therapy_ids, target_ids = seeded
+    diseases, _ = fetch_all(client, "therapies", 100, {"entity_type": "disease"})
+    assert diseases == [therapy_ids[i] for i in (0, 4, 8)]
+    by_name = client.get("/api/results", params={"kind": "therapies", "name": "pagination-drug-3"}).json()
+    assert [row["id"] for row in by_name["therapies"]] == [therapy_ids[3]]
+    body = client.get("/api/results", params={"entity_type": "drug", **BAND}).json()
+    assert body["molecular_targets"] == []
+    body = client.get("/api/results", params={"entity_type": "target", **BAND}).json()
+    assert [row["id"] for row in body["molecular_targets"]] == target_ids
+
+
+def test_ndjson_streams_every_matching_row(client, seeded):
+    therapy_ids, target_ids = seeded
+    response = client.get("/api/results", params={"format": "ndjson", **BAND})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["kind"], row["id"]) for row in rows] == (
+        [("molecular_targets", i) for i in target_ids] + [("therapies", i) for i in therapy_ids]
+    )
+
+
+@pytest.mark.parametrize("params", [
+    {"cursor": "not-a-cursor", "kind": "therapies"},
+    {"cursor": "eyJpZCI6IDF9", "kind": "all"},
+    {"kind": "unknown"},
+    {"limit": 0},
+    {"format": "xml"},
+])
+def test_bad_requests(client, params):
+    assert client.get("/api/results", params=params).status_code == 400
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Document, DocumentPage, PageEntity
+from services.search import parse_terms, remove_document_pages, search_pages, store_page
+
+PAGES = {
+    ("doc-a", 1): ("Imatinib inhibits PDGFRB in gastrointestinal stromal tumours.",
+                   [("Imatinib", "DRUG", [(0, 8)]), ("PDGFRB", "TARGET", [(18, 24)])]),
+    ("doc-a", 2): ("Resistance to imatinib was seen in 3 of 40 patients.",
+                   [("Imatinib", "DRUG", [(14, 22)])]),
+    ("doc-b", 1): ("BCL-2 expression rose; venetoclax restored apoptosis.",
+                   [("BCL-2", "TARGET", [(0, 5)])]),
+}
+
+
+def entities(spec):
+    return [{"name": name, "entity_type": kind, "mentions": mentions} for name, kind, mentions in spec]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Document(sha256="doc-a", filename="a.pdf"))
+    for (key, page), (text, spec) in PAGES.items():
+        store_page(session, key, page, text, entities(spec))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_parse_terms():
+    assert parse_terms('imatinib "stromal tumours" -resistance OR pdgfrb') == (
+        ["imatinib", "stromal tumours", "pdgfrb"], ["resistance"]
+    )
+
+
+def test_search_matches_marks_and_joins_filenames(db):
+    result = search_pages(db, "imatinib")
+    assert result["total"] == 2
+    assert [(r["document_key"], r["page"], r["filename"]) for r in result["results"]] == [
+        ("doc-a", 1, "a.pdf"), ("doc-a", 2, "a.pdf")
+    ]
+    assert "<mark>Imatinib</mark>" in result["results"][0]["snippet"]
+    assert result["results"][0]["entities"][0] == {"name": "Imatinib", "entity_type": "DRUG", "mentions": [[0, 8]]}
+
+
+def test_phrases_exclusions_and_entity_filters(db):
+    assert search_pages(db, '"stromal tumours"')["total"] == 1
+    assert search_pages(db, "imatinib -resistance")["total"] == 1
+    assert search_pages(db, "imatinib", entity="pdgfrb")["total"] == 1
+    assert search_pages(db, "apoptosis", entity_type="target")["results"][0]["document_key"] == "doc-b"
+    assert search_pages(db, "100%_literal")["total"] == 0
+
+
+def test_facets_count_pages_across_all_matches(db):
+    facets = search_pages(db, "imatinib", limit=1)["facets"]
+    assert facets["entity_type"] == {"DRUG": 2, "TARGET": 1}
+    assert facets["entities"][0] == {"name": "Imatinib", "entity_type": "DRUG", "pages": 2}
+
+
+def test_storing_a_page_twice_keeps_one_copy(db):
+    # A concurrent upload of the same file writes the same page again
+    text, spec = PAGES[("doc-a", 1)]
+    store_page(db, "doc-a", 1, text, entities(spec))
+    db.commit()
+    assert db.scalar(select(func.count()).select_from(DocumentPage).where(DocumentPage.document_key == "doc-a")) == 2
+    assert db.scalar(select(func.count()).select_from(PageEntity).where(PageEntity.document_key == "doc-a")) == 3
+    assert search_pages(db, "pdgfrb")["total"] == 1
+
+
+def test_nul_bytes_are_replaced(db):
+    store_page(db, "doc-c", 1, "HER2\x00positive", [])
+    db.commit()
+    assert db.scalar(select(DocumentPage.text).where(DocumentPage.document_key == "doc-c")) == "HER2 positive"
+
+
+def test_remove_document_pages(db):
+    assert remove_document_pages(db, "doc-a") == 2
+    db.commit()
+    assert search_pages(db, "imatinib")["total"] == 0
+    assert db.scalar(select(func.count()).select_from(PageEntity).where(PageEntity.document_key == "doc-a")) == 0
@@ -0,0 +1,45 @@
+from services.segmentation import sentence_spans
+
+
+def sentences(text, **kwargs):
+    return [text[start:end] for start, end in sentence_spans(text, **kwargs)]
+
+
+def test_splits_on_sentence_final_punctuation():
+    text = "EGFR is mutated. Is HER2 amplified? Yes! (BCL-2 was not.)"
+    assert sentences(text) == ["EGFR is mutated.", "Is HER2 amplified?", "Yes!", "(BCL-2 was not.)"]
+
+
+def test_abbreviations_and_initials_do_not_end_a_sentence():
+    text = "As shown by Smith et al. in Fig. 2, imatinib (cf. J. Doe) works, e.g. in CML. It binds ABL."
+    assert sentences(text) == [
+        "As shown by Smith et al. in Fig. 2, imatinib (cf. J. Doe) works, e.g. in CML.",
+        "It binds ABL.",
+    ]
+
+
+def test_lower_case_continuation_is_not_a_boundary():
+    assert sentences("Dosed at 1.5 mg. daily for two weeks.") == ["Dosed at 1.5 mg. daily for two weeks."]
+
+
+def test_line_wraps_join_and_blank_lines_split():
+    text = "Imatinib inhibits\nBCR-ABL in chronic\nmyeloid leukaemia\n\nResults\n  \n  Response rates rose."
+    assert sentences(text) == [
+        "Imatinib inhibits\nBCR-ABL in chronic\nmyeloid leukaemia",
+        "Results",
+        "Response rates rose.",
+    ]
+
+
+def test_spans_exclude_whitespace_and_stay_inside_the_window():
+    text = "  Skip me.   EGFR is mutated.  HER2 too.  Skip me too."
+    start = text.index("EGFR")
+    end = text.index("Skip me too")
+    spans = sentence_spans(text, start=start, end=end)
+    assert [text[s:e] for s, e in spans] == ["EGFR is mutated.", "HER2 too."]
+    assert all(start <= s < e <= end for s, e in spans)
+
+
+def test_empty_and_whitespace_only_text():
+    assert sentence_spans("") == []
+    assert sentence_spans(" \n\n \t") == []
@@ -34,7 +34,8 @@ document.getElementById('pdf-form').addEventListener('submit', async function(e)
         const formData = new FormData();
         formData.append('file', file);
         
-        const response = await fetch('/api/upload', {
+        // Progress and entities arrive as newline-delimited JSON events while pages are processed
+        const response = await fetch('/api/upload?format=ndjson', {
             method: 'POST',
             body: formData
         });
@@ -43,9 +44,7 @@ document.getElementById('pdf-form').addEventListener('submit', async function(e)
             throw new Error(`Upload failed: ${response.statusText}`);
         }
         
-        const data = await response.json();
-        displayResults(data);
-        updateMetrics(data.metrics);
+        await readEvents(response, handleUploadEvent);
         
     } catch (error) {
         contentDisplay.innerHTML = `
@@ -56,7 +55,49 @@ document.getElementById('pdf-form').addEventListener('submit', async function(e)
     }
 });
 
-function displayResults(data) {
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+        
+        if (done) {
+            break;
+        }
+    }
+}
+
+function handleUploadEvent(event) {
+    switch (event.event) {
+        case 'start':
+            displayResults();
+            updateProgress(`Processing ${event.filename}...`);
+            break;
+        case 'page':
+            appendEntities(event.entities);
+            updateProgress(`Page ${event.page} of ${event.page_count} &middot; ${event.entity_count} entities`);
+            break;
+        case 'entities':
+            appendEntities(event.entities);
+            break;
+        case 'done':
+            updateProgress(`Processed ${event.page_count} pages &middot; ${event.entity_count} entities${event.cached ? ' (cached)' : ''}`);
+            document.getElementById('upload-progress').classList.remove('loading');
+            updateMetrics(event.metrics);
+            break;
+        case 'error':
+            throw new Error(event.detail);
+    }
+}
+
+function displayResults() {
     const contentDisplay = document.getElementById('content-display');
     
     let html = '<div class="results-container">';
@@ -64,9 +105,20 @@ function displayResults(data) {
     // Display entities with PFS metrics
     html += '<div class="entities-section">';
     html += '<h2>Extracted Entities</h2>';
+    html += '<div id="upload-progress" class="progress loading"></div>';
+    html += '<div id="entity-list"></div>';
+    html += '</div>';
     
-    data.entities.forEach(entity => {
-        html += `
+    html += '</div>';
+    contentDisplay.innerHTML = html;
+}
+
+function updateProgress(message) {
+    document.getElementById('upload-progress').innerHTML = message;
+}
+
+function appendEntities(entities) {
+    const html = entities.map(entity => `
             <div class="entity ${entity.entity_type.toLowerCase()}">
                 <div class="entity-header">
                     <h3>${entity.text}</h3>
@@ -92,11 +144,9 @@ function displayResults(data) {
                     View Guidelines
                 </button>
             </div>
-        `;
-    });
+        `).join('');
     
-    html += '</div>';
-    contentDisplay.innerHTML = html;
+    document.getElementById('entity-list').insertAdjacentHTML('beforeend', html);
 }
 
 async function showGuidelines(targetName, entityType) {